@@ -28,15 +28,12 @@ if __name__ == "__main__":
     # Prep the dataset
     dataset = api.dataset(datasetName=primary_dataset)
 
-    # Get a scene cursor using the filter
-    scene_cursor = dataset.scenes(sceneFilter=scene_filter)
-
-    # Capture only those available for download
-    scenes = scene_cursor.downloadable
-
-    # Collect more scenes using the scene cursor
-    while scene_cursor.has_more:
-        scenes += scene_cursor.next().downloadable
+    # Lazily iterate every page of the search, capturing only the scenes
+    # available for download
+    scenes = [
+        scene for scene in dataset.iter_scenes(sceneFilter=scene_filter)
+        if scene.options.get("download", False)
+    ]
 
     # Enqueue the scenes
     api.download(scenes)
@@ -1,4 +1,5 @@
 from .api import Api
+from .aio import AsyncApi
 
 
 __pdoc__ = {
@@ -7,5 +8,6 @@ __pdoc__ = {
 
 
 __all__ = [
-    'Api'
+    'Api',
+    'AsyncApi'
 ]
@@ -0,0 +1,267 @@
+import asyncio
+from typing import List
+
+import requests
+
+from .api import Api
+from .cache import MISS
+from .exceptions import UsgsApiError
+from .fanout import merge_data
+from .singleflight import NEVER_COALESCE, AsyncSingleFlight
+from .utilities import request_key
+from .query import Query
+from .model import Model
+from .queries import *
+from .models import DatasetModel, SceneModel
+from .transport import AsyncTransport, ThreadedAsyncTransport
+
+
+class AsyncApi:
+
+    """asyncio interface to the Earth Explorer M2M API. Mirrors the Api
+    fetch/fetchone/request surface with awaitables and reuses the same
+    Query objects and Model hydration, so a SceneQuery can be run in
+    either mode.
+
+    Login state (API_KEY, BASE_URL, SESSION_LABEL) is shared with the
+    synchronous Api class.
+
+    Models built by this client hold a reference to it, so their relations
+    (dataset.scenes(), result_set.next(), ...) return awaitables as well.
+
+    Concurrent identical fetches on one client share a single request.
+
+    Parameters
+    ----------
+    max_concurrency : int, optional
+        Maximum number of requests in flight at once, by default 10
+    transport : AsyncTransport, optional
+        The asyncio transport, by default a ThreadedAsyncTransport sharing
+        Api.transport's connection pool
+    api : type, optional
+        The synchronous Api class providing state and decoding, by default Api
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 10,
+        transport: AsyncTransport = None,
+        api: type = Api,
+    ):
+        self.api = api
+        self.max_concurrency = max_concurrency
+        self.transport = transport or ThreadedAsyncTransport(api.transport)
+        self._semaphore = None
+        self._single_flight = AsyncSingleFlight()
+
+    @property
+    def API_KEY(self):
+        return self.api.API_KEY
+
+    @property
+    def BASE_URL(self):
+        return self.api.BASE_URL
+
+    @property
+    def SESSION_LABEL(self):
+        return self.api.SESSION_LABEL
+
+    @property
+    def hydrator(self):
+        return self.api.hydrator
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def login(self, username: str = None, password: str = None) -> "AsyncApi":
+        """Acquire the API key, see Api.login for how credentials are resolved
+
+        Returns
+        -------
+        AsyncApi
+            This client, with the API key persisted on the shared Api
+        """
+        login_url = f"{self.BASE_URL}/login"
+
+        login_parameters = self.api._credentials(username, password)
+
+        self.api.API_KEY = await self.request(login_url, login_parameters)
+
+        return self
+
+    async def datasets(self, *args, **kwargs) -> List[DatasetModel]:
+        """Awaitable alias to the DatasetsQuery
+
+        Returns
+        -------
+        List[DatasetModel]
+            Collection of datasets
+        """
+        return await self.fetch(DatasetsQuery(*args, **kwargs))
+
+    async def dataset(self, *args, **kwargs) -> DatasetModel:
+        """Awaitable alias to the single dataset Model
+        Requires either a datasetName or datasetId to be set
+
+        Returns
+        -------
+        DatasetModel
+            Single identified dataset if exists
+        """
+        return await self.fetchone(DatasetQuery(*args, **kwargs))
+
+    async def scenes(self, *args, **kwargs) -> List[SceneModel]:
+        """Awaitable alias to the SceneQuery
+
+        Returns
+        -------
+        List[SceneModel]
+            Returns a ResultSet of the collected scenes
+        """
+        return await self.fetch(SceneQuery(*args, **kwargs))
+
+    async def fetch(self, query: Query) -> List[Model]:
+        """Fetch the provided instantiated Query object
+
+        Parameters
+        ----------
+        query : Query
+            The instantiated Query object
+
+        Returns
+        -------
+        List[Model]
+            Returns a list of instantiated Models
+        """
+        fan_out = self.api.fan_out
+        if fan_out and fan_out.applies(query):
+            result = merge_data(await fan_out.run_async(self._fetch_data, query))
+        else:
+            result = await self._fetch_data(query)
+
+        return self.api._timed_hydrate(result, query, self)
+
+    async def _fetch_data(self, query: Query):
+        payload = query.to_dict()
+
+        result = self.api._cached(query, payload)
+
+        if result is MISS:
+            url = query.endpoint(self.BASE_URL)
+            if query._end_point in NEVER_COALESCE:
+                result = await self.request(url, data=payload)
+            else:
+                result = await self._single_flight.do(
+                    request_key(query._end_point, payload),
+                    lambda: self.request(url, data=payload),
+                )
+            self.api._store(query, payload, result)
+
+        return result
+
+    async def fetchone(self, query: Query) -> Model:
+        """Awaitable alias to fetch() returning the first indexed value
+
+        Parameters
+        ----------
+        query : Query
+            Instance of the Query to be matched against
+
+        Returns
+        -------
+        Model
+        """
+        data = await self.fetch(query)
+        if isinstance(data, list):
+            return data[0]
+        return data
+
+    async def gather(self, *queries: Query) -> list:
+        """Fetch many queries concurrently, bounded by max_concurrency
+
+        Returns
+        -------
+        list
+            The results in the order of the queries
+        """
+        return await asyncio.gather(*(self.fetch(query) for query in queries))
+
+    async def request(
+        self,
+        url: str,
+        data: dict = None,
+        json_data: str = None,
+        api_key: str = None,
+        raw: bool = False,
+    ):
+        """Awaitable counterpart of Api.request
+
+        Parameters
+        ----------
+        url : str
+            The full URL to the usgs endpoint
+        data : dict, optional
+            The post data to be used in the query, by default None
+        json_data : str, optional
+            Pre-encoded post data, by default None
+        api_key : str, optional
+            The EE api key obtained from login. by default None
+        raw: bool, optional
+            Returns the raw content of the request
+
+        Returns
+        -------
+        Any
+            The `data` member of the response
+
+        Raises
+        ------
+        UsgsApiError
+            See Api.request
+        """
+        endpoint = self.api._endpoint_of(url)
+
+        post_data, headers = self.api._prepare_request(data, json_data, api_key)
+
+        attempts = 0
+
+        async def attempt():
+            nonlocal attempts
+            attempts += 1
+
+            async with self.semaphore:
+                if self.api.scheduler:
+                    await self.api.scheduler.acquire_async(endpoint)
+
+                started = self.api._on_request(endpoint, url, post_data, attempts)
+                timings = {}
+                try:
+                    try:
+                        request = await self.transport.post(url, post_data, headers=headers)
+                    except (requests.RequestException, OSError) as e:
+                        raise self.api._transport_error(e, url) from e
+
+                    result = self.api._handle_response(request, url, raw=raw, timings=timings)
+                except UsgsApiError as error:
+                    self.api._on_error(endpoint, url, error, started, attempts)
+                    raise
+
+            self.api._on_response(endpoint, url, request, started, timings, attempts)
+            return result
+
+        if self.api.retry:
+            return await self.api.retry.run_async(endpoint, attempt, url)
+        return await attempt()
+
+    async def close(self):
+        await self.transport.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
@@ -1,17 +1,38 @@
 import random
-import json
+import requests
 import getpass
-import datetime
+import time
 from os import getenv
-from typing import List
-
-import requests
+from typing import Callable, List
 
 from logging import getLogger
 
 from .query import Query
 from .model import Model
+from .transport import Transport, SessionTransport
+from .throttle import RequestScheduler
+from .retry import RetryPolicy
+from .cache import MISS, ResponseCache
+from .catalog import SceneCatalog
+from .registry import DatasetRegistry
+from .federated import FederatedSearch
+from .stream import ResultStream
+from .singleflight import NEVER_COALESCE, SingleFlight
+from .fanout import FanOut, merge_data
+from .telemetry import (
+    ErrorEvent,
+    Hook,
+    HydrationEvent,
+    Instrumentation,
+    RequestEvent,
+    ResponseEvent,
+)
+from .exceptions import RateLimitError, TransientServerError, UsgsApiError, error_for
 from .queries import *
+from .utilities import DataTypeEncoder, request_key
+from .codec import JsonCodec, get_codec
+from .hydrate import Hydrator
+from .scenelist import SceneMetadataCache
 from .models import DatasetModel, SceneModel
 
 
@@ -40,6 +61,58 @@ class Api:
     SESSION_LABEL : str
         The label used to queue/order downloadable scenes
 
+    transport : Transport
+        The pooled HTTP transport used for every request. Defaults to a
+        keep-alive SessionTransport, replace with Api.use_transport
+
+    scheduler : RequestScheduler
+        Per endpoint token buckets pacing requests below the server's rate
+        limit. Set to None to disable client side throttling
+
+    retry : RetryPolicy
+        Retries transient failures in place with jittered exponential
+        backoff and a circuit breaker per endpoint. Set to None to disable
+
+    cache : ResponseCache
+        Optional cache consulted by fetch, keyed on the endpoint and the
+        canonical query payload. Disabled (None) by default
+
+    single_flight : SingleFlight
+        Coalesces concurrent identical fetches into one request. Set to
+        None to disable
+
+    fan_out : FanOut
+        Splits list valued parameters (entityIds, downloads) of large
+        queries into chunks fetched concurrently. Set to None to disable
+
+    hooks : Instrumentation
+        Telemetry hooks notified of every request attempt, register with
+        Api.add_hook
+
+    codec : JsonCodec
+        Encodes request bodies and decodes responses. orjson when it is
+        installed, the standard library otherwise
+
+    hydrator : Hydrator
+        Builds the Models from the decoded responses with compiled per class
+        constructors. Members a Model does not declare are kept in its
+        `_extra` by default
+
+    scene_metadata : SceneMetadataCache
+        Scene records fetched in bulk for summary searches, kept per
+        entityId so a scene's full metadata is only fetched once
+
+    registry : DatasetRegistry
+        Process wide dataset descriptors answering dataset and unfiltered
+        dataset-search requests until their TTL expires. Memory only by
+        default, give it a path to share it between processes. Set to None
+        to disable
+
+    catalog : SceneCatalog
+        Optional local scene catalog. Scene searches inside an extent it
+        holds are answered from it, scene-search responses are added to it.
+        Disabled (None) by default
+
     """
 
     log = getLogger("usgs_api")
@@ -50,12 +123,44 @@ class Api:
         404: "404 Not Found",
         401: "401 Unauthorized",
         400: "General Error",
+        429: "429 Too Many Requests",
+        500: "500 Internal Server Error",
+        502: "502 Bad Gateway",
+        503: "503 Service Unavailable",
+        504: "504 Gateway Timeout",
     }
 
     BASE_URL = getenv("EE_URL", None) or "https://m2m.cr.usgs.gov/api/api/json/stable"
 
     SESSION_LABEL = f"m2m-label-{random.getrandbits(32)}"
 
+    transport: Transport = SessionTransport()
+
+    scheduler: RequestScheduler = RequestScheduler()
+
+    retry: RetryPolicy = RetryPolicy()
+
+    cache: ResponseCache = None
+
+    single_flight: SingleFlight = SingleFlight()
+
+    fan_out: FanOut = FanOut()
+
+    hooks: Instrumentation = Instrumentation()
+
+    codec: JsonCodec = get_codec()
+
+    hydrator: Hydrator = Hydrator()
+
+    scene_metadata: SceneMetadataCache = SceneMetadataCache()
+
+    registry: DatasetRegistry = DatasetRegistry()
+
+    catalog: SceneCatalog = None
+
+    # Compressed responses are inflated by urllib3 as they are read
+    _HEADERS = {"Accept-Encoding": "gzip, deflate"}
+
     def __init__(self, username: str = None, password: str = None):
         if not self.API_KEY:
             Api.login(username, password)
@@ -98,6 +203,17 @@ class Api:
         SceneQuery._api = self
         return SceneQuery(*args, **kwargs).fetch()
 
+    def federated_scenes(self, datasets: list, scene_filter=None, **kwargs) -> FederatedSearch:
+        """Search several datasets with one SceneFilter concurrently and
+        iterate their scenes merged in order, see FederatedSearch
+
+        Returns
+        -------
+        FederatedSearch
+            Iterable of SceneModels tagged with their datasetName
+        """
+        return FederatedSearch(self, datasets, scene_filter, **kwargs)
+
     @classmethod
     def login(cls, username: str = None, password: str = None):
         """Allows for three options to acquire the API key from EE
@@ -119,6 +235,29 @@ class Api:
             A static Api class with the API key persisted
         """
 
+        login_url = f"{cls.BASE_URL}/login"
+
+        login_parameters = cls._credentials(username, password)
+
+        cls.API_KEY = cls.request(login_url, login_parameters)
+
+        return cls()
+
+    @staticmethod
+    def _credentials(username: str = None, password: str = None) -> dict:
+        """Resolve the username/password from the arguments, the environment
+        or a prompt (in that order)
+
+        Returns
+        -------
+        dict
+            The login parameters for the login endpoint
+
+        Raises
+        ------
+        ValueError
+            If either value could not be resolved
+        """
         username = (
             username or getenv("EE_USER", None) or input("Please enter username > ")
         )
@@ -129,16 +268,34 @@ class Api:
             or getpass.getpass("Please enter EE password > ")
         )
 
-        login_url = f"{cls.BASE_URL}/login"
-
-        login_parameters = {"username": username, "password": password}
-
         if not username or not password:
             raise ValueError("Username or Password must be defined")
 
-        cls.API_KEY = cls.request(login_url, login_parameters)
+        return {"username": username, "password": password}
 
-        return cls()
+    @classmethod
+    def use_transport(cls, transport: Transport = None, **kwargs) -> Transport:
+        """Swap the transport used for all requests, closing the previous
+        connection pool
+
+        Parameters
+        ----------
+        transport : Transport, optional
+            A ready made transport (e.g. HttpxTransport). If omitted a
+            SessionTransport is built from the keyword arguments
+            (pool_connections, pool_maxsize, pool_block, keep_alive, timeout)
+
+        Returns
+        -------
+        Transport
+            The transport now in use
+        """
+        if cls.transport is not None:
+            cls.transport.close()
+
+        cls.transport = transport or SessionTransport(**kwargs)
+
+        return cls.transport
 
     @classmethod
     def fetch(cls, query: Query) -> List[Model]:
@@ -154,13 +311,141 @@ class Api:
         List[Model]
             Returns a list of instantiated Models
         """
-        result = cls.request(query.endpoint(cls.BASE_URL), data=query.to_dict())
+        if cls.fan_out and cls.fan_out.applies(query):
+            result = merge_data(cls.fan_out.run(cls._fetch_data, query))
+        else:
+            result = cls._fetch_data(query)
+
+        return cls._timed_hydrate(result, query)
+
+    @classmethod
+    def _fetch_data(cls, query: Query):
+        """The `data` member for a query, from the cache, a coalesced
+        in-flight request or a new request
+        """
+        payload = query.to_dict()
+
+        result = cls._cached(query, payload)
+
+        if result is MISS:
+            result = cls._coalesce(
+                query, payload, lambda: cls.request(query.endpoint(cls.BASE_URL), data=payload)
+            )
+            cls._store(query, payload, result)
+
+        return result
+
+    @classmethod
+    def _coalesce(cls, query: Query, payload: dict, fn):
+        """Share one in-flight request between concurrent identical fetches"""
+        if cls.single_flight is None or query._end_point in NEVER_COALESCE:
+            return fn()
+        return cls.single_flight.do(request_key(query._end_point, payload), fn)
+
+    @classmethod
+    def stream(cls, query: Query, chunk_size: int = 64 * 1024) -> ResultStream:
+        """Fetch the Query and decode its result incrementally, yielding
+        one hydrated Model at a time (SceneModel for scene-search, Download
+        for download-retrieve). Peak memory scales with one item rather
+        than the whole page
+
+        Parameters
+        ----------
+        query : Query
+            A Query declaring _stream_models
+        chunk_size : int, optional
+            Bytes read from the response at a time, by default 64KB
+
+        Returns
+        -------
+        ResultStream
+            Iterable of Models, page level members (totalHits, nextRecord...)
+            are available from .meta once it is consumed
+        """
+        if not query._stream_models:
+            raise ValueError(f"{query._end_point} does not support streaming")
+
+        url = query.endpoint(cls.BASE_URL)
+
+        chunks = cls.request(url, data=query.to_dict(), chunk=True, chunk_size=chunk_size)
+
+        return ResultStream(
+            chunks,
+            query._stream_models,
+            build=lambda model, item: cls.hydrator.build(model, item, cls, query),
+            on_error=lambda code, message: cls._raise_error(code, message, url),
+        )
+
+    @classmethod
+    def _cached(cls, query: Query, payload: dict):
+        if cls.registry is not None:
+            result = cls.registry.answer(query._end_point, payload)
+            if result is not None:
+                return result
+        if cls.catalog is not None:
+            result = cls.catalog.answer(query._end_point, payload)
+            if result is not None:
+                return result
+        if cls.cache is None:
+            return MISS
+        return cls.cache.get(query._end_point, payload)
+
+    @classmethod
+    def _store(cls, query: Query, payload: dict, result):
+        if cls.cache is not None:
+            cls.cache.set(query._end_point, payload, result)
+        if cls.registry is not None:
+            cls.registry.ingest_response(query._end_point, payload, result)
+        if cls.catalog is not None:
+            cls.catalog.ingest_response(query._end_point, payload, result)
+
+    @classmethod
+    def _timed_hydrate(cls, result, query: Query, api=None):
+        """_hydrate, reporting the time spent to the telemetry hooks"""
+        if not cls.hooks:
+            return cls._hydrate(result, query, api)
+
+        started = time.perf_counter()
+        models = cls._hydrate(result, query, api)
+        if isinstance(result, list):
+            count = len(result)
+        elif isinstance(result, dict):
+            count = len(result.get("results") or ()) or 1
+        else:
+            count = 0
+        cls.hooks.emit(
+            "on_hydrate", HydrationEvent(query._end_point, time.perf_counter() - started, count)
+        )
+        return models
+
+    @classmethod
+    def _hydrate(cls, result, query: Query, api=None):
+        """Build the Model(s) for a decoded response
+
+        Parameters
+        ----------
+        result : Union[dict, list]
+            The `data` member of the response
+        query : Query
+            The Query that produced the result
+        api : optional
+            The api reference handed to the models, by default this class
+
+        Returns
+        -------
+        Union[Model, List[Model]]
+        """
+        api = api or cls
+
+        if query._model is None:
+            # Endpoints answering with a plain value (e.g. scene-list-add's count)
+            return result
 
         if isinstance(result, dict):
             # We got a paginated result
-            result = query._model(**result, _api=cls, _query=query)
+            result = cls.hydrator.build(query._model, result, api, query)
         elif result:
-            result = cls._build_result(result, query)
+            result = cls._build_result(result, query, api)
         return result
 
     @classmethod
@@ -221,49 +506,227 @@ class Api:
 
         Returns
         -------
-        [type]
-            [description]
+        Any
+            The `data` member of the response, or the raw content/iterator
+
+        Raises
+        ------
+        UsgsApiError
+            A typed error (AuthenticationError, RateLimitError,
+            TransientServerError, ValidationError, NotFoundError) once
+            retries are exhausted or the failure is not retryable
         """
 
-        api_key = api_key or cls.API_KEY
+        endpoint = cls._endpoint_of(url)
 
-        post_data = json.dumps(data, cls=DataTypeEncoder) if data else json_data
+        post_data, headers = cls._prepare_request(data, json_data, api_key)
 
-        request = requests.post(
-            url, post_data, headers={"X-Auth-Token": api_key} if api_key else {}
+        attempts = 0
+
+        def attempt():
+            nonlocal attempts
+            attempts += 1
+
+            if cls.scheduler:
+                cls.scheduler.acquire(endpoint)
+
+            started = cls._on_request(endpoint, url, post_data, attempts)
+            timings = {}
+            try:
+                request = cls._send(url, post_data, headers, stream=chunk)
+
+                result = cls._handle_response(request, url, raw, chunk, chunk_size, timings)
+            except UsgsApiError as error:
+                cls._on_error(endpoint, url, error, started, attempts)
+                raise
+
+            if chunk:
+                # Reported once the stream is read, with the bytes read
+                return cls._read_stream(
+                    result, timings, lambda: cls._on_response(endpoint, url, request, started, timings, attempts)
+                )
+
+            cls._on_response(endpoint, url, request, started, timings, attempts)
+            return result
+
+        if cls.retry:
+            return cls.retry.run(endpoint, attempt, url)
+        return attempt()
+
+    @classmethod
+    def add_hook(cls, hook: Hook) -> Hook:
+        """Register a telemetry hook (e.g. usgs.telemetry.MetricsCollector)
+        receiving on_request, on_response, on_error and on_hydrate events
+
+        Returns
+        -------
+        Hook
+            The registered hook
+        """
+        return cls.hooks.add(hook)
+
+    @classmethod
+    def _on_request(cls, endpoint: str, url: str, post_data, attempt: int) -> float:
+        if cls.hooks:
+            cls.hooks.emit(
+                "on_request",
+                RequestEvent(endpoint, url, len(post_data) if post_data else 0, attempt),
+            )
+        return time.perf_counter()
+
+    @classmethod
+    def _on_response(cls, endpoint: str, url: str, request, started: float, timings: dict, attempt: int):
+        if cls.hooks:
+            cls.hooks.emit(
+                "on_response",
+                ResponseEvent(
+                    endpoint,
+                    url,
+                    status=request.status_code,
+                    latency=time.perf_counter() - started,
+                    response_bytes=timings.get("response_bytes", 0),
+                    decode_time=timings.get("decode_time", 0.0),
+                    attempt=attempt,
+                ),
+            )
+
+    @staticmethod
+    def _read_stream(chunks, timings: dict, done: Callable):
+        """Yield the chunks of a streamed response, counting their bytes
+        into timings. done() is called once the stream is exhausted or closed
+        """
+        timings["response_bytes"] = 0
+        try:
+            for chunk in chunks:
+                timings["response_bytes"] += len(chunk)
+                yield chunk
+        finally:
+            done()
+
+    @classmethod
+    def _on_error(cls, endpoint: str, url: str, error: Exception, started: float, attempt: int):
+        if cls.hooks:
+            cls.hooks.emit(
+                "on_error",
+                ErrorEvent(endpoint, url, error, time.perf_counter() - started, attempt),
+            )
+
+    @classmethod
+    def _send(cls, url: str, post_data, headers: dict, **kwargs):
+        """Post through the transport, turning connection level failures
+        into TransientServerError
+        """
+        try:
+            return cls.transport.post(url, post_data, headers=headers, **kwargs)
+        except (requests.RequestException, OSError) as e:
+            raise cls._transport_error(e, url) from e
+
+    @classmethod
+    def _transport_error(cls, error: Exception, url: str) -> TransientServerError:
+        # A failed connect means the server never saw the request
+        request_sent = not isinstance(error, requests.exceptions.ConnectTimeout) and (
+            "NewConnectionError" not in repr(error)
         )
+        cls.log.warning(f"Transport error | Url: {url} | {error}")
+        return TransientServerError(None, str(error), url, request_sent=request_sent)
+
+    @classmethod
+    def _prepare_request(cls, data: dict = None, json_data: str = None, api_key: str = None):
+        """Encode the post body and build the auth headers
+
+        Returns
+        -------
+        tuple
+            (post_data, headers)
+        """
+        api_key = api_key or cls.API_KEY
+
+        post_data = cls.codec.dumps(data) if data else json_data
+
+        headers = dict(cls._HEADERS)
+        if api_key:
+            headers["X-Auth-Token"] = api_key
+
+        return post_data, headers
+
+    @staticmethod
+    def _endpoint_of(url: str) -> str:
+        """The endpoint name (Query._end_point) addressed by a full url"""
+        return url.rstrip("/").rsplit("/", 1)[-1]
+
+    @classmethod
+    def _handle_response(
+        cls,
+        request,
+        url: str,
+        raw: bool = False,
+        chunk: bool = False,
+        chunk_size: int = 1024,
+        timings: dict = None,
+    ):
+        """Decode a response returned by the transport and report any errors.
+        When a timings dict is given it receives the response size and the
+        JSON decode time
+
+        Returns
+        -------
+        Any
+            The `data` member of the response, or the raw content/iterator
+        """
 
         # Anyone home?
         if request.status_code is None:
-            cls._exit_with_message(None, "No output from service", url)
+            cls._raise_error(None, "No output from service", url)
+
+        # Raw content is not an M2M envelope, only the status can be checked
+        if chunk or raw:
+            status_message = cls._STATUS_CODES.get(request.status_code, None)
+            if status_message:
+                request.close()
+                cls._raise_error(request.status_code, status_message, url, request)
+            if cls.scheduler:
+                cls.scheduler.record_success(cls._endpoint_of(url))
+            if chunk:
+                return request.iter_content(chunk_size=chunk_size)
+            if timings is not None:
+                timings["response_bytes"] = len(request.content)
+            return request.content
 
         try:
-            response = json.loads(request.text)
+            # Decode the bytes directly, request.text would first run
+            # charset detection over the whole body
+            body = request.content
+            decode_started = time.perf_counter()
+            response = cls.codec.loads(body)
+
+            if timings is not None:
+                timings["decode_time"] = time.perf_counter() - decode_started
+                timings["response_bytes"] = len(body)
 
             # Verbose server side error
             error_code = response.get("errorCode", None)
             error_message = response.get("errorMessage", None)
 
             # Status code errors
-            error_message = cls._STATUS_CODES.get(request.status_code, None)
-            if error_message:
-                error_code = request.status_code
+            status_message = cls._STATUS_CODES.get(request.status_code, None)
+            if status_message:
+                error_code = error_code or request.status_code
+                error_message = error_message or status_message
 
         except Exception as e:
             request.close()
-            cls._exit_with_message(None, f"{url} | {e}")
+            error_code = request.status_code if request.status_code in cls._STATUS_CODES else None
+            cls._raise_error(error_code, f"{url} | {e}", url, request)
 
         else:
             if error_code or error_message:
-                cls._exit_with_message(error_code, error_message, url)
-            if chunk:
-                return response.iter_content(chunk_size=chunk_size)
-            if raw:
-                return response.content
+                cls._raise_error(error_code, error_message, url, request)
+            if cls.scheduler:
+                cls.scheduler.record_success(cls._endpoint_of(url))
             return response.get("data", None)
 
     @classmethod
-    def _exit_with_message(cls, code, message: str, url: str = None):
+    def _raise_error(cls, code, message: str, url: str = None, request=None):
         """Usually called from the Api.request method to report response codes
 
         Parameters
@@ -274,18 +737,34 @@ class Api:
             Response method from EE
         url : str, optional
             URL endpoint accessed that provided the code/response, by default None
+        request : optional
+            The transport response, used to read Retry-After
 
         Raises
         ------
-        SystemExit
-            As the end point failed in this case, the app is halted
+        UsgsApiError
+            The error type matching the code, see usgs.exceptions.error_for
         """
         cls.log.error(f"Error | Url: {url} | Code: {code} | Returned: {message}")
 
-        raise SystemExit(1)
+        error = error_for(code, message, url)
+
+        if isinstance(error, RateLimitError):
+            if cls.scheduler and url:
+                cls.scheduler.record_rate_limit(cls._endpoint_of(url))
+            error.retry_after = cls._retry_after(request)
+
+        raise error
+
+    @staticmethod
+    def _retry_after(request) -> float:
+        try:
+            return float(request.headers.get("Retry-After"))
+        except (AttributeError, TypeError, ValueError):
+            return None
 
     @classmethod
-    def _build_result(cls, results, query: Query):
+    def _build_result(cls, results, query: Query, api=None):
         """When the result contains a single list of items, this is used to build
         the list of Models
 
@@ -295,25 +774,13 @@ class Api:
             List of dict items returned from the API
         query : Query
             The Query object used to obtain the appropriate Model object
+        api : optional
+            The api reference handed to the models, by default this class
 
         Returns
         -------
         list
             List of instantiated Models for the results
         """
-        return [query._model(**item, _api=cls, _query=query) for item in results]
-
-
-class DataTypeEncoder(json.JSONEncoder):
-
-    """
-    A special JSON encoder to produce ISO 8601 formats from datetime objects
-    """
-
-    def default(self, obj):
-        if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
-            return obj.isoformat()
-        elif isinstance(obj, datetime.timedelta):
-            return (datetime.datetime.min + obj).time().isoformat()
-
-        return super().default(obj)
+        api = api or cls
+        return cls.hydrator.build_many(query._model, results, api, query)
@@ -0,0 +1,229 @@
+"""Response cache for Api.fetch.
+
+Entries are keyed on the endpoint plus a canonical form of
+Query.to_dict() and hold the JSON encoded `data` member of the response,
+so every hit hydrates fresh Models. Download endpoints are never cached.
+"""
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from .codec import JsonCodec, get_codec
+from .utilities import request_key
+
+MISS = object()
+
+# Download and scene list state changes on the server between calls
+NEVER_CACHE = frozenset(
+    {"download-request", "download-retrieve", "scene-list-add", "scene-list-remove", "scene-metadata-list"}
+)
+
+
+class CacheBackend:
+    """Storage for serialized entries. Subclasses must implement get, set,
+    delete and clear
+    """
+
+    def get(self, key: str) -> Optional[Tuple[float, bytes]]:
+        """Return (stored_at, value) or None"""
+        raise NotImplementedError("CacheBackend must implement get")
+
+    def set(self, key: str, endpoint: str, value: bytes):
+        raise NotImplementedError("CacheBackend must implement set")
+
+    def delete(self, key: str = None, endpoint: str = None):
+        raise NotImplementedError("CacheBackend must implement delete")
+
+    def clear(self):
+        self.delete()
+
+
+class MemoryCache(CacheBackend):
+    """In-process LRU bounded by entry count and total size
+
+    Parameters
+    ----------
+    max_entries : int, optional
+        by default 1024
+    max_bytes : int, optional
+        Upper bound on the summed size of the stored values, by default 64MB
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0], entry[2]
+
+    def set(self, key: str, endpoint: str, value: bytes):
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = (time.time(), endpoint, value)
+            self._bytes += len(value)
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                self._pop(next(iter(self._entries)))
+
+    def delete(self, key: str = None, endpoint: str = None):
+        with self._lock:
+            if key is not None:
+                self._pop(key)
+                return
+            for k in [k for k, e in self._entries.items() if endpoint in (None, e[1])]:
+                self._pop(k)
+
+    def _pop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[2])
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SqliteCache(CacheBackend):
+    """On-disk cache shared across processes and runs. Least recently
+    used entries beyond max_entries are evicted
+
+    Parameters
+    ----------
+    path : str, optional
+        Database file, by default "usgs-cache.sqlite"
+    max_entries : int, optional
+        by default 100000
+    """
+
+    def __init__(self, path: str = "usgs-cache.sqlite", max_entries: int = 100000):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, endpoint TEXT, stored REAL, accessed REAL, value BLOB)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)"
+            )
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT stored, value FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                with self._connection:
+                    self._connection.execute(
+                        "UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key)
+                    )
+            return row
+
+    def set(self, key: str, endpoint: str, value: bytes):
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, endpoint, now, now, value),
+            )
+            self._connection.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def delete(self, key: str = None, endpoint: str = None):
+        with self._lock, self._connection:
+            if key is not None:
+                self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+            elif endpoint is not None:
+                self._connection.execute("DELETE FROM responses WHERE endpoint = ?", (endpoint,))
+            else:
+                self._connection.execute("DELETE FROM responses")
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self):
+        self._connection.close()
+
+
+class ResponseCache:
+    """Per endpoint TTL policy on top of a CacheBackend
+
+    Parameters
+    ----------
+    backend : CacheBackend, optional
+        by default a MemoryCache
+    ttl : float, optional
+        Seconds an entry stays fresh when the endpoint has no explicit TTL,
+        by default 3600
+    ttls : dict, optional
+        Seconds by endpoint, a TTL of 0 disables caching for that endpoint
+    codec : JsonCodec, optional
+        Serializes the stored entries, by default the fastest available
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend = None,
+        ttl: float = 3600,
+        ttls: dict = None,
+        codec: JsonCodec = None,
+    ):
+        self.backend = backend or MemoryCache()
+        self.ttl = ttl
+        self.ttls = ttls or {}
+        self.codec = codec or get_codec()
+
+    def ttl_for(self, endpoint: str) -> float:
+        if endpoint in NEVER_CACHE:
+            return 0
+        return self.ttls.get(endpoint, self.ttl)
+
+    def cacheable(self, endpoint: str) -> bool:
+        return bool(self.ttl_for(endpoint))
+
+    def get(self, endpoint: str, payload: dict):
+        """Cached `data` for the request, or MISS"""
+        if not self.cacheable(endpoint):
+            return MISS
+
+        entry = self.backend.get(request_key(endpoint, payload))
+        if entry is None:
+            return MISS
+
+        stored, value = entry
+        if time.time() - stored > self.ttl_for(endpoint):
+            return MISS
+
+        return self.codec.loads(value)
+
+    def set(self, endpoint: str, payload: dict, data):
+        if not self.cacheable(endpoint):
+            return
+        self.backend.set(request_key(endpoint, payload), endpoint, self.codec.dumps(data))
+
+    def invalidate(self, endpoint: str = None, payload: dict = None):
+        """Drop one request (endpoint and payload), one endpoint, or everything"""
+        if payload is not None:
+            self.backend.delete(key=request_key(endpoint, payload))
+        else:
+            self.backend.delete(endpoint=endpoint)
+
+    def invalidate_query(self, query):
+        """Drop the cached response of a Query"""
+        self.invalidate(query._end_point, query.to_dict())
@@ -0,0 +1,407 @@
+"""Local scene catalog.
+
+SceneCatalog keeps scene-search records in SQLite with an R-tree over
+their footprints, and answers bbox, acquisition date and cloud cover
+questions offline. It also remembers which (dataset, extent, window)
+searches it holds completely: with Api.catalog set, a SceneQuery inside
+such a fresh coverage is answered locally, anything else goes to the
+network (and the returned pages are added to the catalog).
+
+    Api.catalog = SceneCatalog("usgs-catalog.sqlite", max_age=6 * 3600)
+    Api.catalog.load(Api, SceneQuery(datasetName="landsat_ot_c2_l2", sceneFilter=aoi_filter))
+    Api.fetch(SceneQuery(datasetName="landsat_ot_c2_l2", sceneFilter=smaller_filter))  # served locally
+"""
+import dataclasses
+import datetime
+import json
+import math
+import sqlite3
+import threading
+import time
+from typing import Iterable, List, Optional
+
+from .columns import SceneColumns, geometry_bounds, timestamp
+
+WORLD = (-180.0, -90.0, 180.0, 90.0)
+
+# SceneFilter members the catalog can evaluate
+_SUPPORTED_FILTERS = frozenset({"spatialFilter", "acquisitionFilter", "cloudCoverFilter"})
+
+# A search with these is not a complete picture of its extent
+_PARTIAL_FILTERS = frozenset({"cloudCoverFilter", "ingestFilter", "metadataFilter", "seasonalFilter"})
+
+# Stored per record and per coverage, a full record also answers summary searches
+SUMMARY, FULL = 0, 1
+
+
+def _level(metadata_type: Optional[str], requested: bool = False) -> int:
+    """The level of a metadataType. An unknown type is taken as FULL when
+    it is requested and SUMMARY when it is held, so it is never assumed
+    """
+    if metadata_type == "full":
+        return FULL
+    if metadata_type == "summary":
+        return SUMMARY
+    return FULL if requested else SUMMARY
+
+
+def _is_date(value) -> bool:
+    if isinstance(value, str):
+        return len(value) == 10
+    return isinstance(value, datetime.date) and not isinstance(value, datetime.datetime)
+
+
+def _window(acquisition: dict) -> tuple:
+    """(start, end) timestamps of an acquisitionFilter, a date end covers
+    the whole day
+    """
+    if not acquisition:
+        return -math.inf, math.inf
+
+    start, end = acquisition.get("start"), acquisition.get("end")
+    start = -math.inf if start is None else timestamp(start)
+    if end is None:
+        end = math.inf
+    else:
+        end = timestamp(end) + (86400 - 1e-3 if _is_date(end) else 0)
+    return start, end
+
+
+def _bbox(spatial: dict) -> Optional[tuple]:
+    """(west, south, east, north) of an mbr spatialFilter, WORLD without one
+    and None for filters the catalog cannot evaluate
+    """
+    if not spatial:
+        return WORLD
+    if spatial.get("filterType") != "mbr":
+        return None
+    lower, upper = spatial["lowerLeft"], spatial["upperRight"]
+    return (
+        min(lower["longitude"], upper["longitude"]),
+        min(lower["latitude"], upper["latitude"]),
+        max(lower["longitude"], upper["longitude"]),
+        max(lower["latitude"], upper["latitude"]),
+    )
+
+
+def _as_dict(value) -> dict:
+    if value is None:
+        return {}
+    if dataclasses.is_dataclass(value):
+        return dataclasses.asdict(value)
+    return value
+
+
+class SceneCatalog:
+    """SQLite store of scene records with an R-tree footprint index
+
+    Parameters
+    ----------
+    path : str, optional
+        Database file, by default in memory
+    max_age : float, optional
+        Seconds a loaded coverage is fresh enough to answer queries, by
+        default one day
+    """
+
+    def __init__(self, path: str = ":memory:", max_age: float = 86400):
+        self.path = path
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        # Loads in progress, answer() leaves every query to the network meanwhile
+        self._loading = 0
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS scenes ("
+                "id INTEGER PRIMARY KEY, dataset TEXT, entity_id TEXT, acquired REAL, published REAL, "
+                "cloud_cover REAL, options INTEGER, record TEXT, metadata_type INTEGER DEFAULT 0, "
+                "UNIQUE (dataset, entity_id))"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS scenes_acquired ON scenes (dataset, acquired)"
+            )
+            self._connection.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS footprints USING rtree(id, west, east, south, north)"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS coverage ("
+                "dataset TEXT, west REAL, south REAL, east REAL, north REAL, "
+                "start REAL, end REAL, loaded REAL, metadata_type INTEGER DEFAULT 0)"
+            )
+            # Files written before metadata types were stored hold summary records as far as we know
+            for table in ("scenes", "coverage"):
+                columns = {row[1] for row in self._connection.execute(f"PRAGMA table_info({table})")}
+                if "metadata_type" not in columns:
+                    self._connection.execute(f"ALTER TABLE {table} ADD COLUMN metadata_type INTEGER DEFAULT 0")
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM scenes").fetchone()[0]
+
+    def close(self):
+        self._connection.close()
+
+    # Ingest
+
+    def ingest(self, dataset: str, records: Iterable[dict], metadata_type: str = "summary") -> int:
+        """Add or update scene-search records (the `results` items or
+        SceneModel.to_dict()). Footprints come from spatialCoverage, or
+        spatialBounds when it is missing. A record held with full metadata
+        is not replaced by a summary one
+
+        Parameters
+        ----------
+        dataset : str
+            datasetName of the records
+        records : Iterable[dict]
+            The records
+        metadata_type : str, optional
+            metadataType of the search the records come from, by default
+            "summary"
+
+        Returns
+        -------
+        int
+            Records written
+        """
+        level = _level(metadata_type)
+        records = [record for record in records if record.get("entityId")]
+        if not records:
+            return 0
+
+        columns = SceneColumns(records)
+        rows = []
+        for index, record in enumerate(records):
+            west, south, east, north = geometry_bounds(record.get("spatialCoverage"))
+            if west != west:
+                west, south, east, north = (
+                    columns.west[index], columns.south[index], columns.east[index], columns.north[index]
+                )
+            cloud = columns.cloudCover[index]
+            rows.append(
+                (
+                    record["entityId"],
+                    _or_none(columns.acquisitionDate[index]),
+                    _or_none(columns.publishDate[index]),
+                    _or_none(cloud),
+                    columns.options[index],
+                    json.dumps(record),
+                    (west, east, south, north),
+                )
+            )
+
+        written = 0
+        with self._lock, self._connection:
+            for entity_id, acquired, published, cloud, options, record, bounds in rows:
+                row = self._connection.execute(
+                    "SELECT id, metadata_type FROM scenes WHERE dataset = ? AND entity_id = ?", (dataset, entity_id)
+                ).fetchone()
+                if row is None:
+                    row_id = self._connection.execute(
+                        "INSERT INTO scenes (dataset, entity_id, acquired, published, cloud_cover, options, record, "
+                        "metadata_type) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (dataset, entity_id, acquired, published, cloud, options, record, level),
+                    ).lastrowid
+                elif row[1] > level:
+                    continue
+                else:
+                    row_id = row[0]
+                    self._connection.execute(
+                        "UPDATE scenes SET acquired = ?, published = ?, cloud_cover = ?, options = ?, record = ?, "
+                        "metadata_type = ? WHERE id = ?",
+                        (acquired, published, cloud, options, record, level, row_id),
+                    )
+                    self._connection.execute("DELETE FROM footprints WHERE id = ?", (row_id,))
+                if bounds[0] == bounds[0]:
+                    self._connection.execute("INSERT INTO footprints VALUES (?, ?, ?, ?, ?)", (row_id, *bounds))
+                written += 1
+
+        return written
+
+    def record_coverage(self, dataset: str, bbox: tuple = WORLD, start: float = -math.inf, end: float = math.inf,
+                        loaded: float = None, metadata_type: str = "summary"):
+        """Mark every scene of dataset within bbox and the [start, end]
+        acquisition window (timestamps) as held by the catalog, with
+        metadata_type metadata
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT INTO coverage VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (dataset, *bbox, start, end, loaded or time.time(), _level(metadata_type)),
+            )
+
+    def load(self, api, query) -> int:
+        """Fetch every page of a SceneQuery from the network into the
+        catalog and record its coverage, when its filters describe a
+        complete extent (only spatial mbr and acquisition filters)
+
+        Returns
+        -------
+        int
+            Scenes loaded
+        """
+        loaded = time.time()
+        # With Api.catalog set to this catalog, Api._store already ingests the pages
+        ingest = getattr(api, "catalog", None) is not self
+        count = 0
+
+        with self._lock:
+            self._loading += 1
+        try:
+            first = api.fetch(dataclasses.replace(query, startingNumber=1))
+            for page in first.pages():
+                if not page.results:
+                    break
+                count += len(page.results)
+                if ingest:
+                    self.ingest(query.datasetName, page.results.records(), query.metadataType)
+        finally:
+            with self._lock:
+                self._loading -= 1
+
+        scene_filter = _as_dict(query.to_dict().get("sceneFilter"))
+        if not any(scene_filter.get(name) for name in _PARTIAL_FILTERS):
+            bbox = _bbox(scene_filter.get("spatialFilter"))
+            if bbox is not None:
+                self.record_coverage(
+                    query.datasetName, bbox, *_window(scene_filter.get("acquisitionFilter")), loaded,
+                    query.metadataType,
+                )
+
+        return count
+
+    # Queries
+
+    def covers(self, dataset: str, bbox: tuple = WORLD, start: float = -math.inf, end: float = math.inf,
+               metadata_type: str = "summary") -> bool:
+        """Whether a fresh coverage holds the whole extent and window with
+        at least metadata_type metadata
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT 1 FROM coverage WHERE dataset = ? AND west <= ? AND south <= ? AND east >= ? AND north >= ? "
+                "AND start <= ? AND end >= ? AND loaded >= ? AND metadata_type >= ? LIMIT 1",
+                (dataset, *bbox, start, end, time.time() - self.max_age, _level(metadata_type, requested=True)),
+            ).fetchone()
+        return row is not None
+
+    def _where(self, dataset, bbox, start, end, cloud_min, cloud_max, include_unknown, downloadable):
+        clauses, parameters = ["s.dataset = ?"], [dataset]
+        join = ""
+        if bbox is not None and tuple(bbox) != WORLD:
+            join = " JOIN footprints f ON f.id = s.id"
+            clauses.append("f.west <= ? AND f.east >= ? AND f.south <= ? AND f.north >= ?")
+            parameters += [bbox[2], bbox[0], bbox[3], bbox[1]]
+        if start is not None and start != -math.inf:
+            clauses.append("s.acquired >= ?")
+            parameters.append(timestamp(start) if not isinstance(start, float) else start)
+        if end is not None and end != math.inf:
+            clauses.append("s.acquired <= ?")
+            parameters.append(timestamp(end) if not isinstance(end, float) else end)
+        if cloud_min is not None or cloud_max is not None:
+            cloud = "s.cloud_cover BETWEEN ? AND ?"
+            parameters += [cloud_min if cloud_min is not None else -math.inf,
+                           cloud_max if cloud_max is not None else math.inf]
+            clauses.append(f"({cloud} OR s.cloud_cover IS NULL)" if include_unknown else cloud)
+        if downloadable:
+            clauses.append("s.options & 2")
+        return join, " AND ".join(clauses), parameters
+
+    def search(
+        self,
+        dataset: str,
+        bbox: tuple = None,
+        start=None,
+        end=None,
+        cloud_max: float = None,
+        cloud_min: float = None,
+        include_unknown: bool = False,
+        downloadable: bool = False,
+        limit: int = -1,
+        offset: int = 0,
+    ) -> SceneColumns:
+        """Scenes of a dataset intersecting bbox (west, south, east, north),
+        acquired between start and end, within the cloud cover range. Ordered
+        by acquisition date
+        """
+        join, where, parameters = self._where(
+            dataset, bbox, start, end, cloud_min, cloud_max, include_unknown, downloadable
+        )
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT s.record FROM scenes s{join} WHERE {where} ORDER BY s.acquired, s.entity_id LIMIT ? OFFSET ?",
+                (*parameters, limit, offset),
+            ).fetchall()
+        return SceneColumns([json.loads(row[0]) for row in rows])
+
+    def count(self, dataset: str, bbox: tuple = None, start=None, end=None, cloud_max: float = None,
+              cloud_min: float = None, include_unknown: bool = False, downloadable: bool = False) -> int:
+        join, where, parameters = self._where(
+            dataset, bbox, start, end, cloud_min, cloud_max, include_unknown, downloadable
+        )
+        with self._lock:
+            return self._connection.execute(
+                f"SELECT COUNT(*) FROM scenes s{join} WHERE {where}", parameters
+            ).fetchone()[0]
+
+    def answer(self, endpoint: str, payload: dict) -> Optional[dict]:
+        """The scene-search `data` for a payload when a fresh coverage holds
+        it with the requested metadataType, otherwise None. Searches asking
+        for a server side sort are left to the server
+        """
+        if endpoint != "scene-search" or self._loading:
+            return None
+
+        if payload.get("sortField") or payload.get("sortDirection"):
+            return None
+
+        scene_filter = _as_dict(payload.get("sceneFilter"))
+        if any(value for name, value in scene_filter.items() if name not in _SUPPORTED_FILTERS):
+            return None
+
+        bbox = _bbox(scene_filter.get("spatialFilter"))
+        if bbox is None:
+            return None
+
+        start, end = _window(scene_filter.get("acquisitionFilter"))
+        dataset = payload.get("datasetName")
+        if not self.covers(dataset, bbox, start, end, payload.get("metadataType")):
+            return None
+
+        cloud = scene_filter.get("cloudCoverFilter") or {}
+        criteria = dict(
+            bbox=bbox,
+            start=start,
+            end=end,
+            cloud_min=cloud.get("min"),
+            cloud_max=cloud.get("max"),
+            include_unknown=cloud.get("includeUnknown", True) if cloud else False,
+        )
+
+        starting = int(payload.get("startingNumber") or 1)
+        maximum = int(payload.get("maxResults") or 100)
+        total = self.count(dataset, **criteria)
+        results = self.search(dataset, limit=maximum, offset=starting - 1, **criteria).records()
+
+        return {
+            "results": results,
+            "recordsReturned": len(results),
+            "totalHits": total,
+            "totalHitsAccuracy": "exact",
+            "isCustomized": False,
+            "numExcluded": 0,
+            "startingNumber": starting,
+            "nextRecord": min(starting + len(results), total),
+        }
+
+    def ingest_response(self, endpoint: str, payload: dict, data) -> int:
+        """Add the scenes of a scene-search response"""
+        if endpoint != "scene-search" or not isinstance(data, dict):
+            return 0
+        return self.ingest(payload.get("datasetName"), data.get("results") or (), payload.get("metadataType"))
+
+
+def _or_none(value: float):
+    """NaN stored as NULL"""
+    return None if value != value else value
@@ -0,0 +1,82 @@
+"""JSON codecs used to encode request bodies and decode responses.
+
+orjson is used when it is installed (`pip install usgs-m2m-api[fast]`),
+otherwise the standard library. Both produce the same ISO 8601 output for
+dates, times and timedeltas as DataTypeEncoder.
+"""
+import datetime
+import json
+from typing import Union
+
+from .utilities import DataTypeEncoder
+
+
+class JsonCodec:
+    """Base codec. Subclasses must implement dumps and loads"""
+
+    name = None
+
+    def dumps(self, obj) -> bytes:
+        raise NotImplementedError("JsonCodec must implement dumps")
+
+    def loads(self, data: Union[bytes, str]):
+        raise NotImplementedError("JsonCodec must implement loads")
+
+
+class StdlibCodec(JsonCodec):
+    name = "json"
+
+    def dumps(self, obj) -> bytes:
+        return json.dumps(obj, cls=DataTypeEncoder, separators=(",", ":")).encode("utf-8")
+
+    def loads(self, data: Union[bytes, str]):
+        return json.loads(data)
+
+
+def _orjson_default(obj):
+    # orjson handles datetime/date/time natively with isoformat output
+    if isinstance(obj, datetime.timedelta):
+        return (datetime.datetime.min + obj).time().isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class OrjsonCodec(JsonCodec):
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+
+        self._orjson = orjson
+
+    def dumps(self, obj) -> bytes:
+        return self._orjson.dumps(obj, default=_orjson_default)
+
+    def loads(self, data: Union[bytes, str]):
+        return self._orjson.loads(data)
+
+
+CODECS = {
+    StdlibCodec.name: StdlibCodec,
+    OrjsonCodec.name: OrjsonCodec,
+}
+
+
+def get_codec(name: str = None) -> JsonCodec:
+    """The named codec, or the fastest one available
+
+    Parameters
+    ----------
+    name : str, optional
+        "orjson" or "json", by default the first importable of those
+
+    Returns
+    -------
+    JsonCodec
+    """
+    if name:
+        return CODECS[name]()
+
+    try:
+        return OrjsonCodec()
+    except ImportError:
+        return StdlibCodec()
@@ -0,0 +1,457 @@
+"""Columnar storage for scene-search results.
+
+SceneColumns keeps the fields used for filtering and sorting in compact
+typed arrays (cloud cover, publish and acquisition timestamps, bounding
+boxes and option flags) next to the decoded records. SceneModels are only
+built when a scene is indexed or iterated, filters and sorts work on the
+arrays and return new SceneColumns sharing the records.
+
+With numpy installed (the "fast" extra) the array filters are vectorized
+over zero-copy views of the columns; without it they loop over the arrays
+in Python, which only saves building the models.
+"""
+from __future__ import annotations
+
+import calendar
+import datetime
+import math
+import threading
+from array import array
+from typing import Iterable, Iterator, List, Union
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from .footprint import Aoi
+from .hydrate import hydrator_of, parse_datetime
+from .metadata import MetadataSchema, SceneMetadata
+
+NAN = float("nan")
+
+# Bit flags of the `options` member
+BULK = 1
+DOWNLOAD = 2
+ORDER = 4
+SECONDARY = 8
+
+_OPTION_FLAGS = (("bulk", BULK), ("download", DOWNLOAD), ("order", ORDER), ("secondary", SECONDARY))
+
+_SORT_COLUMNS = ("cloudCover", "publishDate", "acquisitionDate", "entityId", "displayId")
+
+_DTYPES = {"d": "float64", "B": "uint8", "I": "uint32"}
+
+
+def _view(column: array):
+    """A numpy view sharing the memory of an array column. Only held
+    within a call, a live view keeps the array from being extended
+    """
+    if not len(column):
+        return numpy.empty(0, _DTYPES[column.typecode])
+    return numpy.frombuffer(column, dtype=_DTYPES[column.typecode])
+
+
+def timestamp(value) -> float:
+    """POSIX timestamp of an API date, a date or a datetime. Naive values
+    are taken as UTC, missing or unparseable values are NaN
+    """
+    if value is None or value == "":
+        return NAN
+
+    if isinstance(value, str):
+        try:
+            value = parse_datetime(value)
+        except (ValueError, OverflowError):
+            return NAN
+
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is not None:
+            return value.timestamp()
+        return calendar.timegm(value.timetuple()) + value.microsecond / 1e6
+
+    if isinstance(value, datetime.date):
+        return float(calendar.timegm(value.timetuple()))
+
+    return float(value)
+
+
+def geometry_bounds(geometry) -> tuple:
+    """(west, south, east, north) of a GeoJSON geometry, NaNs when missing"""
+    try:
+        coordinates = geometry["coordinates"]
+    except (KeyError, TypeError):
+        return NAN, NAN, NAN, NAN
+
+    # Flatten down to the [lon, lat] pairs of any polygon nesting
+    while coordinates and isinstance(coordinates[0], list) and isinstance(coordinates[0][0], list):
+        coordinates = [point for ring in coordinates for point in ring]
+
+    if not coordinates:
+        return NAN, NAN, NAN, NAN
+
+    longitudes = [point[0] for point in coordinates]
+    latitudes = [point[1] for point in coordinates]
+    return min(longitudes), min(latitudes), max(longitudes), max(latitudes)
+
+
+def _flags(options) -> int:
+    if not options:
+        return 0
+    return sum(flag for name, flag in _OPTION_FLAGS if options.get(name))
+
+
+class SceneColumns:
+    """Array backed collection of scene-search results
+
+    Parameters
+    ----------
+    records : list
+        The decoded `results` items
+    api : optional
+        Handed to the SceneModels built from the records
+    query : optional
+        The SceneQuery handed to the SceneModels built from the records
+    """
+
+    def __init__(self, records: list = None, api=None, query=None):
+        records = list(records or [])
+        self._records = records
+        self._queries = [(api, query)]
+        self._origin = array("I", [0]) * len(records)
+        self._schema = MetadataSchema()
+        self._meta = [None] * len(records)
+        # One cell per scene holding its SceneModel once built. Cells are
+        # shared with the columns derived by take/extend, so a scene is the
+        # same object however it is reached
+        self._models = [[None] for _ in records]
+        # Serializes load_metadata, shared with the columns derived by take
+        self._loading = threading.Lock()
+
+        self.entityId: List[str] = [record.get("entityId") for record in records]
+        self.displayId: List[str] = [record.get("displayId") for record in records]
+        self.cloudCover = array("d", (_number(record.get("cloudCover")) for record in records))
+        self.publishDate = array("d", (timestamp(record.get("publishDate")) for record in records))
+        self.acquisitionDate = array(
+            "d", (timestamp((record.get("temporalCoverage") or {}).get("startDate")) for record in records)
+        )
+        self.options = array("B", (_flags(record.get("options")) for record in records))
+
+        bounds = [geometry_bounds(record.get("spatialBounds")) for record in records]
+        self.west = array("d", (bound[0] for bound in bounds))
+        self.south = array("d", (bound[1] for bound in bounds))
+        self.east = array("d", (bound[2] for bound in bounds))
+        self.north = array("d", (bound[3] for bound in bounds))
+
+    @classmethod
+    def _empty(cls) -> SceneColumns:
+        columns = cls.__new__(cls)
+        columns._records = []
+        columns._queries = []
+        columns._origin = array("I")
+        columns._schema = MetadataSchema()
+        columns._meta = []
+        columns._models = []
+        columns._loading = threading.Lock()
+        columns.entityId, columns.displayId = [], []
+        for name in ("cloudCover", "publishDate", "acquisitionDate", "west", "south", "east", "north"):
+            setattr(columns, name, array("d"))
+        columns.options = array("B")
+        return columns
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __bool__(self) -> bool:
+        return bool(self._records)
+
+    def __iter__(self) -> Iterator:
+        for index in range(len(self._records)):
+            yield self._model(index)
+
+    def __getitem__(self, key: Union[int, slice]):
+        if isinstance(key, slice):
+            return self.take(range(*key.indices(len(self))))
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("SceneColumns index out of range")
+        return self._model(key)
+
+    def __add__(self, other: SceneColumns) -> SceneColumns:
+        return SceneColumns.concat([self, other])
+
+    def __repr__(self):
+        return f"SceneColumns({len(self)} scenes)"
+
+    def _model(self, index: int):
+        from .scene import SceneModel
+
+        cell = self._models[index]
+        scene = cell[0]
+        if scene is None:
+            api, query = self._queries[self._origin[index]]
+            scene = hydrator_of(api).build(SceneModel, self._records[index], api, query)
+            scene._meta = self.meta(index)
+            cell[0] = scene
+        return scene
+
+    def meta(self, index: int) -> SceneMetadata:
+        """The indexed metadata of a scene, sharing this page's schema.
+        Scenes of summary searches load theirs on first access, in bulk with
+        every other pending scene of these columns (see load_metadata)
+        """
+        meta = self._meta[index]
+        if meta is None:
+            loader = (lambda: self._load_one(index)) if self._pending(index) else None
+            meta = self._meta[index] = SceneMetadata(self._records[index].get("metadata"), self._schema, loader)
+        return meta
+
+    def _pending(self, index: int) -> bool:
+        """Whether the scene comes from a summary search and its full
+        metadata was not loaded yet
+        """
+        api, query = self._queries[self._origin[index]]
+        return (
+            api is not None
+            and getattr(query, "metadataType", None) == "summary"
+            and not self._records[index].get("metadata")
+        )
+
+    def _load_one(self, index: int) -> list:
+        self.load_metadata()
+        return self._records[index].get("metadata")
+
+    def load_metadata(self) -> SceneColumns:
+        """Fetch the full metadata of every scene of a summary search in
+        these columns, one bulk request per dataset, cached per entityId
+        (see scenelist.fetch_metadata). Call it after filtering so only the
+        kept scenes are fetched
+        """
+        with self._loading:
+            self._load_pending()
+        return self
+
+    def _load_pending(self):
+        from .scenelist import fetch_metadata
+
+        groups = {}
+        for index in range(len(self._records)):
+            meta = self._meta[index]
+            if (meta is None or meta._loader is not None) and self._pending(index):
+                groups.setdefault(self._origin[index], []).append(index)
+
+        for origin, indices in groups.items():
+            api, query = self._queries[origin]
+            records = fetch_metadata(api, query.datasetName, (self.entityId[index] for index in indices))
+            for index in indices:
+                full = records.get(self.entityId[index]) or {}
+                self._records[index] = dict(self._records[index], metadata=full.get("metadata") or [])
+                if self._models[index][0] is not None:
+                    self._models[index][0].metadata = self._records[index]["metadata"]
+                if self._meta[index] is None:
+                    self._meta[index] = SceneMetadata(self._records[index]["metadata"], self._schema)
+                else:
+                    self._meta[index]._load(self._records[index]["metadata"])
+
+    def metadata(self, name: str, type=None, default=None) -> list:
+        """One metadata field of every scene, in order
+
+        Parameters
+        ----------
+        name : str
+            The fieldName, e.g. "Cloud Cover"
+        type : optional
+            Conversion applied to the values, see metadata.convert
+        default : optional
+            Used for scenes without the field, by default None
+        """
+        meta = self.meta
+        return [meta(index).get(name, default, type) for index in range(len(self._records))]
+
+    def to_list(self) -> list:
+        """Materialize every SceneModel"""
+        return list(self)
+
+    def records(self) -> list:
+        """The decoded records, without building SceneModels"""
+        return list(self._records)
+
+    def extend(self, other: SceneColumns) -> SceneColumns:
+        """Append the scenes of another SceneColumns in place, the arrays
+        are extended without rebuilding the existing ones
+        """
+        offset = len(self._queries)
+        self._queries.extend(other._queries)
+        self._origin.extend(origin + offset for origin in other._origin)
+        self._records.extend(other._records)
+        # Decoded metadata keeps referring to the schema it was decoded with
+        self._meta.extend(other._meta)
+        self._models.extend(other._models)
+        self.entityId.extend(other.entityId)
+        self.displayId.extend(other.displayId)
+        for name in ("cloudCover", "publishDate", "acquisitionDate", "options", "west", "south", "east", "north"):
+            getattr(self, name).extend(getattr(other, name))
+        return self
+
+    @classmethod
+    def concat(cls, columns: Iterable[SceneColumns]) -> SceneColumns:
+        """A new SceneColumns holding the scenes of every page, in order"""
+        result = cls._empty()
+        for part in columns:
+            result.extend(part)
+        return result
+
+    def take(self, indices: Iterable[int]) -> SceneColumns:
+        """A new SceneColumns holding the scenes at indices, in that order"""
+        indices = list(indices)
+        result = SceneColumns._empty()
+        result._queries = list(self._queries)
+        result._origin = array("I", (self._origin[i] for i in indices))
+        result._records = [self._records[i] for i in indices]
+        result._schema = self._schema
+        result._meta = [self._meta[i] for i in indices]
+        result._models = [self._models[i] for i in indices]
+        result._loading = self._loading
+        result.entityId = [self.entityId[i] for i in indices]
+        result.displayId = [self.displayId[i] for i in indices]
+        positions = numpy.array(indices, dtype=numpy.intp) if numpy is not None else None
+        for name in ("cloudCover", "publishDate", "acquisitionDate", "options", "west", "south", "east", "north"):
+            column = getattr(self, name)
+            if positions is not None:
+                setattr(result, name, array(column.typecode, _view(column)[positions].tobytes()))
+            else:
+                setattr(result, name, array(column.typecode, (column[i] for i in indices)))
+        return result
+
+    def where(self, mask: Iterable[bool]) -> SceneColumns:
+        """The scenes where mask (an iterable of bools or a numpy boolean
+        array) is true
+        """
+        if numpy is not None and isinstance(mask, numpy.ndarray):
+            return self.take(numpy.flatnonzero(mask).tolist())
+        return self.take(index for index, keep in enumerate(mask) if keep)
+
+    def _intersects(self, west: float, south: float, east: float, north: float):
+        """Mask of the scenes whose bounding box intersects the given one.
+        Scenes without bounds (NaN) are kept
+        """
+        if numpy is not None:
+            return ~(
+                (_view(self.east) < west) | (_view(self.west) > east)
+                | (_view(self.north) < south) | (_view(self.south) > north)
+            )
+        return [
+            not (e < west or w > east or n < south or s > north)
+            for w, s, e, n in zip(self.west, self.south, self.east, self.north)
+        ]
+
+    # Filters
+
+    def cloud_cover(self, maximum: float = 100, minimum: float = 0, include_unknown: bool = False) -> SceneColumns:
+        """Scenes with minimum <= cloudCover <= maximum"""
+        if numpy is not None:
+            values = _view(self.cloudCover)
+            mask = (values >= minimum) & (values <= maximum)
+            if include_unknown:
+                mask |= numpy.isnan(values)
+            return self.where(mask)
+        return self.where(
+            (minimum <= value <= maximum) or (include_unknown and value != value) for value in self.cloudCover
+        )
+
+    def published(self, start=None, end=None) -> SceneColumns:
+        """Scenes published between start and end, inclusive"""
+        return self.where(_between(self.publishDate, start, end))
+
+    def acquired(self, start=None, end=None) -> SceneColumns:
+        """Scenes acquired between start and end, inclusive"""
+        return self.where(_between(self.acquisitionDate, start, end))
+
+    def downloadable(self, bulk: bool = False) -> SceneColumns:
+        """Scenes available for download (and bulk download with bulk=True)"""
+        flag = DOWNLOAD | BULK if bulk else DOWNLOAD
+        if numpy is not None:
+            return self.where((_view(self.options) & flag) == flag)
+        return self.where(options & flag == flag for options in self.options)
+
+    def intersecting(self, west: float, south: float, east: float, north: float) -> SceneColumns:
+        """Scenes whose bounding box intersects the given one"""
+        return self.where(self._intersects(west, south, east, north))
+
+    def overlap(self, aoi, relative_to: str = "scene") -> array:
+        """Fraction of each footprint (or of the aoi, relative_to="aoi")
+        covered by the aoi, see footprint.Aoi.overlap, NaN when the scene
+        has no footprint. The bounding boxes of every scene are tested at
+        once (vectorized with numpy); the footprint polygons of the scenes
+        whose box meets the aoi's are then clipped one by one in Python,
+        the others are 0
+        """
+        aoi = Aoi.of(aoi)
+        fractions = array("d", [0.0]) * len(self)
+        if aoi.bounds is None:
+            return fractions
+
+        mask = self._intersects(*aoi.bounds)
+        if numpy is not None:
+            candidates = numpy.flatnonzero(mask).tolist()
+        else:
+            candidates = [index for index, keep in enumerate(mask) if keep]
+
+        for index in candidates:
+            record = self._records[index]
+            fraction = aoi.overlap(record.get("spatialCoverage") or record.get("spatialBounds"), relative_to)
+            fractions[index] = NAN if fraction is None else fraction
+        return fractions
+
+    def footprints(
+        self, aoi, min_overlap: float = 0.0, relative_to: str = "scene", include_unknown: bool = False
+    ) -> SceneColumns:
+        """Scenes whose footprint polygon intersects the aoi, by at least
+        min_overlap of the footprint (or of the aoi with relative_to="aoi")
+
+        Parameters
+        ----------
+        aoi :
+            A SpatialMbr, SpatialGeojson, GeoJSON geometry, (west, south,
+            east, north) tuple or footprint.Aoi
+        min_overlap : float, optional
+            Required fraction, by default 0 (any overlap)
+        relative_to : str, optional
+            "scene" or "aoi", by default "scene"
+        include_unknown : bool, optional
+            Keep scenes without a footprint, by default False
+        """
+        def keep(fraction):
+            if fraction != fraction:
+                return include_unknown
+            return fraction > 0 if min_overlap <= 0 else fraction >= min_overlap
+
+        return self.where(keep(fraction) for fraction in self.overlap(aoi, relative_to))
+
+    def sort(self, by: str = "cloudCover", reverse: bool = False) -> SceneColumns:
+        """Sorted by a column, unknown (NaN) values last"""
+        if by not in _SORT_COLUMNS:
+            raise ValueError(f"Cannot sort by {by}, expected one of {_SORT_COLUMNS}")
+
+        column = getattr(self, by)
+        known = [i for i, value in enumerate(column) if value == value and value is not None]
+        unknown = [i for i, value in enumerate(column) if not (value == value and value is not None)]
+        known.sort(key=column.__getitem__, reverse=reverse)
+        return self.take(known + unknown)
+
+
+def _number(value) -> float:
+    try:
+        return float(value) if value is not None else NAN
+    except (TypeError, ValueError):
+        return NAN
+
+
+def _between(column: array, start, end) -> Iterator[bool]:
+    low = -math.inf if start is None else timestamp(start)
+    high = math.inf if end is None else timestamp(end)
+    if numpy is not None:
+        values = _view(column)
+        return (values >= low) & (values <= high)
+    return (low <= value <= high for value in column)
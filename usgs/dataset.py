@@ -1,14 +1,18 @@
+import datetime
 import json
 from dataclasses import dataclass
 from typing import ClassVar, List
 
 from .download import DownloadOptionModel, DownloadOptionQuery
 from .model import Model as BaseModel
+from .hydrate import hydrator_of, parse_datetime, slotted
 from .query import Query as BaseQuery
 from .filters import AcquisitionFilter, SpatialFilter
+from .scenelist import cached_metadata, fetch_metadata
 from . import scene
 
 
+@slotted
 @dataclass
 class DatasetModel(BaseModel):
     datasetId: str = None
@@ -40,6 +44,11 @@ class DatasetModel(BaseModel):
         if self.temporalCoverage and isinstance(self.temporalCoverage, str):
             self.temporalCoverage = json.loads(self.temporalCoverage)
 
+    @property
+    def updated(self) -> datetime.datetime:
+        """dateUpdated, parsed on access"""
+        return parse_datetime(self.dateUpdated)
+
     # @property
     # def bulk_products(self):
     #     datasetName = self.datasetAlias
@@ -58,9 +67,40 @@ class DatasetModel(BaseModel):
         query = scene.SceneQuery(*args, **kwargs)
         return self.has_many(query)
 
+    def iter_scenes(self, *args, cursor: scene.SceneCursor = None, **kwargs) -> scene.SceneIterator:
+        """Lazily iterate every scene of a search across pages. Pass the
+        iterator's saved `cursor` back in to resume an interrupted crawl
+        """
+        if cursor is not None:
+            return scene.SceneIterator(self.api, cursor=cursor)
+
+        kwargs["datasetName"] = self.datasetAlias
+        return scene.SceneIterator(self.api, scene.SceneQuery(*args, **kwargs))
+
+    def scene_metadata(self, entity_ids: List[str], metadata_type: str = "full") -> List[scene.SceneModel]:
+        """The metadata of many scenes in one bulk request through a
+        temporary scene list, in the order of entity_ids. Records are cached
+        per entityId so later scene() calls need no request
+        """
+        entity_ids = list(entity_ids)
+        query = scene.SceneQuery(datasetName=self.datasetAlias, metadataType=metadata_type)
+        records = fetch_metadata(self.api, self.datasetAlias, entity_ids, metadata_type)
+        build = hydrator_of(self.api).build
+        return [
+            build(scene.SceneModel, records[entity_id], self.api, query)
+            for entity_id in entity_ids
+            if entity_id in records
+        ]
+
     def scene(self, *args, **kwargs) -> scene.SceneModel:
+        """One scene's metadata, from the records already fetched in bulk
+        (scene_metadata, summary searches) before asking scene-metadata
+        """
         kwargs["datasetName"] = self.datasetAlias
         query = scene.SceneMetadataQuery(*args, **kwargs)
+        record = cached_metadata(self.api, self.datasetAlias, query.entityId, query.metadataType or "full")
+        if record is not None:
+            return hydrator_of(self.api).build(scene.SceneModel, record, self.api, query)
         return self.has_one(query)
 
     def download_options(self, scene_ids: List[str]) -> List[DownloadOptionModel]:
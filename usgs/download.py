@@ -1,17 +1,20 @@
 from dataclasses import dataclass
 from typing import ClassVar, List
 from .model import Model as BaseModel
+from .hydrate import hydrator_of, slotted
 from .query import (
     Query as BaseQuery,
 )
 
 
+@slotted
 @dataclass
 class DownloadModel(BaseModel):
     entityId: str = None
     productId: str = None
 
 
+@slotted
 @dataclass
 class Download(BaseModel):
     downloadId: str = None
@@ -30,6 +33,7 @@ class Download(BaseModel):
     _saved: bool = False
 
 
+@slotted
 @dataclass
 class DownloadRetrieveModel(BaseModel):
     available: List[Download] = None
@@ -38,8 +42,9 @@ class DownloadRetrieveModel(BaseModel):
     eulas: list = None
 
     def __post_init__(self):
-        self.available = [Download(**item) for item in self.available]
-        self.requested = [Download(**item) for item in self.requested]
+        hydrator = hydrator_of(self._api)
+        self.available = hydrator.build_many(Download, self.available, self._api)
+        self.requested = hydrator.build_many(Download, self.requested, self._api)
 
     @property
     def size(self):
@@ -53,10 +58,12 @@ class DownloadRetrieveModel(BaseModel):
 class DownloadRetrieveQuery(BaseQuery):
     _end_point: ClassVar[str] = "download-retrieve"
     _model: DownloadRetrieveModel = DownloadRetrieveModel
+    _stream_models: ClassVar[dict] = {"available": Download, "requested": Download}
 
     label: str = None
 
 
+@slotted
 @dataclass
 class DownloadRequestFailedModel(BaseModel):
     productId: str = None
@@ -64,6 +71,7 @@ class DownloadRequestFailedModel(BaseModel):
     errorMessage: str = None
 
 
+@slotted
 @dataclass
 class DownloadRequestModel(BaseModel):
     failed: List[DownloadRequestFailedModel] = None
@@ -142,11 +150,28 @@ class DownloadRequestModel(BaseModel):
 class DownloadRequestQuery(BaseQuery):
     _end_point: ClassVar[str] = "download-request"
     _model: DownloadRequestModel = DownloadRequestModel
+    _fan_out: ClassVar[dict] = {"downloads": 500}
+    _fan_out_sequential: ClassVar[bool] = True
 
     downloads: List[DownloadModel] = None
     label: str = None
 
+    def _chunk_failed(self, error: Exception) -> dict:
+        # The downloads of the chunk are reported like the ones the server refused
+        return {
+            "failed": [
+                {"productId": download.productId, "entityId": download.entityId, "errorMessage": str(error)}
+                for download in self.downloads or []
+            ],
+            "newRecords": {},
+            "numInvalidScenes": 0,
+            "duplicateProducts": [],
+            "availableDownloads": [],
+            "preparingDownloads": [],
+        }
+
 
+@slotted
 @dataclass
 class DownloadOptionModel(BaseModel):
     id: str = None
@@ -166,6 +191,7 @@ class DownloadOptionModel(BaseModel):
 class DownloadOptionQuery(BaseQuery):
     _end_point: ClassVar[str] = "download-options"
     _model: ClassVar[DownloadOptionModel] = DownloadOptionModel
+    _fan_out: ClassVar[dict] = {"entityIds": 500}
 
     datasetName: str = None
     entityIds: list = None
@@ -0,0 +1,138 @@
+"""Concurrent download engine.
+
+DownloadEngine runs downloads on a pool of worker threads, with at most
+`workers` running at once and at most `per_host` against any one host.
+Jobs waiting for a slot are kept in submission order; whenever a job
+finishes the next eligible one is started right away, so a free slot is
+never left idle until the caller polls again.
+
+    engine = DownloadEngine(workers=8, per_host=4, on_done=record)
+    engine.submit(entity_id, download.url, lambda: save(download))
+    engine.wait()
+"""
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Hashable, Optional
+from urllib.parse import urlparse
+
+
+def host_of(url: str) -> str:
+    """The host:port a url connects to, "" when it has none"""
+    return urlparse(url or "").netloc.lower()
+
+
+class DownloadEngine:
+    """Runs submitted jobs concurrently under a global and a per host limit
+
+    Parameters
+    ----------
+    workers : int, optional
+        Jobs running at once, by default 4
+    per_host : int, optional
+        Jobs running at once against one host, by default 2 (None for no
+        limit besides workers)
+    on_done : Callable, optional
+        Called from the worker thread as on_done(key, result, error) when a
+        job finishes, error being None on success
+    """
+
+    def __init__(self, workers: int = 4, per_host: Optional[int] = 2, on_done: Callable = None):
+        if workers < 1:
+            raise ValueError(f"workers must be at least 1, got {workers}")
+        if per_host is not None and per_host < 1:
+            raise ValueError(f"per_host must be at least 1 or None, got {per_host}")
+
+        self.workers = workers
+        self.per_host = per_host
+        self.on_done = on_done
+        self._changed = threading.Condition()
+        # key -> (host, job) waiting for a slot
+        self._pending: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        # key -> host of the running jobs
+        self._running = {}
+        self._hosts = Counter()
+        self._executor = None
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._changed:
+            return key in self._pending or key in self._running
+
+    def __len__(self):
+        with self._changed:
+            return len(self._pending) + len(self._running)
+
+    @property
+    def running(self) -> int:
+        return len(self._running)
+
+    @property
+    def busy(self) -> bool:
+        return len(self) > 0
+
+    def submit(self, key: Hashable, url: str, job: Callable) -> bool:
+        """Queue job() for the host of url, started as soon as a slot is
+        free. False when a job is already queued or running under key
+        """
+        with self._changed:
+            if key in self._pending or key in self._running:
+                return False
+            self._pending[key] = (host_of(url), job)
+            self._dispatch()
+        return True
+
+    def _dispatch(self):
+        """Start the pending jobs that fit, in order. Holds the lock"""
+        if not self._pending or len(self._running) >= self.workers:
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="usgs-download")
+
+        for key, (host, job) in list(self._pending.items()):
+            if len(self._running) >= self.workers:
+                break
+            if self.per_host is not None and self._hosts[host] >= self.per_host:
+                continue
+            del self._pending[key]
+            self._running[key] = host
+            self._hosts[host] += 1
+            self._executor.submit(self._run, key, job)
+
+    def _run(self, key: Hashable, job: Callable):
+        result = error = None
+        try:
+            result = job()
+        except Exception as exc:
+            error = exc
+
+        try:
+            if self.on_done is not None:
+                self.on_done(key, result, error)
+        finally:
+            with self._changed:
+                host = self._running.pop(key)
+                self._hosts[host] -= 1
+                if not self._hosts[host]:
+                    del self._hosts[host]
+                self._dispatch()
+                self._changed.notify_all()
+
+    def wait(self, timeout: float = None) -> bool:
+        """Block until every job finished. False when timeout elapsed first"""
+        with self._changed:
+            return self._changed.wait_for(lambda: not self._pending and not self._running, timeout)
+
+    def wait_any(self, timeout: float = None) -> bool:
+        """Block until a job finishes or the engine is idle. False when
+        timeout elapsed first
+        """
+        with self._changed:
+            if not self._pending and not self._running:
+                return True
+            return self._changed.wait(timeout)
+
+    def shutdown(self, wait: bool = True):
+        with self._changed:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
@@ -0,0 +1,99 @@
+"""Typed errors raised by the Api in place of exiting the process"""
+
+
+class UsgsApiError(Exception):
+    """Base error for failed M2M requests
+
+    Attributes
+    ----------
+    code : Union[str, int]
+        The errorCode from EE or the HTTP status code
+    message : str
+        The errorMessage from EE or a description of the failure
+    url : str
+        The endpoint url that failed
+    request_sent : bool
+        False when the request provably never reached the server, which
+        makes it safe to repeat even for non idempotent endpoints
+    """
+
+    def __init__(self, code=None, message: str = None, url: str = None, request_sent: bool = True):
+        self.code = code
+        self.message = message
+        self.url = url
+        self.request_sent = request_sent
+        super().__init__(f"Url: {url} | Code: {code} | Returned: {message}")
+
+
+class AuthenticationError(UsgsApiError):
+    """Login failed or the API key is missing/expired"""
+
+
+class RateLimitError(UsgsApiError):
+    """The server throttled the request. The request was rejected, not
+    processed, so it can always be repeated after backing off
+    """
+
+    def __init__(self, *args, retry_after: float = None, **kwargs):
+        self.retry_after = retry_after
+        super().__init__(*args, **kwargs)
+
+
+class TransientServerError(UsgsApiError):
+    """5xx responses, timeouts, dropped connections and unreadable bodies"""
+
+
+class ValidationError(UsgsApiError):
+    """The server rejected the query parameters"""
+
+
+class NotFoundError(UsgsApiError):
+    """The requested dataset, scene or endpoint does not exist"""
+
+
+class CircuitOpenError(TransientServerError):
+    """The endpoint failed repeatedly and calls are short-circuited
+    until the breaker's reset timeout passes
+    """
+
+
+class UnorderedResultsError(UsgsApiError):
+    """The server did not return the scenes in the requested sort order,
+    so they cannot be merged in order
+    """
+
+
+def error_for(code, message: str = None, url: str = None, **kwargs) -> UsgsApiError:
+    """Map an EE errorCode or HTTP status code onto the matching error type
+
+    Returns
+    -------
+    UsgsApiError
+        An instance of the most specific error class
+    """
+    if isinstance(code, int):
+        if code == 429:
+            return RateLimitError(code, message, url, **kwargs)
+        if code in (401, 403):
+            return AuthenticationError(code, message, url, **kwargs)
+        if code == 404:
+            return NotFoundError(code, message, url, **kwargs)
+        if code >= 500:
+            return TransientServerError(code, message, url, **kwargs)
+        if code >= 400:
+            return ValidationError(code, message, url, **kwargs)
+
+    name = str(code or "").upper()
+
+    if name.startswith("RATE_LIMIT"):
+        return RateLimitError(code, message, url, **kwargs)
+    if name.startswith("AUTH"):
+        return AuthenticationError(code, message, url, **kwargs)
+    if "NOT_FOUND" in name:
+        return NotFoundError(code, message, url, **kwargs)
+    if name.startswith("INPUT") or name.startswith("VERSION"):
+        return ValidationError(code, message, url, **kwargs)
+    if not name or name.startswith("SERVER") or name == "UNKNOWN":
+        return TransientServerError(code, message, url, **kwargs)
+
+    return UsgsApiError(code, message, url, **kwargs)
@@ -0,0 +1,148 @@
+"""Chunked, concurrent fan-out for list valued query parameters.
+
+Queries declare which list field may be split (Query._fan_out, e.g.
+{"entityIds": 500}). A large query is split into copies holding one
+chunk each, the copies are fetched concurrently and their `data` is
+merged back in order before hydration. Queries that are not safe to
+repeat (download-request) send their chunks one after another and keep
+the result of the chunks the server took when another chunk fails.
+"""
+import asyncio
+import dataclasses
+from concurrent.futures import ThreadPoolExecutor
+from numbers import Number
+from typing import Callable, List
+
+from .exceptions import UsgsApiError
+
+
+def chunked(items: list, size: int) -> List[list]:
+    """Split items into consecutive lists of at most size items"""
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+def merge_data(parts: list):
+    """Merge the `data` members of the chunked responses, in order.
+    Lists are concatenated, objects merged member by member, counts summed
+    """
+    parts = [part for part in parts if part is not None]
+    if not parts:
+        return None
+    if all(isinstance(part, list) for part in parts):
+        return [item for part in parts for item in part]
+    if all(isinstance(part, dict) for part in parts):
+        keys = {}
+        for part in parts:
+            keys.update(dict.fromkeys(part))
+        return {key: _merge_values([part[key] for part in parts if key in part]) for key in keys}
+    return parts[0]
+
+
+def _merge_values(values: list):
+    values = [value for value in values if value is not None]
+    if not values:
+        return None
+    # The API returns [] in place of an empty object (e.g. duplicateProducts)
+    if any(isinstance(value, dict) for value in values):
+        merged = {}
+        for value in values:
+            if isinstance(value, dict):
+                merged.update(value)
+        return merged
+    if all(isinstance(value, list) for value in values):
+        return [item for value in values for item in value]
+    if all(isinstance(value, Number) and not isinstance(value, bool) for value in values):
+        return sum(values)
+    return values[0]
+
+
+class FanOut:
+    """Splits and dispatches queries declaring a _fan_out field
+
+    Parameters
+    ----------
+    max_workers : int, optional
+        Chunks fetched concurrently, by default 4
+    chunk_sizes : dict, optional
+        Overrides the chunk size by field name (e.g. {"entityIds": 200})
+    """
+
+    def __init__(self, max_workers: int = 4, chunk_sizes: dict = None):
+        self.max_workers = max_workers
+        self.chunk_sizes = chunk_sizes or {}
+
+    def _field(self, query):
+        for field, size in (query._fan_out or {}).items():
+            values = getattr(query, field, None)
+            size = self.chunk_sizes.get(field, size)
+            if isinstance(values, list) and len(values) > size:
+                return field, size
+        return None, None
+
+    def applies(self, query) -> bool:
+        return self._field(query)[0] is not None
+
+    def split(self, query) -> list:
+        """Copies of the query, each holding one chunk of the list field"""
+        field, size = self._field(query)
+        if field is None:
+            return [query]
+        return [
+            dataclasses.replace(query, **{field: chunk})
+            for chunk in chunked(getattr(query, field), size)
+        ]
+
+    def run(self, fetch: Callable, query) -> list:
+        """Fetch every chunk of the query concurrently
+
+        Parameters
+        ----------
+        fetch : Callable
+            Called with each chunk query, returns its `data`
+
+        Returns
+        -------
+        list
+            The `data` of each chunk, in chunk order
+        """
+        queries = self.split(query)
+        if len(queries) == 1:
+            return [fetch(queries[0])]
+        if query._fan_out_sequential:
+            return self._run_sequential(fetch, queries)
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(queries))) as pool:
+            return list(pool.map(fetch, queries))
+
+    async def run_async(self, fetch: Callable, query) -> list:
+        """asyncio counterpart of run, fetch returns an awaitable"""
+        queries = self.split(query)
+        if query._fan_out_sequential and len(queries) > 1:
+            parts, errors = [], []
+            for chunk in queries:
+                try:
+                    parts.append(await fetch(chunk))
+                except UsgsApiError as error:
+                    errors.append(error)
+                    parts.append(chunk._chunk_failed(error))
+            return _partial(parts, errors)
+        return await asyncio.gather(*(fetch(chunk) for chunk in queries))
+
+    @staticmethod
+    def _run_sequential(fetch: Callable, queries: list) -> list:
+        parts, errors = [], []
+        for chunk in queries:
+            try:
+                parts.append(fetch(chunk))
+            except UsgsApiError as error:
+                errors.append(error)
+                parts.append(chunk._chunk_failed(error))
+        return _partial(parts, errors)
+
+
+def _partial(parts: list, errors: list) -> list:
+    """The chunk results of a sequential fan-out, raising when every chunk
+    failed since the server then took none of them
+    """
+    if errors and len(errors) == len(parts):
+        raise errors[0]
+    return parts
@@ -0,0 +1,150 @@
+"""Federated scene search.
+
+One SceneFilter searched over several datasets at once: the first page
+of every dataset is fetched concurrently, the following pages are
+prefetched per dataset as the merge consumes them, and the scenes are
+yielded through a streaming k-way merge ordered by acquisition date,
+publish date or cloud cover. Every dataset is sorted by the server
+(sortField/sortDirection), the merge only interleaves the sorted
+streams. Only `window` pages per dataset are held at any time, and scenes
+are only hydrated as they are yielded.
+
+    search = FederatedSearch(api, ["landsat_ot_c2_l2", "sentinel_2a", "naip"], scene_filter, order_by="cloudCover")
+    for scene in search:
+        scene.datasetName, scene.entityId
+"""
+import dataclasses
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Union
+
+from .dataset import DatasetModel
+from .exceptions import UnorderedResultsError
+from .filters import SceneFilter
+from .scene import SceneModel, SceneQuery, SceneResultSet
+
+# Server sortField of each order_by
+SORT_FIELDS = {"acquisitionDate": "acquisitionDate", "publishDate": "publishDate", "cloudCover": "cloudCover"}
+
+ORDER_BY = tuple(SORT_FIELDS)
+
+
+def _sort_key(value: float, reverse: bool) -> tuple:
+    # Unknown (NaN) values sort last in either direction
+    if value != value:
+        return (1, 0.0)
+    return (0, -value if reverse else value)
+
+
+class FederatedSearch:
+    """Iterable of the SceneModels of several datasets matching one
+    SceneFilter, merged in order. Each scene's datasetName is the dataset
+    it was found in
+
+    Each dataset is searched with the server sort matching order_by.
+    Scenes with an unknown value are expected last, and a dataset whose
+    scenes come back out of order raises UnorderedResultsError rather than
+    yielding a misordered merge
+
+    Parameters
+    ----------
+    api : Api
+        The Api used for the searches
+    datasets : List[Union[str, DatasetModel]]
+        datasetNames or DatasetModels
+    scene_filter : SceneFilter, optional
+        Applied to every dataset
+    order_by : str, optional
+        "acquisitionDate", "publishDate" or "cloudCover", by default
+        "acquisitionDate"
+    reverse : bool, optional
+        Descending order, by default False
+    page_size : int, optional
+        maxResults of the pages, by default 1000
+    window : int, optional
+        Pages prefetched ahead per dataset, by default 2
+    max_workers : int, optional
+        First pages fetched concurrently, by default 4
+    **query
+        Other SceneQuery members (metadataType, maxResults...). sortField
+        and sortDirection are set from order_by and reverse
+    """
+
+    def __init__(
+        self,
+        api,
+        datasets: List[Union[str, DatasetModel]],
+        scene_filter: SceneFilter = None,
+        order_by: str = "acquisitionDate",
+        reverse: bool = False,
+        page_size: int = 1000,
+        window: int = 2,
+        max_workers: int = 4,
+        **query,
+    ):
+        if order_by not in ORDER_BY:
+            raise ValueError(f"Cannot order by {order_by}, expected one of {ORDER_BY}")
+        if "sortField" in query or "sortDirection" in query:
+            raise ValueError("sortField and sortDirection are set from order_by and reverse")
+
+        self.api = api
+        self.order_by = order_by
+        self.reverse = reverse
+        self.window = window
+        self.max_workers = max_workers
+        self.queries = [
+            SceneQuery(
+                datasetName=dataset.datasetAlias if isinstance(dataset, DatasetModel) else dataset,
+                sceneFilter=scene_filter,
+                maxResults=page_size,
+                sortField=SORT_FIELDS[order_by],
+                sortDirection="DESC" if reverse else "ASC",
+                **query,
+            )
+            for dataset in datasets
+        ]
+        self.totalHits: Dict[str, int] = {}
+        self._first: List[SceneResultSet] = None
+
+    def first_pages(self) -> List[SceneResultSet]:
+        """The first page of every dataset, fetched concurrently once"""
+        if self._first is None:
+            queries = [dataclasses.replace(query, startingNumber=1) for query in self.queries]
+            with ThreadPoolExecutor(max_workers=max(1, self.max_workers)) as pool:
+                self._first = list(pool.map(self.api.fetch, queries))
+            self.totalHits = {
+                query.datasetName: page.totalHits or 0 for query, page in zip(self.queries, self._first)
+            }
+        return self._first
+
+    def _stream(self, position: int, first: SceneResultSet) -> Iterator[tuple]:
+        """(key, position, columns, index) of one dataset's scenes, in the
+        server's order, which must be the merge order
+        """
+        last = None
+        for page in first.pages(window=self.window):
+            columns = page.results
+            if not columns:
+                return
+            for index, value in enumerate(getattr(columns, self.order_by)):
+                key = _sort_key(value, self.reverse)
+                if last is not None and key < last:
+                    raise UnorderedResultsError(
+                        None,
+                        f"{self.queries[position].datasetName} scenes are not ordered by {self.order_by} "
+                        f"{'DESC' if self.reverse else 'ASC'} at scene {columns.entityId[index]}",
+                    )
+                last = key
+                yield key, position, columns, index
+
+    def __iter__(self) -> Iterator[SceneModel]:
+        streams = [self._stream(position, first) for position, first in enumerate(self.first_pages())]
+        # Ties keep the order of the datasets
+        for _, _, columns, index in heapq.merge(*streams, key=lambda item: (item[0], item[1])):
+            yield columns[index]
+
+    @property
+    def total(self) -> int:
+        """Scenes across every dataset, as counted by the server"""
+        self.first_pages()
+        return sum(self.totalHits.values())
@@ -3,6 +3,8 @@ from dateutil.parser import parse
 from typing import List
 from dataclasses import dataclass, asdict
 
+from .serialize import memoize_payload
+
 
 @dataclass
 class BaseFilter:
@@ -10,6 +12,8 @@ class BaseFilter:
         return asdict(self)
 
 
+# Their payload is built once however many queries share them
+@memoize_payload
 @dataclass
 class Point:
     latitude: float
@@ -24,6 +28,22 @@ class SpatialFilter:
     def make_point(lat: float, lon: float) -> Point:
         return Point(latitude=lat, longitude=lon)
 
+    @classmethod
+    def from_dict(cls, data: dict) -> "SpatialFilter":
+        """The spatial filter of a payload, by its filterType"""
+        data = dict(data)
+        filter_type = data.get("filterType")
+        if filter_type == "mbr":
+            for corner in ("lowerLeft", "upperRight"):
+                if isinstance(data.get(corner), dict):
+                    data[corner] = Point(**data[corner])
+            return SpatialMbr(**data)
+        if filter_type == "geojson":
+            if isinstance(data.get("geoJson"), dict):
+                data["geoJson"] = GeoJson(**data["geoJson"])
+            return SpatialGeojson(**data)
+        raise TypeError(f"Unknown spatial filterType {filter_type!r}")
+
 
 @dataclass
 class SpatialMbr(SpatialFilter):
@@ -32,6 +52,7 @@ class SpatialMbr(SpatialFilter):
     upperRight: Point = None
 
 
+@memoize_payload
 @dataclass
 class GeoJson:
     type: str
@@ -120,6 +141,28 @@ class SceneFilter:
     # Seasonal Filter is essentially a 1-12 list of months
     seasonalFilter: List[int] = None
 
+    @classmethod
+    def from_dict(cls, data: dict) -> "SceneFilter":
+        """Rebuild a SceneFilter from its payload, e.g. a saved SceneCursor.
+        Dates are kept as given so the payload is unchanged
+
+        Raises
+        ------
+        TypeError
+            The payload holds members a SceneFilter cannot represent
+        """
+        data = dict(data)
+        builders = {
+            "ingestFilter": lambda value: IngestFilter(**value),
+            "spatialFilter": SpatialFilter.from_dict,
+            "acquisitionFilter": lambda value: AcquisitionFilter(**value),
+            "cloudCoverFilter": lambda value: CloudCoverFilter(**value),
+        }
+        for name, build in builders.items():
+            if isinstance(data.get(name), dict):
+                data[name] = build(data[name])
+        return cls(**data)
+
     ## TODO: implement factory methods for subfilters
     # scene_filter.acquired(start, end)
     # scene_filter.within_mbr(ll, ur)
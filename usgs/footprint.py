@@ -0,0 +1,231 @@
+"""Exact footprint tests.
+
+M2M filters scenes on bounding boxes, so searches return scenes whose
+`spatialCoverage` only shares a bounding box with the area of interest.
+These helpers compute how much of a footprint actually overlaps an area
+of interest (planar, in degrees): the footprint is clipped to its convex
+hull (scene footprints are convex quadrilaterals) and the area of interest,
+any polygon or multipolygon with holes, is clipped against it.
+
+    aoi = Aoi.of(SpatialMbr(...))
+    aoi.overlap(scene.spatialCoverage)   # fraction of the footprint inside the aoi
+    page.results.footprints(aoi, min_overlap=0.2)
+"""
+import dataclasses
+from typing import List, Optional, Sequence, Tuple
+
+Ring = List[Tuple[float, float]]
+
+# relative_to values of Aoi.overlap
+RELATIVE_TO = ("scene", "aoi")
+
+
+def _pair(point) -> Tuple[float, float]:
+    """(longitude, latitude) of a [lon, lat] pair, a Point or a dict"""
+    if isinstance(point, dict):
+        return float(point["longitude"]), float(point["latitude"])
+    if hasattr(point, "longitude"):
+        return float(point.longitude), float(point.latitude)
+    return float(point[0]), float(point[1])
+
+
+def _ring(coordinates) -> Ring:
+    ring = [_pair(point) for point in coordinates]
+    if len(ring) > 1 and ring[0] == ring[-1]:
+        ring.pop()
+    return ring
+
+
+def polygons(geometry) -> List[List[Ring]]:
+    """The polygons of a GeoJSON Polygon or MultiPolygon, each a list of
+    rings (exterior first, then holes). Empty for anything else
+    """
+    if dataclasses.is_dataclass(geometry):
+        geometry = {"type": geometry.type, "coordinates": geometry.coordinates}
+    if not isinstance(geometry, dict):
+        return []
+
+    kind, coordinates = geometry.get("type"), geometry.get("coordinates")
+    if not coordinates:
+        return []
+    if kind == "Polygon":
+        return [[_ring(ring) for ring in coordinates]]
+    if kind == "MultiPolygon":
+        return [[_ring(ring) for ring in polygon] for polygon in coordinates if polygon]
+    return []
+
+
+def signed_area(ring: Ring) -> float:
+    """Shoelace area, positive for counter clockwise rings"""
+    total = 0.0
+    for index in range(len(ring)):
+        x1, y1 = ring[index - 1]
+        x2, y2 = ring[index]
+        total += x1 * y2 - x2 * y1
+    return total / 2
+
+
+def convex_hull(points: Sequence[Tuple[float, float]]) -> Ring:
+    """Counter clockwise convex hull (monotone chain)"""
+    points = sorted(set(points))
+    if len(points) < 3:
+        return points
+
+    def cross(o, a, b):
+        return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+    lower, upper = [], []
+    for point in points:
+        while len(lower) >= 2 and cross(lower[-2], lower[-1], point) <= 0:
+            lower.pop()
+        lower.append(point)
+    for point in reversed(points):
+        while len(upper) >= 2 and cross(upper[-2], upper[-1], point) <= 0:
+            upper.pop()
+        upper.append(point)
+    return lower[:-1] + upper[:-1]
+
+
+def clip(subject: Ring, window: Ring) -> Ring:
+    """Sutherland-Hodgman: the part of subject inside the convex, counter
+    clockwise window. The area of the result is exact for any subject
+    """
+    output = subject
+    for index in range(len(window)):
+        if not output:
+            break
+        (ax, ay), (bx, by) = window[index - 1], window[index]
+
+        def inside(point):
+            return (bx - ax) * (point[1] - ay) - (by - ay) * (point[0] - ax) >= 0
+
+        def crossing(p, q):
+            dx, dy = q[0] - p[0], q[1] - p[1]
+            denominator = (bx - ax) * dy - (by - ay) * dx
+            t = ((bx - ax) * (ay - p[1]) - (by - ay) * (ax - p[0])) / denominator
+            return p[0] + t * dx, p[1] + t * dy
+
+        points, output = output, []
+        for position in range(len(points)):
+            previous, current = points[position - 1], points[position]
+            if inside(current):
+                if not inside(previous):
+                    output.append(crossing(previous, current))
+                output.append(current)
+            elif inside(previous):
+                output.append(crossing(previous, current))
+    return output
+
+
+def contains(ring: Ring, point: Tuple[float, float]) -> bool:
+    """Even-odd point in polygon test"""
+    x, y = point
+    result = False
+    for index in range(len(ring)):
+        (x1, y1), (x2, y2) = ring[index - 1], ring[index]
+        if (y1 > y) != (y2 > y) and x < (x2 - x1) * (y - y1) / (y2 - y1) + x1:
+            result = not result
+    return result
+
+
+class Aoi:
+    """An area of interest, built with Aoi.of from a spatial filter or a
+    geometry
+
+    Parameters
+    ----------
+    parts : List[List[Ring]]
+        Polygons, each an exterior ring followed by its holes
+    points : List[Tuple[float, float]], optional
+        For a Point or MultiPoint area of interest
+    """
+
+    def __init__(self, parts: List[List[Ring]], points: List[Tuple[float, float]] = None):
+        self.parts = [[ring for ring in polygon if len(ring) >= 3] for polygon in parts]
+        self.parts = [polygon for polygon in self.parts if polygon]
+        self.points = points or []
+        self.area = sum(
+            abs(signed_area(polygon[0])) - sum(abs(signed_area(hole)) for hole in polygon[1:])
+            for polygon in self.parts
+        )
+
+        coordinates = [point for polygon in self.parts for point in polygon[0]] + self.points
+        if coordinates:
+            longitudes = [point[0] for point in coordinates]
+            latitudes = [point[1] for point in coordinates]
+            self.bounds = min(longitudes), min(latitudes), max(longitudes), max(latitudes)
+        else:
+            self.bounds = None
+
+    @classmethod
+    def of(cls, aoi) -> Optional["Aoi"]:
+        """An Aoi from a SpatialMbr, SpatialGeojson (or their dicts), a
+        GeoJSON geometry or a (west, south, east, north) tuple. None when
+        there is no area
+        """
+        if aoi is None or isinstance(aoi, Aoi):
+            return aoi
+
+        if isinstance(aoi, (tuple, list)) and len(aoi) == 4 and not isinstance(aoi[0], (list, tuple)):
+            west, south, east, north = aoi
+            return cls([[[(west, south), (east, south), (east, north), (west, north)]]])
+
+        if dataclasses.is_dataclass(aoi) and hasattr(aoi, "filterType"):
+            aoi = {field.name: getattr(aoi, field.name) for field in dataclasses.fields(aoi)}
+
+        if isinstance(aoi, dict) and aoi.get("filterType") == "mbr":
+            (west, south), (east, north) = _pair(aoi["lowerLeft"]), _pair(aoi["upperRight"])
+            return cls.of((min(west, east), min(south, north), max(west, east), max(south, north)))
+
+        if isinstance(aoi, dict) and aoi.get("filterType") == "geojson":
+            aoi = aoi.get("geoJson")
+
+        if dataclasses.is_dataclass(aoi):
+            aoi = {"type": aoi.type, "coordinates": aoi.coordinates}
+
+        if isinstance(aoi, dict) and aoi.get("type") == "Point":
+            return cls([], [_pair(aoi["coordinates"])])
+        if isinstance(aoi, dict) and aoi.get("type") == "MultiPoint":
+            return cls([], [_pair(point) for point in aoi["coordinates"]])
+
+        parts = polygons(aoi)
+        if not parts:
+            raise ValueError(f"Cannot use {aoi!r} as an area of interest")
+        return cls(parts)
+
+    def _overlap_area(self, hull: Ring) -> float:
+        area = 0.0
+        for polygon in self.parts:
+            area += abs(signed_area(clip(polygon[0], hull)))
+            for hole in polygon[1:]:
+                area -= abs(signed_area(clip(hole, hull)))
+        return max(area, 0.0)
+
+    def overlap(self, footprint, relative_to: str = "scene") -> Optional[float]:
+        """Fraction of the footprint (relative_to="scene") or of this area
+        (relative_to="aoi") covered by their intersection. Point areas give
+        1.0 when a point lies in the footprint. None without a footprint
+        """
+        if relative_to not in RELATIVE_TO:
+            raise ValueError(f"relative_to must be one of {RELATIVE_TO}, not {relative_to!r}")
+
+        hulls = [convex_hull(polygon[0]) for polygon in polygons(footprint)]
+        hulls = [hull for hull in hulls if len(hull) >= 3]
+        if not hulls:
+            return None
+
+        if self.points:
+            inside = any(contains(hull, point) for hull in hulls for point in self.points)
+            if inside or not self.parts:
+                return 1.0 if inside else 0.0
+
+        shared = sum(self._overlap_area(hull) for hull in hulls)
+        whole = sum(abs(signed_area(hull)) for hull in hulls) if relative_to == "scene" else self.area
+        return min(shared / whole, 1.0) if whole else 0.0
+
+    def intersects(self, footprint, min_overlap: float = 0.0, relative_to: str = "scene") -> bool:
+        """Whether the footprint overlaps this area (by at least min_overlap)"""
+        fraction = self.overlap(footprint, relative_to)
+        if fraction is None:
+            return False
+        return fraction > 0 if min_overlap <= 0 else fraction >= min_overlap
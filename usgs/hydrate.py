@@ -0,0 +1,198 @@
+"""Model hydration.
+
+Responses are turned into Models by a constructor compiled once per Model
+class: it reads each field straight from the decoded dict into the
+instance's slots, interns the strings repeated across thousands of items
+(datasetId, collectionName, label...) and keeps fields the Model does not
+declare in `_extra` rather than failing on them. Dates stay the strings
+the API returns, parse_datetime converts them on access.
+"""
+import datetime
+import sys
+from dataclasses import MISSING, fields, is_dataclass
+from functools import lru_cache
+from typing import Callable, Iterable, List
+
+from dateutil.parser import parse
+
+# String fields whose values repeat across items and are worth sharing
+INTERNED_FIELDS = frozenset(
+    {
+        "datasetId",
+        "datasetAlias",
+        "collectionName",
+        "label",
+        "productCode",
+        "productName",
+        "statusCode",
+        "statusText",
+        "downloadSystem",
+        "eulaCode",
+    }
+)
+
+UNKNOWN_FIELDS = ("store", "ignore", "raise")
+
+
+def slotted(cls):
+    """Rebuild a dataclass with __slots__ for its fields, the equivalent of
+    dataclass(slots=True) which needs Python 3.10. Every base class must be
+    slotted as well for instances to drop their __dict__
+    """
+    declared = {field.name for field in fields(cls)}
+    own = tuple(name for name in cls.__dict__.get("__annotations__", {}) if name in declared)
+
+    namespace = dict(cls.__dict__)
+    namespace["__slots__"] = own
+    for name in own:
+        # Defaults live in the dataclass fields, the class attributes would
+        # shadow the slot descriptors
+        namespace.pop(name, None)
+    namespace.pop("__dict__", None)
+    namespace.pop("__weakref__", None)
+
+    slotted_cls = type(cls)(cls.__name__, cls.__bases__, namespace)
+    slotted_cls.__qualname__ = cls.__qualname__
+    return slotted_cls
+
+
+@lru_cache(maxsize=65536)
+def parse_datetime(value: str) -> datetime.datetime:
+    """Parse an API date. The ISO 8601 forms the API uses take a fast path
+    ("2021-06-01", "2021-06-01 10:22:05", "2021-06-01T10:22:05.123",
+    "2021-06-01 00:00:00-05"), anything else falls back to dateutil.
+    Results are cached, the same dates repeat across scenes
+
+    Returns
+    -------
+    datetime.datetime
+        None when value is empty
+    """
+    if not value:
+        return None
+
+    if len(value) > 19 and value[-3] in "+-" and value[-4].isdigit():
+        # "-05" hour only offsets are not understood by fromisoformat before 3.11
+        value = f"{value}:00"
+
+    try:
+        return datetime.datetime.fromisoformat(value)
+    except ValueError:
+        return parse(value)
+
+
+class Hydrator:
+    """Builds Models from response dicts with a per class compiled
+    constructor
+
+    Parameters
+    ----------
+    unknown : str, optional
+        What to do with members the Model does not declare: "store" them
+        in the Model's `_extra` dict (the default), "ignore" them, or "raise"
+        a TypeError like the dataclass constructor
+    intern : bool, optional
+        Intern the INTERNED_FIELDS string values, by default True
+    """
+
+    def __init__(self, unknown: str = "store", intern: bool = True):
+        if unknown not in UNKNOWN_FIELDS:
+            raise ValueError(f"unknown must be one of {UNKNOWN_FIELDS}")
+
+        self.unknown = unknown
+        self.intern = intern
+        self._constructors = {}
+
+    def build(self, cls, item: dict, api=None, query=None):
+        """A cls instance holding item"""
+        constructor = self._constructors.get(cls)
+        if constructor is None:
+            constructor = self.constructor(cls)
+        return constructor(item, api, query)
+
+    def build_many(self, cls, items: Iterable[dict], api=None, query=None) -> List:
+        constructor = self._constructors.get(cls)
+        if constructor is None:
+            constructor = self.constructor(cls)
+        return [constructor(item, api, query) for item in items]
+
+    def constructor(self, cls) -> Callable:
+        """Compile (once) the constructor of a Model class. It is called as
+        constructor(item, api, query)
+        """
+        if cls in self._constructors:
+            return self._constructors[cls]
+
+        if not is_dataclass(cls):
+            raise TypeError(f"{cls!r} is not a dataclass Model")
+
+        names = {"cls": cls, "new": object.__new__, "intern": sys.intern, "fail": _unknown_field}
+        declared = [field for field in fields(cls) if field.init]
+
+        # The response members are bound to keyword parameters by the
+        # interpreter, undeclared members land in **extra
+        parameters, body = [], []
+
+        for position, field in enumerate(declared):
+            name = field.name
+            default = f"default_{position}"
+            factory = field.default_factory is not MISSING
+            names[default] = field.default_factory if factory else field.default
+
+            if name == "_api":
+                value = "api_"
+            elif name == "_query":
+                value = "query_"
+            elif name == "_extra":
+                value = "None"
+            elif name.startswith("_"):
+                value = f"{default}()" if factory else default
+            else:
+                if factory:
+                    parameters.append(f"{name}=MISSING_")
+                    value = f"{default}() if {name} is MISSING_ else {name}"
+                elif field.default is MISSING:
+                    parameters.append(name)
+                    value = name
+                else:
+                    parameters.append(f"{name}={default}")
+                    value = name
+                if self.intern and name in INTERNED_FIELDS:
+                    body.append(f"    if type({name}) is str: {name} = intern({name})")
+
+            body.append(f"    self_.{name} = {value}")
+
+        names["MISSING_"] = MISSING
+
+        if self.unknown == "raise" or (self.unknown == "store" and "_extra" not in cls.__dataclass_fields__):
+            body.append("    if extra: fail(cls, extra)")
+        elif self.unknown == "store":
+            body.append("    if extra: self_._extra = extra")
+
+        if hasattr(cls, "__post_init__"):
+            body.append("    self_.__post_init__()")
+
+        lines = [
+            f"def fill(self_, api_, query_, *, {', '.join(parameters + ['**extra'])}):",
+            *body,
+            "    return self_",
+            "",
+            "def build(item, api, query):",
+            "    return fill(new(cls), api, query, **item)",
+        ]
+
+        exec("\n".join(lines), names)
+        constructor = self._constructors[cls] = names["build"]
+        return constructor
+
+
+def _unknown_field(cls, extra):
+    raise TypeError(f"{cls.__name__} got unexpected fields {sorted(extra)}")
+
+
+# Used by nested Models when no Api hydrator is at hand
+HYDRATOR = Hydrator()
+
+
+def hydrator_of(api) -> Hydrator:
+    return getattr(api, "hydrator", None) or HYDRATOR
@@ -1,14 +1,19 @@
 import os
 import tarfile
+import threading
+from functools import partial
 from time import sleep
 from typing import Callable, List, Union
 
-import requests
 from clint.textui import progress
 
 from .api import Api
+from .transport import Transport, SessionTransport
 from .dataset import DatasetModel
-from .scene import SceneModel
+from .scene import SceneModel, SceneResultSet
+from .columns import SceneColumns
+from .footprint import Aoi
+from .engine import DownloadEngine
 from .download import (
   DownloadRequestModel,
   DownloadOptionQuery,
@@ -21,47 +26,105 @@ from .download import (
 
 
 class DownloadManager:
-
-    _queue_state: dict = {}
-
-    _option_models: dict = {}
+    """Requests, waits for and downloads the files of a set of scenes
+
+    Downloads run concurrently on a DownloadEngine as soon as the API
+    makes them available: at most `workers` at once and `per_host` against
+    one download host
+
+    Parameters
+    ----------
+    api : Api
+        The Api used for the requests
+    dataset : Union[DatasetModel, str]
+        The dataset of the scenes
+    post_process : bool, optional
+        Extract the saved archives, by default False
+    cleanup : bool, optional
+        Delete the archives once extracted, by default False
+    transport : Transport, optional
+        Transport of the file downloads, by default a SessionTransport
+        pooling `workers` connections per host
+    aoi : optional
+        Area of interest filtering the scenes added as models
+    min_overlap : float, optional
+        Footprint overlap required by the aoi filter, by default 0.0
+    relative_to : str, optional
+        "scene" or "aoi", what min_overlap is a fraction of
+    workers : int, optional
+        Downloads running at once, by default 4. With one worker each file
+        shows its own progress bar, with more a single bar counts the
+        finished downloads
+    per_host : int, optional
+        Downloads running at once against one host, by default 2
+    """
 
     _original_request: DownloadRequestModel = None
 
     _label: str = None
 
-    _requested: dict = {}
+    def __init__(self, api: Api, dataset: Union[DatasetModel, str], path: str = "/", post_process: bool = False, cleanup: bool = False, transport: Transport = None, aoi=None, min_overlap: float = 0.0, relative_to: str = "scene", workers: int = 4, per_host: int = 2):
+
+        self.api = api
 
-    _available: dict = {}
+        self.dataset = dataset if isinstance(dataset, DatasetModel) else self.api.dataset(datasetName=dataset)
+
+        if not self.dataset:
+            raise ValueError(f"{dataset} was not found in the USGS API")
 
-    _downloading: dict = {}
+        self._label = self.api.SESSION_LABEL
 
-    _completed: dict = {}
+        self._scenes_to_download = []
 
-    _failed: dict = {}
+        self._pending_scenes = []
 
-    _labels: List[str] = []
+        # Queue state is per manager, _downloading, _completed and _failed
+        # are also written by the download workers under _lock
+        self._queue_state: dict = {}
 
-    requested_scenes: List[str] = []
+        self._option_models: dict = {}
 
+        self._requested: dict = {}
 
-    def __init__(self, api: Api, dataset: Union[DatasetModel, str], path: str = "/", post_process: bool = False, cleanup: bool = False):
+        self._available: dict = {}
 
-        self.dataset = dataset if isinstance(dataset, DatasetModel) else self.api.dataset(dataset)
+        self._downloading: dict = {}
 
-        if not self.dataset:
-            raise ValueError(f"{dataset} was not found in the USGS API")
+        self._completed: dict = {}
 
-        self.api = api
+        self._failed: dict = {}
 
-        self._label = self.api.SESSION_LABEL
+        self._labels: List[str] = []
 
-        self._scenes_to_download = []
+        self.requested_scenes: List[str] = []
+
+        self._lock = threading.RLock()
 
         self.post_process = post_process
 
         self.cleanup = cleanup
 
+        self.workers = workers
+
+        self._engine = DownloadEngine(workers=workers, per_host=per_host, on_done=self._finished)
+
+        # Progress of the pooled downloads, (finished, submitted), updated under _lock
+        self._bar: progress.Bar = None
+
+        self._progress = (0, 0)
+
+        # Download hosts differ from the M2M host, keep their connections in a separate pool
+        self.transport = transport or SessionTransport(pool_maxsize=max(10, workers))
+
+        # Scenes added as models are dropped unless their footprint overlaps the aoi
+        self.aoi = Aoi.of(aoi)
+
+        self.min_overlap = min_overlap
+
+        self.relative_to = relative_to
+
+        self.rejected: List[str] = []
+
     @property
     def active(self):
         """
@@ -75,28 +138,37 @@ class DownloadManager:
         return self._failed
 
     def add(self, scene: Union[SceneModel, str]) -> "DownloadManager":
+        """Queue a scene, its download options are fetched in bulk with
+        the other queued scenes on fetch_options()/prepare()
+        """
+        return self.add_scenes([scene])
 
-        # Only need the entity id
-        scene = scene.entityId if isinstance(scene, SceneModel) else scene
-
-        self.requested_scenes.append(scene)
-
-        # Fetch the download capabilities
-        options_result: List[DownloadOptionModel] = self.api.fetch(
-            DownloadOptionQuery(datasetName=self.dataset.datasetAlias, entityIds=[scene])
-        )
-
-        for option_result in options_result:
-          self._option_models[option_result.entityId] = option_result
+    def add_scenes(self, scenes: Union[List[Union[str, SceneModel]], SceneColumns, SceneResultSet]):
+        """Queue scenes. With an aoi, SceneModels, SceneColumns and
+        SceneResultSets are filtered on their footprints first (entityIds
+        cannot be checked and are always queued), see `rejected`
+        """
+        if isinstance(scenes, SceneResultSet):
+            scenes = scenes.results or SceneColumns()
 
-        return self
+        if isinstance(scenes, SceneColumns):
+            if self.aoi is not None:
+                kept = scenes.footprints(self.aoi, self.min_overlap, self.relative_to)
+                kept_ids = set(kept.entityId)
+                self.rejected += [_id for _id in scenes.entityId if _id not in kept_ids]
+                scenes = kept
+            scenes = list(scenes.entityId)
 
-    def add_scenes(self, scenes: List[Union[str, SceneModel]]):
         # Compile entity_ids
         scene_ids = []
 
         for scene in scenes:
             if isinstance(scene, SceneModel):
+                if self.aoi is not None and not self.aoi.intersects(
+                    scene.spatialCoverage or scene.spatialBounds, self.min_overlap, self.relative_to
+                ):
+                    self.rejected.append(scene.entityId)
+                    continue
                 _id = scene.entityId
             else:
                 _id = scene
@@ -104,17 +176,31 @@ class DownloadManager:
 
         self.requested_scenes += scene_ids
 
-        # Fetch the download capabilities
+        self._pending_scenes += scene_ids
+
+        return self
+
+    def fetch_options(self):
+        """Fetch the download capabilities of every queued scene. Large
+        batches are split into chunks and fetched concurrently by Api.fan_out
+        """
+        if not self._pending_scenes:
+            return self
+
+        scene_ids, self._pending_scenes = self._pending_scenes, []
+
         options_result: List[DownloadOptionModel] = self.api.fetch(
             DownloadOptionQuery(datasetName=self.dataset.datasetAlias, entityIds=scene_ids)
         )
 
-        for option_result in options_result:
+        for option_result in options_result or []:
           self._option_models[option_result.entityId] = option_result
 
         return self
 
     def prepare(self):
+        self.fetch_options()
+
         # Collect the added option models for the request
         option_models: List[DownloadOptionModel] = self._option_models.values()
 
@@ -150,7 +236,7 @@ class DownloadManager:
 
     def start(self, download_fn: Callable = None, cool_down: int = 10):
         """Start the downloader and wait for the API queue to generate
-        the downloads
+        the downloads. Downloads run concurrently while the queue is polled
 
         Parameters
         ----------
@@ -163,14 +249,24 @@ class DownloadManager:
 
         self.collect_downloads()
 
-        while self.active:
+        try:
+            while self.active:
 
-            if self._downloading:
-                self.run_downloader(download_fn = download_fn)
-            else:
-                print(f"Waiting for ready state for {list(self._requested.keys())}")
-                sleep(cool_down)
-            self.collect_downloads()
+                self.run_downloader(download_fn=download_fn, wait=False)
+
+                if self._requested:
+                    if not self._engine.busy:
+                        print(f"Waiting for ready state for {list(self._requested.keys())}")
+                    sleep(cool_down)
+                else:
+                    # Every scene is available, only the running downloads are left
+                    self._engine.wait()
+                self.collect_downloads()
+        finally:
+            self._engine.shutdown()
+            if self._bar is not None:
+                self._bar.done()
+                self._bar = None
 
         if self._failed:
             print("Some scenes failed to download")
@@ -178,6 +274,8 @@ class DownloadManager:
 
     def collect_downloads(self):
 
+        requested_scenes = set(self.requested_scenes)
+
         for label in self._labels:
 
             # Get current status
@@ -185,48 +283,79 @@ class DownloadManager:
                 DownloadRetrieveQuery(label=label)
             )
 
-            for available in api_queue.available:
+            with self._lock:
+                for available in api_queue.available:
 
-                entity_id = available.entityId
+                    entity_id = available.entityId
 
-                if entity_id in self._requested.keys():
-                    self._requested.pop(entity_id)
+                    if entity_id in self._requested.keys():
+                        self._requested.pop(entity_id)
 
-                if entity_id in self._completed.keys() or entity_id in self._downloading.keys():
-                    continue
+                    # Duplicate products may belong to other scenes of the label
+                    if entity_id not in requested_scenes:
+                        continue
 
-                self._downloading[entity_id] = available
+                    if entity_id in self._completed or entity_id in self._downloading or entity_id in self._failed:
+                        continue
 
-            for requested in api_queue.requested:
+                    self._downloading[entity_id] = available
 
-                entity_id = requested.entityId
+                for requested in api_queue.requested:
 
-                self._requested[entity_id] = requested
+                    entity_id = requested.entityId
 
-                if entity_id in self._completed.keys() or entity_id in self._downloading.keys():
-                    self._requested.pop(entity_id)
-                    continue
+                    self._requested[entity_id] = requested
 
-    def run_downloader(self, download_fn: Callable = None):
+                    if entity_id in self._completed or entity_id in self._downloading or entity_id in self._failed:
+                        self._requested.pop(entity_id)
+                        continue
 
-        download_ids = list(self._downloading.keys())[::]
+    def run_downloader(self, download_fn: Callable = None, wait: bool = True):
+        """Hand the available downloads to the download engine. Each runs
+        `download_fn` (or `save`) on a worker as soon as a slot is free
 
-        for entity_id in download_ids:
-            download = self._downloading.pop(entity_id)
+        Parameters
+        ----------
+        download_fn : Callable, optional
+            Callback function that receives a `usgs.download.Download` instance, by default None
+        wait : bool, optional
+            Block until every download finished, by default True
+        """
+        requested_scenes = set(self.requested_scenes)
 
-            try:
-                if entity_id not in self.requested_scenes:
+        with self._lock:
+            for entity_id, download in list(self._downloading.items()):
+                if entity_id not in requested_scenes:
+                    self._downloading.pop(entity_id)
                     continue
 
-                if download_fn:
-                    download_fn(download)
-                else:
-                    self.save(download)
+                # Downloads already queued or running are not submitted twice
+                if self._engine.submit(entity_id, download.url, partial(download_fn or self.save, download)):
+                    finished, submitted = self._progress
+                    self._show_progress(finished, submitted + 1)
 
-            except Exception as exc:
-                self._failed[entity_id] = exc
+        if wait:
+            self._engine.wait()
+
+    def _finished(self, entity_id, result, error):
+        """Record a finished download, called from its worker"""
+        with self._lock:
+            download = self._downloading.pop(entity_id, None)
+            if error is not None:
+                self._failed[entity_id] = error
             else:
                 self._completed[entity_id] = download
+            finished, submitted = self._progress
+            self._show_progress(finished + 1, submitted)
+
+    def _show_progress(self, finished: int, submitted: int):
+        """Update the bar of the pooled downloads. Holds _lock"""
+        self._progress = (finished, submitted)
+        if self.workers == 1:
+            return
+        if self._bar is None:
+            self._bar = progress.Bar(label="Downloads ", expected_size=submitted)
+        self._bar.show(finished, count=submitted)
 
     def save(self, download):
         print(f"Downloading: {download.url} | {download.entityId}")
@@ -236,7 +365,7 @@ class DownloadManager:
 
         filePath = f"{download.displayId}"
 
-        request = requests.get(download.url, stream=True)
+        request = self.transport.get(download.url, stream=True)
 
         total_length = int(request.headers.get("content-length"))
         file_type = request.headers.get("content-type")
@@ -244,12 +373,16 @@ class DownloadManager:
         extension = file_types.get(file_type, "tgz")
         filePath = f"{filePath}.{extension}"
 
+        chunks = request.iter_content(chunk_size=1024)
+
+        # Concurrent bars would overwrite each other, pooled downloads share
+        # the bar of _show_progress instead
+        if self.workers == 1:
+            chunks = progress.bar(chunks, expected_size=(total_length / 1024) + 1)
+
         with open(filePath, "wb") as fp:
 
-            for chunk in progress.bar(
-                request.iter_content(chunk_size=1024),
-                expected_size=(total_length / 1024) + 1,
-            ):
+            for chunk in chunks:
                 if chunk:
                     fp.write(chunk)
 
@@ -0,0 +1,191 @@
+"""Indexed scene metadata.
+
+With metadataType="full" every scene carries a list of
+{"id", "fieldName", "dictionaryLink", "value"} dicts. A MetadataSchema,
+shared by the scenes of a page, holds the field names once and maps them
+to positions; each scene's SceneMetadata decodes its values into a tuple
+aligned with the schema the first time it is read.
+
+    scene.meta["Cloud Cover"]                 # "12"
+    scene.meta.get("Cloud Cover", type=float) # 12.0
+    page.metadata("Acquisition Date", type="auto")
+"""
+import datetime
+import re
+from collections.abc import Mapping
+from typing import Any, Callable, Iterator, List, Union
+
+from .hydrate import parse_datetime
+
+# Marks a field the scene does not carry
+_ABSENT = object()
+
+_INTEGER = re.compile(r"^[+-]?\d+$")
+_FLOAT = re.compile(r"^[+-]?(\d+\.\d*|\.\d+|\d+)([eE][+-]?\d+)?$")
+_DATE = re.compile(r"^\d{4}[-/]\d{2}[-/]\d{2}")
+
+_TRUE = frozenset({"y", "yes", "true", "t", "1"})
+
+
+def convert(value, type: Union[str, Callable] = None):
+    """Convert a metadata value (the API returns strings)
+
+    Parameters
+    ----------
+    value : Any
+        The raw value
+    type : Union[str, Callable], optional
+        None keeps the value, "auto" picks int, float, datetime or str from
+        its form, otherwise a callable such as int, float, bool,
+        datetime.datetime or datetime.date
+
+    Returns
+    -------
+    Any
+        The converted value, None stays None
+    """
+    if type is None or value is None:
+        return value
+
+    if type == "auto":
+        if not isinstance(value, str):
+            return value
+        text = value.strip()
+        if _INTEGER.match(text):
+            return int(text)
+        if _FLOAT.match(text):
+            return float(text)
+        if _DATE.match(text):
+            try:
+                return parse_datetime(text.replace("/", "-"))
+            except (ValueError, OverflowError):
+                return value
+        return value
+
+    if type is datetime.datetime:
+        return value if isinstance(value, datetime.datetime) else parse_datetime(str(value).replace("/", "-"))
+    if type is datetime.date:
+        return convert(value, datetime.datetime).date()
+    if type is bool and isinstance(value, str):
+        return value.strip().lower() in _TRUE
+
+    return type(value)
+
+
+class MetadataSchema:
+    """Field names and descriptions shared by the scenes of a page, each
+    name mapped to its position in the value tuples
+    """
+
+    __slots__ = ("names", "positions", "fields")
+
+    def __init__(self):
+        self.names: List[str] = []
+        self.positions = {}
+        self.fields: List[dict] = []
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.positions
+
+    def position(self, field: dict) -> int:
+        name = field.get("fieldName")
+        position = self.positions.get(name)
+        if position is None:
+            position = self.positions[name] = len(self.names)
+            self.names.append(name)
+            self.fields.append({key: value for key, value in field.items() if key != "value"})
+        return position
+
+    def decode(self, metadata: list) -> tuple:
+        """The values of a raw metadata list, aligned with the schema"""
+        position = self.position
+        positions = [position(field) for field in metadata]
+        values = [_ABSENT] * len(self.names)
+        for index, field in zip(positions, metadata):
+            values[index] = field.get("value")
+        return tuple(values)
+
+
+class SceneMetadata(Mapping):
+    """Read only fieldName -> value mapping over one scene's metadata,
+    decoded on first access
+
+    Parameters
+    ----------
+    metadata : list
+        The raw `metadata` member of the scene
+    schema : MetadataSchema, optional
+        The schema shared with the other scenes of the page
+    loader : Callable[[], list], optional
+        Called on first access for the raw metadata when the scene came
+        from a summary search
+    """
+
+    __slots__ = ("schema", "_raw", "_values", "_loader")
+
+    def __init__(self, metadata: list, schema: MetadataSchema = None, loader: Callable[[], list] = None):
+        self.schema = schema if schema is not None else MetadataSchema()
+        self._raw = metadata or []
+        self._values = None
+        self._loader = loader
+
+    def _load(self, metadata: list):
+        """Provide the raw metadata of a pending loader"""
+        if self._values is None:
+            self._raw = metadata or []
+            self._loader = None
+
+    @property
+    def _decoded(self) -> tuple:
+        if self._values is None:
+            if self._loader is not None:
+                self._load(self._loader())
+            self._values = self.schema.decode(self._raw)
+            # The names now live in the schema and the values in the tuple
+            self._raw = None
+        return self._values
+
+    def _value(self, name: str):
+        values = self._decoded
+        position = self.schema.positions.get(name)
+        if position is None or position >= len(values):
+            return _ABSENT
+        return values[position]
+
+    def __getitem__(self, name: str):
+        value = self._value(name)
+        if value is _ABSENT:
+            raise KeyError(name)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        values = self._decoded
+        return (name for name, value in zip(self.schema.names, values) if value is not _ABSENT)
+
+    def __len__(self) -> int:
+        return sum(1 for value in self._decoded if value is not _ABSENT)
+
+    def __contains__(self, name) -> bool:
+        return self._value(name) is not _ABSENT
+
+    def get(self, name: str, default: Any = None, type: Union[str, Callable] = None):
+        """The value of a field converted with `type` (see convert), default
+        when the scene does not carry the field
+        """
+        value = self._value(name)
+        if value is _ABSENT:
+            return default
+        return convert(value, type)
+
+    def field(self, name: str) -> dict:
+        """The description of a field (id, fieldName, dictionaryLink)"""
+        return self.schema.fields[self.schema.positions[name]]
+
+    def to_dict(self, type: Union[str, Callable] = None) -> dict:
+        return {name: convert(self[name], type) for name in self}
+
+    def __repr__(self):
+        return f"SceneMetadata({dict(self)!r})"
@@ -1,9 +1,11 @@
 from dataclasses import dataclass, field
 from typing import Any, List
 from .relations import Relations
+from .hydrate import slotted
 from . import utilities
 
 
+@slotted
 @dataclass
 class Model(Relations):
     """Base Model abstract. Should be used as base class when
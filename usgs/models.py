@@ -3,6 +3,7 @@ from typing import ClassVar
 from .model import (
     Model as BaseModel
 )
+from .hydrate import slotted
 from .dataset import DatasetModel
 from .scene import SceneModel
 
@@ -18,6 +19,7 @@ class DatasetBulkProduct:
     productName: str = None
 
 
+@slotted
 @dataclass
 class DatasetBulkProducts(BaseModel):
     _end_point: ClassVar[str] = "dataset-bulk-products"
@@ -0,0 +1,263 @@
+"""Spatio-temporal query planning for large scene searches.
+
+A SceneQuery over a large extent and a long acquisition window is split
+into spatial tiles and time slices until every part is small enough to
+page through quickly, judged from probes of totalHits. The parts are
+fetched concurrently and merged into one stream of SceneModels, scenes
+returned by several tiles (on their borders) are yielded once.
+
+    planner = QueryPlanner(api, target_hits=5000)
+    for scene in planner.search(SceneQuery(datasetName="landsat_ot_c2_l2", sceneFilter=scene_filter)):
+        ...
+"""
+import dataclasses
+import datetime
+import math
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
+from typing import Iterator, List
+
+from .columns import SceneColumns
+from .filters import AcquisitionFilter, Point, SceneFilter, SpatialMbr
+from .hydrate import parse_datetime
+from .scene import SceneModel, SceneQuery
+
+log = getLogger("usgs_api")
+
+
+def _as_date(value) -> datetime.date:
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    return parse_datetime(str(value)).date()
+
+
+def split_window(start, end, slices: int) -> List[tuple]:
+    """Split an inclusive date window into at most `slices` consecutive,
+    non overlapping inclusive windows. Interior bounds fall on whole days,
+    the first window keeps the original start and the last the original
+    end, times included
+    """
+    first, last = _as_date(start), _as_date(end)
+    days = (last - first).days + 1
+    slices = max(1, min(slices, days))
+    bounds = [first + datetime.timedelta(days=days * index // slices) for index in range(slices + 1)]
+    windows = [(bounds[index], bounds[index + 1] - datetime.timedelta(days=1)) for index in range(slices)]
+    windows[0] = (start, windows[0][1])
+    windows[-1] = (windows[-1][0], end)
+    return windows
+
+
+def split_mbr(mbr: SpatialMbr, columns: int, rows: int) -> List[SpatialMbr]:
+    """Split a bounding box into a columns x rows grid of tiles"""
+    west, south = mbr.lowerLeft.longitude, mbr.lowerLeft.latitude
+    east, north = mbr.upperRight.longitude, mbr.upperRight.latitude
+    width, height = (east - west) / columns, (north - south) / rows
+    return [
+        SpatialMbr(
+            lowerLeft=Point(latitude=south + row * height, longitude=west + column * width),
+            upperRight=Point(latitude=south + (row + 1) * height, longitude=west + (column + 1) * width),
+        )
+        for row in range(rows)
+        for column in range(columns)
+    ]
+
+
+class QueryPlanner:
+    """Partitions a SceneQuery and runs the parts concurrently
+
+    Parameters
+    ----------
+    api : Api
+        The Api used for probes and pages
+    target_hits : int, optional
+        Parts are split until they hold at most this many scenes, by default 5000
+    page_size : int, optional
+        maxResults of the pages fetched for each part, by default 1000
+    max_workers : int, optional
+        Parts probed and fetched concurrently, by default 4
+    max_depth : int, optional
+        Rounds of splitting before a part is paged through regardless of
+        its size, by default 4
+    min_degrees : float, optional
+        Tiles are not split below this width/height, by default 0.01
+    """
+
+    def __init__(
+        self,
+        api,
+        target_hits: int = 5000,
+        page_size: int = 1000,
+        max_workers: int = 4,
+        max_depth: int = 4,
+        min_degrees: float = 0.01,
+    ):
+        self.api = api
+        self.target_hits = target_hits
+        self.page_size = page_size
+        self.max_workers = max_workers
+        self.max_depth = max_depth
+        self.min_degrees = min_degrees
+
+    def probe(self, query: SceneQuery) -> int:
+        """totalHits of a query, fetched with a one scene page"""
+        page = self.api.fetch(dataclasses.replace(query, startingNumber=1, maxResults=1, metadataType="summary"))
+        return page.totalHits or 0
+
+    def split(self, query: SceneQuery, parts: int) -> List[SceneQuery]:
+        """Split a query into about `parts` queries over tiles of its
+        SpatialMbr and slices of its AcquisitionFilter. Returns [query] when
+        it has neither or they cannot be split further
+        """
+        scene_filter = query.sceneFilter
+        if parts <= 1 or not isinstance(scene_filter, SceneFilter):
+            return [query]
+
+        mbr = scene_filter.spatialFilter if isinstance(scene_filter.spatialFilter, SpatialMbr) else None
+        if mbr is not None and min(
+            mbr.upperRight.longitude - mbr.lowerLeft.longitude, mbr.upperRight.latitude - mbr.lowerLeft.latitude
+        ) < 2 * self.min_degrees:
+            mbr = None
+
+        acquisition = scene_filter.acquisitionFilter
+        windows = [None]
+        if acquisition is not None:
+            slices = math.ceil(math.sqrt(parts)) if mbr is not None else parts
+            windows = split_window(acquisition.start, acquisition.end, slices)
+            if len(windows) == 1:
+                windows = [None]
+
+        tiles = [None]
+        if mbr is not None:
+            count = math.ceil(parts / len(windows))
+            columns = math.ceil(math.sqrt(count))
+            tiles = split_mbr(mbr, columns, math.ceil(count / columns))
+
+        if len(windows) * len(tiles) == 1:
+            return [query]
+
+        queries = []
+        for window in windows:
+            for tile in tiles:
+                changes = {}
+                if window is not None:
+                    changes["acquisitionFilter"] = AcquisitionFilter(start=window[0], end=window[1])
+                if tile is not None:
+                    changes["spatialFilter"] = tile
+                queries.append(
+                    dataclasses.replace(query, sceneFilter=dataclasses.replace(scene_filter, **changes))
+                )
+        return queries
+
+    def plan(self, query: SceneQuery) -> List["Partition"]:
+        """The parts of a query, each probed at or below target_hits unless
+        it could not be split further. Parts without scenes are dropped
+        """
+        total = self.probe(query)
+        if total <= self.target_hits:
+            return [Partition(query, total)] if total else []
+
+        planned, pending = [], [Partition(query, total)]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for depth in range(self.max_depth):
+                splitting = []
+                for partition in pending:
+                    parts = self.split(partition.query, math.ceil(partition.hits / self.target_hits))
+                    if len(parts) == 1:
+                        planned.append(partition)
+                    else:
+                        splitting += parts
+
+                if not splitting:
+                    pending = []
+                    break
+
+                pending = []
+                for part, hits in zip(splitting, pool.map(self.probe, splitting)):
+                    if not hits:
+                        continue
+                    if hits <= self.target_hits:
+                        planned.append(Partition(part, hits))
+                    else:
+                        pending.append(Partition(part, hits))
+
+        planned += pending
+        log.debug(f"Planned {len(planned)} parts for {total} scenes")
+        return planned
+
+    def fetch(self, partition: "Partition") -> SceneColumns:
+        """Every scene of a part"""
+        first = self.api.fetch(
+            dataclasses.replace(partition.query, startingNumber=1, maxResults=self.page_size)
+        )
+        return SceneColumns.concat(page.results for page in first.pages(window=1) if page.results)
+
+    def search(self, query: SceneQuery) -> "PlannedSearch":
+        """Plan the query and return the merged stream of its scenes"""
+        return PlannedSearch(self, self.plan(query))
+
+
+@dataclasses.dataclass
+class Partition:
+    query: SceneQuery
+    hits: int = 0
+
+
+class PlannedSearch:
+    """Iterable of the SceneModels of every part, fetched `max_workers`
+    parts at a time and yielded in part order, each scene once
+
+    Attributes
+    ----------
+    partitions : List[Partition]
+        The planned parts
+    totalHits : int
+        Sum of the parts' totalHits, scenes on tile borders are counted once
+        per tile
+    duplicates : int
+        Scenes skipped so far because another part returned them
+    """
+
+    def __init__(self, planner: QueryPlanner, partitions: List[Partition]):
+        self.planner = planner
+        self.partitions = partitions
+        self.totalHits = sum(partition.hits for partition in partitions)
+        self.duplicates = 0
+
+    def pages(self) -> Iterator[SceneColumns]:
+        """The de-duplicated scenes of each part, in part order"""
+        seen = set()
+        window = max(1, self.planner.max_workers)
+
+        with ThreadPoolExecutor(max_workers=window) as pool:
+            partitions = iter(self.partitions)
+            pending = deque(pool.submit(self.planner.fetch, part) for _, part in zip(range(window), partitions))
+            try:
+                while pending:
+                    columns = pending.popleft().result()
+                    part = next(partitions, None)
+                    if part is not None:
+                        pending.append(pool.submit(self.planner.fetch, part))
+
+                    keep = []
+                    for index, entity_id in enumerate(columns.entityId):
+                        if entity_id in seen:
+                            self.duplicates += 1
+                        else:
+                            seen.add(entity_id)
+                            keep.append(index)
+                    yield columns if len(keep) == len(columns) else columns.take(keep)
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def __iter__(self) -> Iterator[SceneModel]:
+        for columns in self.pages():
+            yield from columns
+
+    def to_columns(self) -> SceneColumns:
+        """Every scene, merged into one SceneColumns"""
+        return SceneColumns.concat(self.pages())
@@ -18,12 +18,30 @@ class Query:
     _model: ClassVar[str] = None
     _api: ClassVar[Any] = None
 
+    # Array members of `data` that Api.stream can decode item by item,
+    # mapped to the Model used for each item
+    _stream_models: ClassVar[dict] = None
+
+    # List fields Api.fetch may split into chunks of the given size
+    _fan_out: ClassVar[dict] = None
+
+    # Send the chunks one after another instead of concurrently, for
+    # endpoints that are not idempotent. A failed chunk is reported by
+    # _chunk_failed rather than losing the chunks the server already took
+    _fan_out_sequential: ClassVar[bool] = False
+
     totalResults: int = field(init=False, repr=False, default=0)
 
     @property
     def valid(self):
         return True
 
+    def _chunk_failed(self, error: Exception):
+        """The `data` standing in for this chunk of a sequential fan-out
+        when its request failed, re-raises by default
+        """
+        raise error
+
     def to_dict(self):
         return utilities.asdict(self, skip_empty=True)
 
@@ -44,3 +62,9 @@ class Query:
 
     def fetchone(self) -> model.Model:
         return self._api.fetchone(self)
+
+    def stream(self):
+        if not self._api:
+            raise ValueError("API must be instantiated first")
+
+        return self._api.stream(self)
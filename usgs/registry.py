@@ -0,0 +1,222 @@
+"""Dataset registry.
+
+Dataset descriptors rarely change, DatasetRegistry keeps them in memory
+(and optionally in SQLite, shared by every process using the file) so
+`dataset` and unfiltered `dataset-search` requests are answered without
+a round trip. One `dataset-search` preloads every dataset; lookups by
+datasetAlias (datasetName) or datasetId are dict lookups. Entries older
+than the TTL are fetched again and only replaced when their dateUpdated
+changed.
+
+    Api.registry = DatasetRegistry("usgs-datasets.sqlite", ttl=24 * 3600)
+    Api.registry.preload(Api)           # once, e.g. when deploying workers
+    Api().dataset(datasetName="landsat_ot_c2_l2")   # no request
+"""
+import json
+import sqlite3
+import threading
+import time
+from typing import Iterable, Optional
+
+# Payload members that do not filter a dataset-search
+_NOT_FILTERS = ("totalResults",)
+
+
+class DatasetRegistry:
+    """Process wide store of dataset descriptors
+
+    Parameters
+    ----------
+    path : str, optional
+        SQLite file persisting the registry across processes, by default
+        None (memory only)
+    ttl : float, optional
+        Seconds an entry (and a preload) answers requests before it is
+        checked again, by default one day
+    """
+
+    def __init__(self, path: str = None, ttl: float = 86400):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        # datasetId -> (record, fetched)
+        self._entries = {}
+        # lower cased datasetAlias and datasetId -> datasetId
+        self._keys = {}
+        # When the last unfiltered dataset-search was ingested
+        self._complete = 0.0
+        # Preloads in progress, dataset-search goes to the network meanwhile
+        self._preloading = 0
+        self._connection = None
+
+        if path is not None:
+            self._connection = sqlite3.connect(path, check_same_thread=False)
+            with self._connection:
+                self._connection.execute(
+                    "CREATE TABLE IF NOT EXISTS datasets ("
+                    "dataset_id TEXT PRIMARY KEY, alias TEXT, date_updated TEXT, fetched REAL, record TEXT)"
+                )
+                self._connection.execute("CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value REAL)")
+            self._load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, name: str) -> bool:
+        return self.lookup(name, fresh=False) is not None
+
+    def _load(self):
+        """Read the entries other processes persisted"""
+        with self._lock:
+            for record, fetched in self._connection.execute("SELECT record, fetched FROM datasets"):
+                self._index(json.loads(record), fetched)
+            row = self._connection.execute("SELECT value FROM state WHERE key = 'complete'").fetchone()
+            self._complete = max(self._complete, row[0] if row else 0.0)
+
+    def _index(self, record: dict, fetched: float):
+        dataset_id = record.get("datasetId")
+        current = self._entries.get(dataset_id)
+        if current is not None and current[1] >= fetched:
+            return
+        self._entries[dataset_id] = (record, fetched)
+        self._keys[dataset_id.lower()] = dataset_id
+        if record.get("datasetAlias"):
+            self._keys[record["datasetAlias"].lower()] = dataset_id
+
+    def _fresh(self, fetched: float) -> bool:
+        return time.time() - fetched <= self.ttl
+
+    # Ingest
+
+    def ingest(self, records: Iterable[dict], complete: bool = False) -> int:
+        """Add dataset descriptors. Entries whose dateUpdated did not change
+        keep their record and are only marked fresh. With complete, the
+        records are every dataset (an unfiltered dataset-search)
+
+        Returns
+        -------
+        int
+            Entries added or replaced
+        """
+        now = time.time()
+        changed, touched = [], []
+
+        with self._lock:
+            for record in records:
+                dataset_id = record.get("datasetId") if isinstance(record, dict) else None
+                if not dataset_id:
+                    continue
+                current = self._entries.get(dataset_id)
+                if current is not None and current[0].get("dateUpdated") == record.get("dateUpdated"):
+                    self._entries[dataset_id] = (current[0], now)
+                    touched.append(dataset_id)
+                else:
+                    self._entries.pop(dataset_id, None)
+                    self._index(record, now)
+                    changed.append(record)
+
+            if complete:
+                self._complete = now
+
+            if self._connection is not None:
+                with self._connection:
+                    self._connection.executemany(
+                        "INSERT OR REPLACE INTO datasets VALUES (?, ?, ?, ?, ?)",
+                        (
+                            (record["datasetId"], record.get("datasetAlias"), record.get("dateUpdated"), now,
+                             json.dumps(record))
+                            for record in changed
+                        ),
+                    )
+                    self._connection.executemany(
+                        "UPDATE datasets SET fetched = ? WHERE dataset_id = ?",
+                        ((now, dataset_id) for dataset_id in touched),
+                    )
+                    if complete:
+                        self._connection.execute("INSERT OR REPLACE INTO state VALUES ('complete', ?)", (now,))
+
+        return len(changed)
+
+    def ingest_response(self, endpoint: str, payload: dict, data) -> int:
+        """Add the datasets of a dataset or dataset-search response"""
+        if endpoint == "dataset" and isinstance(data, dict):
+            return self.ingest([data])
+        if endpoint == "dataset-search" and isinstance(data, list):
+            return self.ingest(data, complete=not _filtered(payload))
+        return 0
+
+    def preload(self, api, force: bool = False) -> int:
+        """Load every dataset with one dataset-search, unless a fresh
+        preload is already held (force to refresh it)
+
+        Returns
+        -------
+        int
+            Datasets held
+        """
+        from .dataset import DatasetsQuery
+
+        if force or not self._fresh(self._complete):
+            with self._lock:
+                self._preloading += 1
+            try:
+                # The response is ingested by Api._store, or here for an Api without this registry
+                data = api.fetch(DatasetsQuery())
+            finally:
+                with self._lock:
+                    self._preloading -= 1
+            if getattr(api, "registry", None) is not self:
+                self.ingest((dataset.to_dict() for dataset in data or []), complete=True)
+        return len(self)
+
+    # Lookups
+
+    def lookup(self, name: str = None, dataset_id: str = None, fresh: bool = True) -> Optional[dict]:
+        """The descriptor of a dataset by datasetAlias (datasetName) or
+        datasetId. None when unknown, or stale with fresh
+        """
+        key = (name or dataset_id or "").lower()
+        with self._lock:
+            entry = self._entries.get(self._keys.get(key))
+        if entry is None and self._connection is not None:
+            # Another process may have fetched it since
+            self._load()
+            with self._lock:
+                entry = self._entries.get(self._keys.get(key))
+        if entry is None or (fresh and not self._fresh(entry[1])):
+            return None
+        return entry[0]
+
+    def answer(self, endpoint: str, payload: dict):
+        """The `data` of a dataset request when the registry holds it
+        fresh, otherwise None
+        """
+        if endpoint == "dataset":
+            return self.lookup(payload.get("datasetName"), payload.get("datasetId"))
+
+        if endpoint == "dataset-search" and not _filtered(payload) and not self._preloading:
+            if not self._fresh(self._complete) and self._connection is not None:
+                self._load()
+            if self._fresh(self._complete):
+                with self._lock:
+                    return [record for record, _ in self._entries.values()]
+
+        return None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys.clear()
+            self._complete = 0.0
+            if self._connection is not None:
+                with self._connection:
+                    self._connection.execute("DELETE FROM datasets")
+                    self._connection.execute("DELETE FROM state")
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+
+
+def _filtered(payload: dict) -> bool:
+    return any(value is not None for key, value in payload.items() if key not in _NOT_FILTERS)
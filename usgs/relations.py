@@ -1,13 +1,27 @@
 from typing import Any
 from dataclasses import dataclass, field
+from .hydrate import slotted
 
 
+@slotted
 @dataclass
 class Relations:
     _api: Any = field(repr=False, default=None)
 
     _query: Any = field(repr=False, default=None)
 
+    # Members of the response the Model does not declare
+    _extra: dict = field(repr=False, default=None)
+
+    def __getattr__(self, name):
+        # Only reached when the attribute is not a declared field
+        if name.startswith("__") or name == "_extra":
+            raise AttributeError(name)
+        extra = self._extra
+        if extra and name in extra:
+            return extra[name]
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+
     @property
     def api(self):
         return self._api
@@ -0,0 +1,244 @@
+"""Local retries for failed M2M requests.
+
+A failed page is repeated in place with jittered exponential backoff
+instead of failing the whole job. Endpoints that are not safe to repeat
+(download-request) are only retried when the request never reached the
+server. A circuit breaker per endpoint stops hammering an endpoint that
+keeps failing.
+"""
+import asyncio
+import random
+import threading
+import time
+from typing import Callable, Dict
+
+from .exceptions import (
+    CircuitOpenError,
+    RateLimitError,
+    TransientServerError,
+    UsgsApiError,
+)
+
+
+class CircuitBreaker:
+    """Classic closed/open/half-open breaker. Once the reset timeout
+    passes a single trial call is let through, the other callers are
+    short-circuited until its response closes or reopens the circuit
+
+    Parameters
+    ----------
+    failure_threshold : int, optional
+        Consecutive failures before the circuit opens, by default 5
+    reset_timeout : float, optional
+        Seconds the circuit stays open before a trial call, by default 30
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        # Whether the half-open trial call is in flight
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def before_call(self, url: str = None):
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    raise CircuitOpenError(
+                        None, f"Circuit open after {self.failures} failures", url
+                    )
+                self.state = self.HALF_OPEN
+                self._trial = False
+
+            if self.state == self.HALF_OPEN:
+                if self._trial:
+                    raise CircuitOpenError(None, "Circuit half-open, a trial call is in flight", url)
+                self._trial = True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self._open()
+
+    def record_throttled(self):
+        """The server rejected the call to shed load: a trial call reopens
+        the circuit, otherwise the failure count is left as is
+        """
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._trial = False
+                self._open()
+
+    def release(self):
+        """The call ended without a response, e.g. it was interrupted. A
+        trial call gives its turn to the next caller
+        """
+        with self._lock:
+            self._trial = False
+
+    def _open(self):
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+
+
+class RetryPolicy:
+    """Decides which failures are repeated and how long to wait between
+    attempts, and owns one CircuitBreaker per endpoint
+
+    Parameters
+    ----------
+    max_attempts : int, optional
+        Total attempts including the first, by default 4
+    base_delay : float, optional
+        Backoff base in seconds, by default 0.5
+    max_delay : float, optional
+        Upper bound for a single backoff, by default 30
+    failure_threshold : int, optional
+        Passed to each endpoint's CircuitBreaker, by default 5
+    reset_timeout : float, optional
+        Passed to each endpoint's CircuitBreaker, by default 30
+    idempotent : set, optional
+        Endpoints that can be repeated regardless of whether the
+        request reached the server, by default IDEMPOTENT_ENDPOINTS
+    """
+
+    IDEMPOTENT_ENDPOINTS = frozenset(
+        {
+            "login",
+            "dataset",
+            "dataset-search",
+            "dataset-bulk-products",
+            "scene-search",
+            "scene-metadata",
+            "download-options",
+            "download-retrieve",
+        }
+    )
+
+    RETRYABLE = (TransientServerError, RateLimitError)
+
+    def __init__(
+        self,
+        max_attempts: int = 4,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        idempotent: set = None,
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.idempotent = frozenset(idempotent or self.IDEMPOTENT_ENDPOINTS)
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        with self._lock:
+            if endpoint not in self._breakers:
+                self._breakers[endpoint] = CircuitBreaker(
+                    self.failure_threshold, self.reset_timeout
+                )
+            return self._breakers[endpoint]
+
+    def should_retry(self, endpoint: str, error: UsgsApiError, attempt: int) -> bool:
+        if attempt >= self.max_attempts or isinstance(error, CircuitOpenError):
+            return False
+        if not isinstance(error, self.RETRYABLE):
+            return False
+        if endpoint in self.idempotent or isinstance(error, RateLimitError):
+            return True
+        # Repeating e.g. download-request could enqueue twice
+        return not error.request_sent
+
+    def delay(self, attempt: int, error: UsgsApiError = None) -> float:
+        """Full jitter exponential backoff, honouring a server retry_after"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after:
+            delay = max(delay, retry_after)
+        return delay
+
+    def _record(self, breaker: CircuitBreaker, error: UsgsApiError):
+        # Only server health trips the breaker, any other response (e.g.
+        # bad input) shows the endpoint answers and closes it
+        if isinstance(error, CircuitOpenError):
+            return
+        if isinstance(error, TransientServerError):
+            breaker.record_failure()
+        elif isinstance(error, RateLimitError):
+            breaker.record_throttled()
+        else:
+            breaker.record_success()
+
+    def run(self, endpoint: str, attempt_fn: Callable, url: str = None):
+        """Call attempt_fn until it succeeds or the failure is final
+
+        Parameters
+        ----------
+        endpoint : str
+            The Query._end_point used for the idempotency check and breaker
+        attempt_fn : Callable
+            Performs one attempt, raising UsgsApiError on failure
+
+        Returns
+        -------
+        Any
+            The result of the successful attempt
+        """
+        breaker = self.breaker(endpoint)
+        attempt = 0
+        while True:
+            attempt += 1
+            breaker.before_call(url)
+            try:
+                result = attempt_fn()
+            except UsgsApiError as error:
+                self._record(breaker, error)
+                if not self.should_retry(endpoint, error, attempt):
+                    raise
+                time.sleep(self.delay(attempt, error))
+            except BaseException:
+                breaker.release()
+                raise
+            else:
+                breaker.record_success()
+                return result
+
+    async def run_async(self, endpoint: str, attempt_fn: Callable, url: str = None):
+        """asyncio counterpart of run, attempt_fn returns an awaitable"""
+        breaker = self.breaker(endpoint)
+        attempt = 0
+        while True:
+            attempt += 1
+            breaker.before_call(url)
+            try:
+                result = await attempt_fn()
+            except UsgsApiError as error:
+                self._record(breaker, error)
+                if not self.should_retry(endpoint, error, attempt):
+                    raise
+                await asyncio.sleep(self.delay(attempt, error))
+            except BaseException:
+                breaker.release()
+                raise
+            else:
+                breaker.record_success()
+                return result
@@ -1,7 +1,13 @@
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import ClassVar, List
+import dataclasses
+import datetime
+import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import ClassVar, Iterator, List
 from .model import Model as BaseModel
+from .hydrate import parse_datetime, slotted
 from .download import (
     DownloadModel,
     DownloadOptionModel,
@@ -12,8 +18,12 @@ from .query import (
     Query as BaseQuery,
 )
 from .filters import SceneFilter
+from .columns import SceneColumns
+from .metadata import SceneMetadata
+from .utilities import canonical_json
 
 
+@slotted
 @dataclass
 class SceneModel(BaseModel):
     browse: list = None
@@ -30,10 +40,34 @@ class SceneModel(BaseModel):
     orderingId: str = None
     hasCustomizedMetadata: bool = None
 
+    _meta: SceneMetadata = field(default=None, repr=False, compare=False)
+
+    @property
+    def meta(self) -> SceneMetadata:
+        """Indexed view of `metadata`: scene.meta["Cloud Cover"],
+        scene.meta.get("Cloud Cover", type=float)
+        """
+        if self._meta is None:
+            self._meta = SceneMetadata(self.metadata)
+        return self._meta
+
     @property
     def datasetName(self):
         return self._query.datasetName if self._query else None
 
+    @property
+    def published(self) -> datetime.datetime:
+        """publishDate, parsed on access"""
+        return parse_datetime(self.publishDate)
+
+    @property
+    def acquisition_start(self) -> datetime.datetime:
+        return parse_datetime((self.temporalCoverage or {}).get("startDate"))
+
+    @property
+    def acquisition_end(self) -> datetime.datetime:
+        return parse_datetime((self.temporalCoverage or {}).get("endDate"))
+
     @property
     def download_available(self):
         """Alias to the download setting in options. This
@@ -60,9 +94,10 @@ class SceneModel(BaseModel):
         )
 
 
+@slotted
 @dataclass
 class SceneResultSet(BaseModel):
-    results: List[SceneModel] = None
+    results: SceneColumns = None
     recordsReturned: int = None
     totalHits: int = None
     numExcluded: int = None
@@ -71,45 +106,121 @@ class SceneResultSet(BaseModel):
     totalHitsAccuracy: str = None
     isCustomized: bool = None
 
+    # (startingNumber, recordsReturned) of the last page next() returned
+    _cursor: tuple = field(default=None, repr=False, compare=False)
+
     def __post_init__(self):
-        if self.results:
-            results = self.results
-            self.results = list(
-                map(
-                    lambda result: SceneModel(
-                        **result, _api=self._api, _query=self._query
-                    ),
-                    results,
-                )
-            )
+        # SceneModels are built lazily as the results are indexed or iterated
+        if self.results is not None and not isinstance(self.results, SceneColumns):
+            self.results = SceneColumns(self.results, api=self._api, query=self._query)
 
     @property
     def datasetName(self):
         return self._query.datasetName if self._query else None
 
     @property
-    def downloadable(self):
-        downloadable = list(
-            filter(lambda result: result.options.get("download", False), self.results)
-        )
-        return downloadable
+    def downloadable(self) -> List[SceneModel]:
+        if not self.results:
+            return []
+        return self.results.downloadable().to_list()
 
     @property
     def has_more(self):
-        return self.totalHits > self._query.startingNumber + self.recordsReturned - 1
+        """Whether next() has a page left to return"""
+        starting, returned = self._cursor or (self._query.startingNumber, self.recordsReturned)
+        return bool(returned) and self.totalHits > starting + returned - 1
 
     def __len__(self):
         return len(self.results)
 
+    def metadata(self, name: str, type=None, default=None) -> list:
+        """One metadata field of every scene, see SceneColumns.metadata"""
+        return self.results.metadata(name, type=type, default=default) if self.results else []
+
+    def footprints(self, aoi=None, min_overlap: float = 0.0, relative_to: str = "scene") -> SceneResultSet:
+        """This page without the scenes whose footprint polygon misses the
+        aoi, see SceneColumns.footprints. totalHits and recordsReturned keep
+        the server's counts so paging carries on from this page
+
+        Parameters
+        ----------
+        aoi : optional
+            By default the spatialFilter of the query
+        min_overlap : float, optional
+            Required overlap fraction, by default 0 (any overlap)
+        relative_to : str, optional
+            "scene" or "aoi", by default "scene"
+        """
+        if aoi is None:
+            aoi = getattr(self._query.sceneFilter, "spatialFilter", None) if self._query else None
+            if aoi is None:
+                return self
+
+        results = self.results.footprints(aoi, min_overlap, relative_to) if self.results else self.results
+        return dataclasses.replace(self, results=results)
+
     def next(self) -> SceneResultSet:
+        """The page following the one next() returned last (this page at
+        first), and moves this result set past it. This result set once
+        there are no more pages
+        """
         if self.has_more:
-            self._query.startingNumber += self._query.maxResults
-            self._query._api = self._api
-            # return self._api.fetch(self._query)
-            return self._query.fetch()
+            starting = (self._cursor or (self._query.startingNumber,))[0] + self._query.maxResults
+            page = self._page_query(starting).fetch()
+            self._cursor = (starting, page.recordsReturned or 0)
+            return page
 
         return self
 
+    def _page_query(self, startingNumber: int) -> SceneQuery:
+        # Every page gets its own copy, the pages never share a query
+        query = dataclasses.replace(self._query, startingNumber=startingNumber)
+        query._api = self._api
+        return query
+
+    def pages(self, window: int = 4) -> Iterator[SceneResultSet]:
+        """Iterate this page and every following page of the search.
+
+        Once the first page is known so are totalHits and the offsets of
+        the remaining pages; up to `window` of them are fetched
+        concurrently and they are yielded in order as they complete. At most
+        `window` pages are held in memory ahead of the consumer
+
+        Parameters
+        ----------
+        window : int, optional
+            Pages fetched ahead concurrently, by default 4. 1 fetches the
+            pages serially
+
+        Yields
+        ------
+        SceneResultSet
+            Each page, starting with this one
+        """
+        yield self
+
+        query = self._query
+        offsets = iter(range(query.startingNumber + query.maxResults, (self.totalHits or 0) + 1, query.maxResults))
+
+        with ThreadPoolExecutor(max_workers=max(1, window)) as pool:
+            pending = deque(
+                pool.submit(self._page_query(offset).fetch) for _, offset in zip(range(max(1, window)), offsets)
+            )
+            try:
+                while pending:
+                    page = pending.popleft().result()
+                    offset = next(offsets, None)
+                    if offset is not None:
+                        pending.append(pool.submit(self._page_query(offset).fetch))
+
+                    # totalHits may be an estimate, stop at the first empty page
+                    if not page.results:
+                        return
+                    yield page
+            finally:
+                for future in pending:
+                    future.cancel()
+
     def download_options(self, entityIds: List = None) -> List[DownloadOptionModel]:
         """Method to query download availability
 
@@ -118,7 +229,7 @@ class SceneResultSet(BaseModel):
         List[DownloadOptionModel]
             Collection of Download Option Models
         """
-        entityIds = [scene.entityId for scene in self.results]
+        entityIds = list(self.results.entityId) if self.results else []
         options_results: List[DownloadOptionModel] = self.api.fetch(
             DownloadOptionQuery(datasetName=self.datasetName, entityIds=entityIds)
         )
@@ -150,6 +261,7 @@ class SceneResultSet(BaseModel):
 class SceneQuery(BaseQuery):
     _end_point: ClassVar[str] = "scene-search"
     _model: ClassVar[SceneResultSet] = SceneResultSet
+    _stream_models: ClassVar[dict] = {"results": SceneModel}
 
     datasetName: str
     sceneFilter: SceneFilter = None
@@ -201,4 +313,100 @@ class SceneMetadataQuery(BaseQuery):
         return self._api.fetch(self)
 
     def fetchone(self) -> SceneModel:
-        return self._api.fetchone(self)
\ No newline at end of file
+        return self._api.fetchone(self)
+
+
+@dataclass
+class SceneCursor:
+    """Serializable position of a scene crawl: the scene-search payload and
+    the 1-based number of the next scene to yield. Save it (to_json) while
+    iterating and hand it back to iter_scenes to resume where it stopped
+    """
+
+    query: dict
+    startingNumber: int = 1
+
+    @classmethod
+    def from_query(cls, query: SceneQuery) -> SceneCursor:
+        fields = {field.name for field in dataclasses.fields(query) if field.init}
+        payload = json.loads(canonical_json(query.to_dict()))
+        payload = {key: value for key, value in payload.items() if key in fields and key != "startingNumber"}
+        return cls(query=payload, startingNumber=query.startingNumber)
+
+    def to_query(self) -> SceneQuery:
+        query = dict(self.query)
+        if isinstance(query.get("sceneFilter"), dict):
+            try:
+                query["sceneFilter"] = SceneFilter.from_dict(query["sceneFilter"])
+            except TypeError:
+                # Members SceneFilter does not model, the filter is posted as is
+                pass
+        return SceneQuery(**query, startingNumber=self.startingNumber)
+
+    def to_dict(self) -> dict:
+        return {"query": self.query, "startingNumber": self.startingNumber}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> SceneCursor:
+        return cls(query=dict(data["query"]), startingNumber=data.get("startingNumber", 1))
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict())
+
+    @classmethod
+    def from_json(cls, data: str) -> SceneCursor:
+        return cls.from_dict(json.loads(data))
+
+
+class SceneIterator:
+    """Lazily yields every SceneModel of a search across pages. Only the
+    current page is held, `cursor` always points at the next scene
+
+    Parameters
+    ----------
+    api : Api
+        The Api used to fetch the pages
+    query : SceneQuery, optional
+        The search, its startingNumber is where iteration begins
+    cursor : SceneCursor, optional
+        A saved cursor to resume from instead of a query
+    """
+
+    def __init__(self, api, query: SceneQuery = None, cursor: SceneCursor = None):
+        if cursor is None and query is None:
+            raise ValueError("A query or a cursor is required")
+
+        self.api = api
+        self.cursor = cursor if cursor is not None else SceneCursor.from_query(query)
+        self.totalHits = None
+        self._results = iter(())
+        self._exhausted = False
+
+    def __iter__(self) -> SceneIterator:
+        return self
+
+    def __next__(self) -> SceneModel:
+        while True:
+            scene = next(self._results, None)
+            if scene is not None:
+                self.cursor.startingNumber += 1
+                return scene
+
+            if self._exhausted:
+                raise StopIteration
+
+            self._fetch_page()
+
+    def _fetch_page(self):
+        if self._exhausted:
+            return
+
+        query = self.cursor.to_query()
+        query._api = self.api
+        page: SceneResultSet = self.api.fetch(query)
+
+        self.totalHits = page.totalHits
+        self._results = iter(page.results or ())
+
+        if not page.results or self.cursor.startingNumber + len(page.results) > (page.totalHits or 0):
+            self._exhausted = True
@@ -0,0 +1,190 @@
+"""Two-phase scene search.
+
+Searches run with metadataType="summary" keep their pages small; the full
+metadata of the scenes that survive client side filtering is then fetched
+in bulk through a temporary scene list (scene-list-add,
+scene-metadata-list, scene-list-remove) instead of one scene-metadata
+request per scene. Every record fetched is kept per entityId in a
+SceneMetadataCache, so scenes are never fetched twice.
+
+    page = Api.fetch(SceneQuery(datasetName="landsat_ot_c2_l2", metadataType="summary"))
+    clear = page.results.cloud_cover(10)
+    clear[0].meta["Sun Elevation L1"]   # one bulk fetch for every scene of `clear`
+"""
+import random
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import ClassVar, Dict, Iterable, List, Optional
+
+from .query import Query as BaseQuery
+
+
+@dataclass
+class SceneListAddQuery(BaseQuery):
+    _end_point: ClassVar[str] = "scene-list-add"
+    _fan_out: ClassVar[dict] = {"entityIds": 5000}
+
+    listId: str
+    datasetName: str
+    entityIds: List[str] = None
+    idField: str = "entityId"
+    # ISO 8601 duration, the list removes itself if scene-list-remove never runs
+    timeToLive: str = "PT1H"
+
+
+@dataclass
+class SceneListRemoveQuery(BaseQuery):
+    _end_point: ClassVar[str] = "scene-list-remove"
+
+    listId: str
+    datasetName: str = None
+    entityIds: List[str] = None
+
+
+@dataclass
+class SceneMetadataListQuery(BaseQuery):
+    _end_point: ClassVar[str] = "scene-metadata-list"
+
+    listId: str
+    datasetName: str = None
+    metadataType: str = "full"
+    includeNullMetadataValues: bool = None
+
+
+# Stands in the cache for scenes the server returned no record for
+_MISSING = object()
+
+
+def _records_of(data) -> List[dict]:
+    """The scene records of a scene-metadata-list response, a list or
+    lists keyed by dataset
+    """
+    if isinstance(data, dict):
+        return [record for records in data.values() if isinstance(records, list) for record in records]
+    return list(data or [])
+
+
+class SceneMetadataCache:
+    """Thread safe LRU of scene records keyed on (datasetName, entityId,
+    metadataType)
+
+    Parameters
+    ----------
+    max_entries : int, optional
+        Records kept, by default 50000
+    """
+
+    def __init__(self, max_entries: int = 50000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[tuple, dict]" = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_many(
+        self, dataset: str, entity_ids: Iterable[str], metadata_type: str = "full", include_missing: bool = False
+    ) -> Dict[str, dict]:
+        """The cached records by entityId. With include_missing, scenes
+        known to have no record map to None
+        """
+        found = {}
+        with self._lock:
+            for entity_id in entity_ids:
+                key = (dataset, entity_id, metadata_type)
+                record = self._entries.get(key)
+                if record is not None:
+                    self._entries.move_to_end(key)
+                    if record is not _MISSING:
+                        found[entity_id] = record
+                    elif include_missing:
+                        found[entity_id] = None
+        return found
+
+    def set_many(self, dataset: str, records: Iterable[dict], metadata_type: str = "full"):
+        with self._lock:
+            for record in records:
+                key = (dataset, record.get("entityId"), metadata_type)
+                self._entries[key] = record
+                self._entries.move_to_end(key)
+            self._trim()
+
+    def set_missing(self, dataset: str, entity_ids: Iterable[str], metadata_type: str = "full"):
+        """Remember scenes the server returned no record for, so they are
+        not fetched again
+        """
+        with self._lock:
+            for entity_id in entity_ids:
+                key = (dataset, entity_id, metadata_type)
+                self._entries[key] = _MISSING
+                self._entries.move_to_end(key)
+            self._trim()
+
+    def _trim(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def fetch_metadata(
+    api, dataset: str, entity_ids: Iterable[str], metadata_type: str = "full", cache: SceneMetadataCache = None
+) -> Dict[str, dict]:
+    """Scene records by entityId, from the cache or one bulk fetch through a
+    temporary scene list for the missing ones
+
+    Parameters
+    ----------
+    api : Api
+        The Api used for the requests
+    dataset : str
+        datasetName of the scenes
+    entity_ids : Iterable[str]
+        The scenes
+    metadata_type : str, optional
+        "full" or "summary", by default "full"
+    cache : SceneMetadataCache, optional
+        By default api.scene_metadata
+
+    Returns
+    -------
+    Dict[str, dict]
+        Records of the scenes the server knows
+    """
+    # AsyncApi wraps the synchronous Api, the bulk fetch runs on the latter
+    api = getattr(api, "api", api)
+    cache = cache if cache is not None else getattr(api, "scene_metadata", None)
+    entity_ids = list(dict.fromkeys(entity_id for entity_id in entity_ids if entity_id))
+    found = cache.get_many(dataset, entity_ids, metadata_type, include_missing=True) if cache is not None else {}
+
+    missing = [entity_id for entity_id in entity_ids if entity_id not in found]
+    found = {entity_id: record for entity_id, record in found.items() if record is not None}
+    if not missing:
+        return found
+
+    list_id = f"{api.SESSION_LABEL}-metadata-{random.getrandbits(32):08x}"
+    api.fetch(SceneListAddQuery(listId=list_id, datasetName=dataset, entityIds=missing))
+    try:
+        records = _records_of(
+            api.fetch(SceneMetadataListQuery(listId=list_id, datasetName=dataset, metadataType=metadata_type))
+        )
+    finally:
+        api.fetch(SceneListRemoveQuery(listId=list_id, datasetName=dataset))
+
+    fetched = {record.get("entityId"): record for record in records}
+    if cache is not None:
+        cache.set_many(dataset, records, metadata_type)
+        cache.set_missing(dataset, (entity_id for entity_id in missing if entity_id not in fetched), metadata_type)
+    found.update(fetched)
+    return found
+
+
+def cached_metadata(api, dataset: str, entity_id: str, metadata_type: str = "full") -> Optional[dict]:
+    """The cached record of one scene, None when it was never fetched"""
+    cache = getattr(getattr(api, "api", api), "scene_metadata", None)
+    if cache is None:
+        return None
+    return cache.get_many(dataset, [entity_id], metadata_type).get(entity_id)
@@ -0,0 +1,129 @@
+"""Query serialization.
+
+Queries and filters are turned into request payloads by a serializer
+compiled once per dataclass: it reads each field once, drops private
+members (and None members with skip_empty) in the same pass and only
+rebuilds the containers that hold dataclasses. Lists of plain values,
+such as GeoJSON coordinates, are shared with the query rather than deep
+copied, so payloads must be treated as read only. Like dataclasses.asdict,
+skip_empty only applies to the outermost dataclass, None members of
+nested ones are kept.
+
+Classes decorated with memoize_payload (Point, GeoJson) keep their payload
+on the instance, so an AOI shared by many queries, e.g. the thousands of
+sub-queries a QueryPlanner derives from it, is serialized once. Assigning
+a field drops the memo; a container edited in place after serialization
+is not noticed, assign a new one instead.
+"""
+import dataclasses
+from typing import Any, Callable
+
+# Values passed through untouched
+_SCALARS = frozenset({str, int, float, bool, type(None)})
+
+# Attribute holding the memoized payload of an instance
+_MEMO = "_payload_memo"
+
+_serializers = {}
+
+
+def _needs_conversion(value) -> bool:
+    """Whether a container holds dataclasses, judged from its first item
+    at each level since payload lists are homogeneous
+    """
+    while True:
+        if dataclasses.is_dataclass(value) and not isinstance(value, type):
+            return True
+        if isinstance(value, (list, tuple)):
+            if not value:
+                return False
+            value = value[0]
+        elif isinstance(value, dict):
+            return any(_needs_conversion(item) for item in value.values())
+        else:
+            return False
+
+
+def to_payload(value, skip_empty: bool = False):
+    """The JSON ready form of a value: dataclasses become dicts without
+    their private members, and without their None members with skip_empty
+    (the members of nested dataclasses are all kept)
+    """
+    cls = value.__class__
+    if cls in _SCALARS:
+        return value
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return serializer_for(cls)(value, skip_empty)
+    if isinstance(value, (list, tuple)):
+        if not _needs_conversion(value):
+            return value
+        return cls(to_payload(item, skip_empty) for item in value)
+    if isinstance(value, dict):
+        if not _needs_conversion(value):
+            return value
+        return {key: to_payload(item, skip_empty) for key, item in value.items()}
+    return value
+
+
+def serializer_for(cls) -> Callable[[Any, bool], dict]:
+    """Compile (once) the serializer of a dataclass. It is called as
+    serializer(instance, skip_empty)
+    """
+    serializer = _serializers.get(cls)
+    if serializer is not None:
+        return serializer
+
+    names = {"scalars": _SCALARS, "convert": to_payload}
+    body = ["    out = {}"]
+    for field in dataclasses.fields(cls):
+        name = field.name
+        if name.startswith("_"):
+            continue
+        body += [
+            f"    value = self_.{name}",
+            "    if value is None:",
+            f"        if not skip_empty: out[{name!r}] = None",
+            "    elif value.__class__ in scalars:",
+            f"        out[{name!r}] = value",
+            "    else:",
+            f"        out[{name!r}] = convert(value)",
+        ]
+
+    lines = ["def serialize(self_, skip_empty=False):", *body, "    return out"]
+    exec("\n".join(lines), names)
+    serializer = names["serialize"]
+
+    if getattr(cls, "_memoize_payload", False):
+        serializer = _memoized(serializer)
+
+    _serializers[cls] = serializer
+    return serializer
+
+
+def memoize_payload(cls):
+    """Class decorator keeping the payload of each instance until one of
+    its fields is assigned
+    """
+    setattr_ = cls.__setattr__
+
+    def __setattr__(self, name, value):
+        self.__dict__.pop(_MEMO, None)
+        setattr_(self, name, value)
+
+    cls.__setattr__ = __setattr__
+    cls._memoize_payload = True
+    return cls
+
+
+def _memoized(serializer: Callable) -> Callable:
+    def serialize(self_, skip_empty=False):
+        memo = self_.__dict__.get(_MEMO)
+        if memo is None:
+            # Bypasses the __setattr__ that drops the memo
+            memo = self_.__dict__[_MEMO] = {}
+        payload = memo.get(skip_empty)
+        if payload is None:
+            payload = memo[skip_empty] = serializer(self_, skip_empty)
+        return payload
+
+    return serialize
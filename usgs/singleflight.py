@@ -0,0 +1,105 @@
+"""Request coalescing.
+
+Concurrent callers asking for the same endpoint and payload share one
+in-flight request and all receive its result (or its error), instead of
+each issuing their own POST.
+"""
+import asyncio
+import threading
+from typing import Awaitable, Callable
+
+# Never merge requests with side effects
+NEVER_COALESCE = frozenset({"login", "download-request", "scene-list-add", "scene-list-remove"})
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Thread based single-flight group"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable):
+        """Run fn unless a call with the same key is already in flight, in
+        which case wait for that call and return its result
+
+        Parameters
+        ----------
+        key : str
+            Identifies the request, see utilities.request_key
+        fn : Callable
+            Performs the request
+
+        Returns
+        -------
+        Any
+            The result shared by every caller of the key
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+        return call.result
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """asyncio single-flight group, callers await the leader's future"""
+
+    def __init__(self):
+        self._calls = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable]):
+        """Awaitable counterpart of SingleFlight.do, fn returns an awaitable"""
+        future = self._calls.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = self._calls[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved when nobody else was waiting
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
+
+    def in_flight(self) -> int:
+        return len(self._calls)
@@ -0,0 +1,196 @@
+"""Incremental decoding of large M2M responses.
+
+Rather than loading the whole body, then the whole dict tree, then every
+Model, the response is read chunk by chunk and the items of the large
+arrays (data.results for scene-search, data.available/data.requested for
+download-retrieve) are decoded and yielded one at a time. Peak memory is
+bounded by a single item plus a read chunk.
+"""
+import codecs
+import json
+from typing import Callable, Iterable, Iterator, Tuple
+
+_WHITESPACE = " \t\n\r"
+_NUMBER = "0123456789.eE+-"
+
+
+class JsonStream:
+    """Pull parser over an iterable of byte chunks, built on
+    json.JSONDecoder.raw_decode for the actual values
+    """
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._raw_decode = json.JSONDecoder().raw_decode
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        """Append the next chunk to the buffer, False at the end of input"""
+        if self._eof:
+            return False
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self._eof = True
+            self._buffer += self._decoder.decode(b"", final=True)
+            return False
+
+        # Drop what has been consumed so the buffer stays item sized
+        if self._pos:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+
+        self._buffer += self._decoder.decode(chunk)
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of JSON stream")
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} in JSON stream, found {found!r}")
+        self._pos += 1
+
+    def value(self):
+        """Decode the next complete value"""
+        self.peek()
+        while True:
+            available = len(self._buffer) - self._pos
+            try:
+                value, end = self._raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._grow(available):
+                    raise
+                continue
+
+            # A number read up to the buffer boundary may continue in the next chunk
+            if (
+                isinstance(value, (int, float))
+                and not self._eof
+                and not self._buffer[end:].strip(_NUMBER)
+                and self._grow(available)
+            ):
+                continue
+
+            self._pos = end
+            return value
+
+    def _grow(self, available: int) -> bool:
+        """Read until the unconsumed part of the buffer has doubled, so a
+        large value is not rescanned for every chunk
+        """
+        grew = False
+        while len(self._buffer) - self._pos < max(available * 2, 1) and self._fill():
+            grew = True
+        return grew
+
+    def items(self, parent: Tuple[str, ...], keys: Tuple[str, ...], envelope: dict) -> Iterator:
+        """Yield (key, item) for every item of the arrays named by keys
+        inside the object at parent. Every other member is decoded into
+        envelope as it is passed
+        """
+        yield from self._object(tuple(parent), tuple(keys), envelope)
+
+    def _object(self, parent, keys, target: dict):
+        self.expect("{")
+        first = True
+        while True:
+            if self.peek() == "}":
+                self._pos += 1
+                return
+            if not first:
+                self.expect(",")
+            first = False
+
+            key = self.value()
+            self.expect(":")
+
+            if parent and key == parent[0] and self.peek() == "{":
+                target[key] = {}
+                yield from self._object(parent[1:], keys, target[key])
+            elif not parent and key in keys and self.peek() == "[":
+                yield from self._array(key)
+            else:
+                target[key] = self.value()
+
+    def _array(self, key: str):
+        self.expect("[")
+        first = True
+        while True:
+            if self.peek() == "]":
+                self._pos += 1
+                return
+            if not first:
+                self.expect(",")
+            first = False
+            yield key, self.value()
+
+
+class ResultStream:
+    """Iterable of hydrated Models decoded incrementally from a response.
+
+    The members that are not streamed (totalHits, nextRecord, errorCode...)
+    are collected in `envelope` as the response is consumed; they are
+    complete once iteration finishes
+
+    Parameters
+    ----------
+    chunks : Iterable[bytes]
+        The raw response body
+    models : dict
+        The Model class used for the items of each streamed array
+    build : Callable
+        Called as build(model_class, item) to hydrate an item
+    on_error : Callable
+        Called as on_error(code, message) when the envelope reports an error
+    parent : tuple, optional
+        Path to the object holding the arrays, by default ("data",)
+    """
+
+    def __init__(
+        self,
+        chunks: Iterable[bytes],
+        models: dict,
+        build: Callable,
+        on_error: Callable,
+        parent: Tuple[str, ...] = ("data",),
+    ):
+        self._chunks = chunks
+        self.models = models
+        self.build = build
+        self.on_error = on_error
+        self.parent = parent
+        self.envelope = {}
+        self._consumed = False
+
+    @property
+    def meta(self) -> dict:
+        """The non streamed members of the parent object"""
+        meta = self.envelope
+        for key in self.parent:
+            meta = meta.get(key) or {}
+        return meta
+
+    def __iter__(self):
+        if self._consumed:
+            raise RuntimeError("A ResultStream can only be iterated once")
+        self._consumed = True
+
+        stream = JsonStream(self._chunks)
+        for key, item in stream.items(self.parent, tuple(self.models), self.envelope):
+            yield self.build(self.models[key], item)
+
+        error_code = self.envelope.get("errorCode")
+        error_message = self.envelope.get("errorMessage")
+        if error_code or error_message:
+            self.on_error(error_code, error_message)
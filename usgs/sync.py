@@ -0,0 +1,224 @@
+"""Incremental ingest sync.
+
+Repeated searches over the same dataset, area and filters only ask for
+the scenes ingested since the previous successful run (an IngestFilter
+starting at the stored watermark, minus a safety overlap) and report the
+entityIds that are new or whose record changed since they were last seen.
+
+    sync = IncrementalSync(api, SyncStore("sync.sqlite"))
+    result = sync.run(SceneQuery(datasetName="landsat_ot_c2_l2", sceneFilter=aoi_filter))
+    manager.add_scenes(result.entity_ids)
+"""
+import dataclasses
+import datetime
+import hashlib
+import sqlite3
+import threading
+from typing import Callable, Dict, Iterable, List
+
+from .filters import IngestFilter, SceneFilter
+from .scene import SceneQuery
+from .utilities import canonical_json, request_key
+
+# Members that do not describe the scene itself
+_VOLATILE = ("selected",)
+
+# Query members that do not change which scenes a sync covers. metadataType
+# stays in the key, the fingerprints of summary and full records differ
+_NOT_IN_KEY = ("startingNumber", "maxResults", "sortField", "sortDirection")
+
+
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def fingerprint(record: dict) -> str:
+    """Digest of a scene-search record, changes whenever the scene does"""
+    stable = {key: value for key, value in record.items() if key not in _VOLATILE}
+    return hashlib.sha1(canonical_json(stable).encode("utf-8")).hexdigest()
+
+
+def sync_key(query: SceneQuery) -> str:
+    """Identifies the (dataset, area, filters, metadataType) a sync
+    covers. The ingestFilter, paging and sort members are left out
+    """
+    payload = query.to_dict()
+    for name in _NOT_IN_KEY:
+        payload.pop(name, None)
+    scene_filter = payload.get("sceneFilter")
+    if isinstance(scene_filter, dict):
+        payload["sceneFilter"] = {key: value for key, value in scene_filter.items() if key != "ingestFilter"}
+    return request_key("sync", payload)
+
+
+class SyncStore:
+    """SQLite state of the syncs: a watermark per sync key and the
+    fingerprint of every scene each sync has seen
+
+    Parameters
+    ----------
+    path : str, optional
+        Database file, by default "usgs-sync.sqlite"
+    """
+
+    def __init__(self, path: str = "usgs-sync.sqlite"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS watermarks (key TEXT PRIMARY KEY, dataset TEXT, watermark TEXT)"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS scenes ("
+                "key TEXT, entity_id TEXT, fingerprint TEXT, PRIMARY KEY (key, entity_id))"
+            )
+
+    def watermark(self, key: str) -> datetime.datetime:
+        """Start of the last successful run of a sync, None before the first"""
+        with self._lock:
+            row = self._connection.execute("SELECT watermark FROM watermarks WHERE key = ?", (key,)).fetchone()
+        return datetime.datetime.fromisoformat(row[0]) if row else None
+
+    def fingerprints(self, key: str, entity_ids: Iterable[str]) -> Dict[str, str]:
+        """The stored fingerprints of the given scenes, when seen before"""
+        entity_ids = list(entity_ids)
+        found = {}
+        with self._lock:
+            # Stay below SQLite's bound parameter limit
+            for start in range(0, len(entity_ids), 500):
+                chunk = entity_ids[start:start + 500]
+                found.update(
+                    self._connection.execute(
+                        f"SELECT entity_id, fingerprint FROM scenes WHERE key = ? "
+                        f"AND entity_id IN ({', '.join('?' * len(chunk))})",
+                        (key, *chunk),
+                    ).fetchall()
+                )
+        return found
+
+    def commit(self, key: str, dataset: str, watermark: datetime.datetime, fingerprints: Dict[str, str]):
+        """Record a successful run in one transaction"""
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO scenes VALUES (?, ?, ?)",
+                ((key, entity_id, digest) for entity_id, digest in fingerprints.items()),
+            )
+            self._connection.execute(
+                "INSERT OR REPLACE INTO watermarks VALUES (?, ?, ?)", (key, dataset, watermark.isoformat())
+            )
+
+    def reset(self, key: str = None):
+        """Forget a sync (or every sync), its next run searches everything"""
+        with self._lock, self._connection:
+            if key is None:
+                self._connection.execute("DELETE FROM watermarks")
+                self._connection.execute("DELETE FROM scenes")
+            else:
+                self._connection.execute("DELETE FROM watermarks WHERE key = ?", (key,))
+                self._connection.execute("DELETE FROM scenes WHERE key = ?", (key,))
+
+    def close(self):
+        self._connection.close()
+
+
+@dataclasses.dataclass
+class SyncResult:
+    key: str
+    new: List[str]
+    changed: List[str]
+    scanned: int = 0
+    since: datetime.datetime = None
+    watermark: datetime.datetime = None
+
+    @property
+    def entity_ids(self) -> List[str]:
+        """New and changed scenes"""
+        return self.new + self.changed
+
+
+class IncrementalSync:
+    """Runs scene searches incrementally against a SyncStore
+
+    Parameters
+    ----------
+    api : Api
+        The Api used for the searches
+    store : SyncStore, optional
+        By default an in-memory store, lost with the process
+    overlap : datetime.timedelta, optional
+        Searched before the watermark to catch late ingests and clock skew,
+        by default one day
+    page_size : int, optional
+        maxResults of the searches, by default 1000
+    clock : Callable, optional
+        Returns the current UTC time, by default the system clock
+    """
+
+    def __init__(
+        self,
+        api,
+        store: SyncStore = None,
+        overlap: datetime.timedelta = datetime.timedelta(days=1),
+        page_size: int = 1000,
+        clock: Callable[[], datetime.datetime] = _utcnow,
+    ):
+        self.api = api
+        self.store = store if store is not None else SyncStore(":memory:")
+        self.overlap = overlap
+        self.page_size = page_size
+        self.clock = clock
+
+    def delta_query(self, query: SceneQuery, since: datetime.datetime, until: datetime.datetime) -> SceneQuery:
+        """The query restricted to scenes ingested between since and until"""
+        ingest_filter = IngestFilter(start=since, end=until)
+        scene_filter = query.sceneFilter
+        if scene_filter is None:
+            scene_filter = SceneFilter(ingestFilter=ingest_filter)
+        elif isinstance(scene_filter, SceneFilter):
+            scene_filter = dataclasses.replace(scene_filter, ingestFilter=ingest_filter)
+        elif isinstance(scene_filter, dict):
+            # e.g. from SceneCursor.to_query, the other members are posted as is
+            scene_filter = dict(scene_filter, ingestFilter=ingest_filter)
+        else:
+            raise TypeError(f"Cannot restrict a sceneFilter of type {type(scene_filter).__name__}")
+        return dataclasses.replace(query, sceneFilter=scene_filter, startingNumber=1, maxResults=self.page_size)
+
+    def run(self, query: SceneQuery) -> SyncResult:
+        """Search the scenes ingested since the last successful run and
+        return the new and changed ones. The watermark only moves once every
+        page has been read
+        """
+        key = sync_key(query)
+        started = self.clock()
+        watermark = self.store.watermark(key)
+        since = watermark - self.overlap if watermark is not None else None
+
+        if since is None:
+            search = dataclasses.replace(query, startingNumber=1, maxResults=self.page_size)
+        else:
+            search = self.delta_query(query, since, started)
+
+        new, changed, seen, scanned = [], [], {}, 0
+        first = self.api.fetch(search)
+
+        for page in first.pages(window=1):
+            if not page.results:
+                break
+            records = page.results.records()
+            scanned += len(records)
+            known = self.store.fingerprints(key, (record.get("entityId") for record in records))
+
+            for record in records:
+                entity_id = record.get("entityId")
+                if entity_id in seen:
+                    continue
+                digest = seen[entity_id] = fingerprint(record)
+                previous = known.get(entity_id)
+                if previous is None:
+                    new.append(entity_id)
+                elif previous != digest:
+                    changed.append(entity_id)
+
+        self.store.commit(key, query.datasetName, started, {entity_id: seen[entity_id] for entity_id in new + changed})
+        return SyncResult(key, new, changed, scanned, since, started)
@@ -0,0 +1,238 @@
+"""Request instrumentation.
+
+The Api reports every attempt to the hooks registered on Api.hooks:
+on_request before the request is sent, on_response once it is decoded,
+on_error when it fails and on_hydrate once Models are built.
+MetricsCollector is a built in hook aggregating those per endpoint.
+"""
+import bisect
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from logging import getLogger
+from typing import List
+
+log = getLogger("usgs_api")
+
+
+@dataclass
+class RequestEvent:
+    endpoint: str
+    url: str
+    request_bytes: int = 0
+    attempt: int = 1
+
+
+@dataclass
+class ResponseEvent:
+    endpoint: str
+    url: str
+    status: int = None
+    latency: float = 0.0
+    response_bytes: int = 0
+    decode_time: float = 0.0
+    attempt: int = 1
+
+
+@dataclass
+class ErrorEvent:
+    endpoint: str
+    url: str
+    error: Exception = None
+    latency: float = 0.0
+    attempt: int = 1
+
+
+@dataclass
+class HydrationEvent:
+    endpoint: str
+    seconds: float = 0.0
+    count: int = 0
+
+
+class Hook:
+    """Base hook, override any of the callbacks"""
+
+    def on_request(self, event: RequestEvent):
+        pass
+
+    def on_response(self, event: ResponseEvent):
+        pass
+
+    def on_error(self, event: ErrorEvent):
+        pass
+
+    def on_hydrate(self, event: HydrationEvent):
+        pass
+
+
+class Instrumentation:
+    """Fans events out to the registered hooks. A failing hook is logged
+    and never breaks the request
+    """
+
+    def __init__(self, hooks: List[Hook] = None):
+        self.hooks = list(hooks or [])
+
+    def add(self, hook: Hook) -> Hook:
+        self.hooks.append(hook)
+        return hook
+
+    def remove(self, hook: Hook):
+        self.hooks.remove(hook)
+
+    def __bool__(self):
+        return bool(self.hooks)
+
+    def emit(self, name: str, event):
+        for hook in self.hooks:
+            try:
+                getattr(hook, name)(event)
+            except Exception as e:
+                log.warning(f"Telemetry hook {hook!r} failed on {name}: {e}")
+
+
+# Prometheus style latency buckets, in seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+@dataclass
+class EndpointMetrics:
+    requests: int = 0
+    responses: int = 0
+    errors: int = 0
+    retries: int = 0
+    request_bytes: int = 0
+    response_bytes: int = 0
+    latency_sum: float = 0.0
+    decode_seconds: float = 0.0
+    hydrate_seconds: float = 0.0
+    hydrated: int = 0
+    buckets: list = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+    samples: deque = field(default_factory=lambda: deque(maxlen=10000))
+
+    def observe_latency(self, latency: float):
+        self.latency_sum += latency
+        self.samples.append(latency)
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+
+    def percentile(self, q: float) -> float:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+class MetricsCollector(Hook):
+    """In-process per endpoint metrics: request counts, retries, errors,
+    bytes in/out, latency histogram and percentiles, JSON decode time and
+    Model hydration time
+
+    Percentiles are computed over the most recent `window` latencies
+    """
+
+    def __init__(self, window: int = 10000):
+        self.window = window
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def _metrics(self, endpoint: str) -> EndpointMetrics:
+        metrics = self._endpoints.get(endpoint)
+        if metrics is None:
+            metrics = self._endpoints[endpoint] = EndpointMetrics(
+                samples=deque(maxlen=self.window)
+            )
+        return metrics
+
+    def on_request(self, event: RequestEvent):
+        with self._lock:
+            metrics = self._metrics(event.endpoint)
+            metrics.requests += 1
+            metrics.request_bytes += event.request_bytes
+            if event.attempt > 1:
+                metrics.retries += 1
+
+    def on_response(self, event: ResponseEvent):
+        with self._lock:
+            metrics = self._metrics(event.endpoint)
+            metrics.responses += 1
+            metrics.response_bytes += event.response_bytes
+            metrics.decode_seconds += event.decode_time
+            metrics.observe_latency(event.latency)
+
+    def on_error(self, event: ErrorEvent):
+        with self._lock:
+            metrics = self._metrics(event.endpoint)
+            metrics.errors += 1
+            metrics.observe_latency(event.latency)
+
+    def on_hydrate(self, event: HydrationEvent):
+        with self._lock:
+            metrics = self._metrics(event.endpoint)
+            metrics.hydrate_seconds += event.seconds
+            metrics.hydrated += event.count
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+    def to_dict(self) -> dict:
+        """Snapshot of every endpoint's metrics"""
+        with self._lock:
+            return {
+                endpoint: {
+                    "requests": m.requests,
+                    "responses": m.responses,
+                    "errors": m.errors,
+                    "retries": m.retries,
+                    "request_bytes": m.request_bytes,
+                    "response_bytes": m.response_bytes,
+                    "latency_sum": m.latency_sum,
+                    "latency_p50": m.percentile(0.50),
+                    "latency_p95": m.percentile(0.95),
+                    "latency_p99": m.percentile(0.99),
+                    "decode_seconds": m.decode_seconds,
+                    "hydrate_seconds": m.hydrate_seconds,
+                    "hydrated": m.hydrated,
+                }
+                for endpoint, m in self._endpoints.items()
+            }
+
+    def to_prometheus(self, prefix: str = "usgs_m2m") -> str:
+        """Prometheus text exposition format"""
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+
+        counters = (
+            ("requests_total", "requests", "Requests sent"),
+            ("errors_total", "errors", "Failed attempts"),
+            ("retries_total", "retries", "Repeated attempts"),
+            ("request_bytes_total", "request_bytes", "Request body bytes"),
+            ("response_bytes_total", "response_bytes", "Response body bytes"),
+            ("decode_seconds_total", "decode_seconds", "JSON decode time"),
+            ("hydrate_seconds_total", "hydrate_seconds", "Model hydration time"),
+        )
+
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+
+            for name, attribute, help_text in counters:
+                family(name, "counter", help_text)
+                for endpoint, m in endpoints:
+                    lines.append(f'{prefix}_{name}{{endpoint="{endpoint}"}} {getattr(m, attribute)}')
+
+            family("request_latency_seconds", "histogram", "Request latency")
+            for endpoint, m in endpoints:
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), m.buckets):
+                    cumulative += count
+                    lines.append(
+                        f'{prefix}_request_latency_seconds_bucket{{endpoint="{endpoint}",le="{bound}"}} {cumulative}'
+                    )
+                lines.append(f'{prefix}_request_latency_seconds_sum{{endpoint="{endpoint}"}} {m.latency_sum}')
+                lines.append(f'{prefix}_request_latency_seconds_count{{endpoint="{endpoint}"}} {cumulative}')
+
+        return "\n".join(lines) + "\n"
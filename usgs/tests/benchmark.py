@@ -0,0 +1,227 @@
+"""End-to-end throughput benchmarks against the local FakeM2MServer.
+
+    python -m usgs.tests.benchmark --scenes 20000 --page-size 1000 --latency 0.02
+
+Reports scenes/sec and MB/sec (bytes on the wire) for paged, prefetched
+and streamed search, Model hydration and a DownloadManager run, so
+regressions can be caught offline. Client side throttling is disabled unless --throttle is given,
+the numbers measure the client rather than the server's rate limits.
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+
+from ..api import Api
+from ..manager import DownloadManager
+from ..retry import RetryPolicy
+from ..scene import SceneModel, SceneQuery
+from .server import FakeM2MServer
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    items: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+    requests: int = 0
+
+    @property
+    def items_per_sec(self) -> float:
+        return self.items / self.seconds if self.seconds else 0.0
+
+    @property
+    def mb_per_sec(self) -> float:
+        return self.bytes / (1024 * 1024) / self.seconds if self.seconds else 0.0
+
+    def to_dict(self) -> dict:
+        result = asdict(self)
+        result.update(items_per_sec=self.items_per_sec, mb_per_sec=self.mb_per_sec)
+        return result
+
+    def __str__(self):
+        return (
+            f"{self.name:<16} {self.items:>8} items {self.seconds:>8.3f}s "
+            f"{self.items_per_sec:>10.1f}/s {self.mb_per_sec:>8.2f} MB/s {self.requests:>6} requests"
+        )
+
+
+@contextlib.contextmanager
+def using_server(server: FakeM2MServer, throttle: bool = False):
+    """Point Api at the server, restoring its configuration afterwards"""
+    saved = {
+        name: getattr(Api, name)
+        for name in ("BASE_URL", "API_KEY", "scheduler", "retry", "cache")
+    }
+
+    Api.BASE_URL = server.base_url
+    Api.API_KEY = None
+    Api.retry = RetryPolicy(base_delay=0.01, max_delay=0.1)
+    Api.cache = None
+    if not throttle:
+        Api.scheduler = None
+
+    try:
+        Api.login("benchmark", "benchmark")
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(Api, name, value)
+
+
+def bench_search(server: FakeM2MServer, dataset: str, page_size: int = 1000, throttle: bool = False) -> BenchmarkResult:
+    """Page through every scene with SceneResultSet.next"""
+    result = BenchmarkResult("search")
+    before, sent = server.requests["scene-search"], server.bytes_sent
+
+    with using_server(server, throttle):
+        started = time.perf_counter()
+        page = Api.fetch(SceneQuery(datasetName=dataset, maxResults=page_size))
+        result.items += len(page.results or [])
+        while page.has_more:
+            page = page.next()
+            result.items += len(page.results or [])
+        result.seconds = time.perf_counter() - started
+
+    result.bytes = server.bytes_sent - sent
+    result.requests = server.requests["scene-search"] - before
+    return result
+
+
+def bench_prefetch(
+    server: FakeM2MServer, dataset: str, page_size: int = 1000, throttle: bool = False, window: int = 4
+) -> BenchmarkResult:
+    """Page through every scene with SceneResultSet.pages"""
+    result = BenchmarkResult("prefetch")
+    before, sent = server.requests["scene-search"], server.bytes_sent
+
+    with using_server(server, throttle):
+        started = time.perf_counter()
+        first = Api.fetch(SceneQuery(datasetName=dataset, maxResults=page_size))
+        for page in first.pages(window=window):
+            result.items += len(page.results or [])
+        result.seconds = time.perf_counter() - started
+
+    result.bytes = server.bytes_sent - sent
+    result.requests = server.requests["scene-search"] - before
+    return result
+
+
+def bench_stream(server: FakeM2MServer, dataset: str, page_size: int = 1000, throttle: bool = False) -> BenchmarkResult:
+    """Stream decode every page with Api.stream"""
+    result = BenchmarkResult("stream")
+    before, sent = server.requests["scene-search"], server.bytes_sent
+
+    with using_server(server, throttle):
+        started = time.perf_counter()
+        starting, total = 1, None
+        while total is None or starting <= total:
+            stream = Api.stream(
+                SceneQuery(datasetName=dataset, maxResults=page_size, startingNumber=starting)
+            )
+            result.items += sum(1 for _ in stream)
+            total = stream.meta.get("totalHits") or 0
+            starting += page_size
+        result.seconds = time.perf_counter() - started
+
+    result.bytes = server.bytes_sent - sent
+    result.requests = server.requests["scene-search"] - before
+    return result
+
+
+def bench_download(
+    server: FakeM2MServer, dataset: str, scenes: int = 20, path: str = None, throttle: bool = False,
+    workers: int = 4,
+) -> BenchmarkResult:
+    """Request, wait for and save `scenes` files with DownloadManager,
+    `workers` at a time
+    """
+    result = BenchmarkResult("download")
+    before, saved = sum(server.requests.values()), server.requests["download"]
+    sent = server.bytes_sent
+
+    with using_server(server, throttle), tempfile.TemporaryDirectory() as tmp:
+        cwd = os.getcwd()
+        os.chdir(path or tmp)
+        try:
+            started = time.perf_counter()
+            manager = DownloadManager(Api(), dataset, workers=workers, per_host=workers)
+            manager.add_scenes([server.catalog.entity_id(index) for index in range(scenes)])
+            # Silence the per file messages and progress bars
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull), \
+                    contextlib.redirect_stderr(devnull):
+                manager.start(cool_down=max(server.staging_delay / 4, 0.01))
+            result.seconds = time.perf_counter() - started
+        finally:
+            os.chdir(cwd)
+
+    result.items = server.requests["download"] - saved
+    result.bytes = server.bytes_sent - sent
+    result.requests = sum(server.requests.values()) - before
+    return result
+
+
+def bench_hydrate(server: FakeM2MServer, count: int = 100000) -> BenchmarkResult:
+    """Build `count` SceneModels from decoded records with Api.hydrator"""
+    records = [server.catalog.scene(index % server.catalog.total_scenes) for index in range(count)]
+    query = SceneQuery(datasetName=server.catalog.dataset["datasetAlias"])
+
+    started = time.perf_counter()
+    Api.hydrator.build_many(SceneModel, records, Api, query)
+    return BenchmarkResult("hydrate", items=count, seconds=time.perf_counter() - started)
+
+
+def main(argv=None) -> list:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenes", type=int, default=10000, help="scenes in the fake catalog")
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--window", type=int, default=4, help="pages prefetched concurrently")
+    parser.add_argument("--hydrate", type=int, default=100000, help="SceneModels built by the hydration benchmark")
+    parser.add_argument("--downloads", type=int, default=20, help="scenes to download")
+    parser.add_argument("--file-size", type=int, default=1024 * 1024)
+    parser.add_argument("--download-workers", type=int, default=4, help="files downloaded concurrently")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added per API request")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--bandwidth", type=float, default=None, help="download bytes/sec")
+    parser.add_argument("--staging-delay", type=float, default=0.0)
+    parser.add_argument("--throttle", action="store_true", help="keep Api.scheduler pacing enabled")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    with FakeM2MServer(
+        total_scenes=args.scenes,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        bandwidth=args.bandwidth,
+        staging_delay=args.staging_delay,
+        file_size=args.file_size,
+    ) as server:
+        dataset = server.catalog.dataset["datasetAlias"]
+        results = [
+            bench_search(server, dataset, args.page_size, args.throttle),
+            bench_prefetch(server, dataset, args.page_size, args.throttle, args.window),
+            bench_stream(server, dataset, args.page_size, args.throttle),
+        ]
+        if args.hydrate:
+            results.append(bench_hydrate(server, args.hydrate))
+        if args.downloads:
+            results.append(bench_download(
+                server, dataset, args.downloads, throttle=args.throttle, workers=args.download_workers
+            ))
+
+    if args.json:
+        print(json.dumps([result.to_dict() for result in results], indent=2))
+    else:
+        for result in results:
+            print(result)
+
+    return results
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
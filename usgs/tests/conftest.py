@@ -3,6 +3,9 @@ import pytest
 from unittest.mock import Mock
 
 from ..api import Api
+from ..registry import DatasetRegistry
+from ..retry import RetryPolicy
+from .server import FakeM2MServer
 from .stubs import responses
 
 
@@ -26,6 +29,8 @@ def mocked_request(uri, *args, **kwargs):
     MOCK_REQUEST.text = json.dumps(response_text) if isinstance(
         response_text, dict) else response_text
 
+    MOCK_REQUEST.content = MOCK_REQUEST.text.encode('utf-8')
+
     MOCK_REQUEST.end_point = end_point
     MOCK_REQUEST.url = uri
     MOCK_REQUEST.args = json.loads(args[0])
@@ -49,3 +54,44 @@ def mock_request(post_request):
 def mock_api(mock_request):
     yield Api
     Api.API_KEY = None
+
+
+@pytest.fixture(autouse=True)
+def dataset_registry(monkeypatch):
+    # Every test starts without known datasets
+    registry = DatasetRegistry()
+    monkeypatch.setattr(Api, "registry", registry)
+    return registry
+
+
+@pytest.fixture
+def m2m_server(monkeypatch):
+    servers = []
+
+    def start(**config):
+        server = FakeM2MServer(**config).start()
+        servers.append(server)
+        monkeypatch.setattr(Api, "BASE_URL", server.base_url)
+        monkeypatch.setattr(Api, "API_KEY", None)
+        monkeypatch.setattr(Api, "scheduler", None)
+        monkeypatch.setattr(Api, "retry", RetryPolicy(base_delay=0, max_delay=0, max_attempts=6))
+        Api.login("test", "pass")
+        return server
+
+    yield start
+
+    for server in servers:
+        server.stop()
+
+
+@pytest.fixture(params=["numpy", "python"])
+def column_filters(request, monkeypatch):
+    # Runs a test on the vectorized and on the pure Python filters
+    from .. import columns
+
+    if request.param == "numpy":
+        if columns.numpy is None:
+            pytest.skip("numpy is not installed")
+    else:
+        monkeypatch.setattr(columns, "numpy", None)
+    return request.param
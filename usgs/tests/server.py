@@ -0,0 +1,528 @@
+"""A local stand-in for the M2M API, used by the integration tests and
+the benchmarks in usgs.tests.benchmark.
+
+It serves a synthetic, deterministic catalog of scenes laid out on a
+lon/lat grid with one acquisition per day, and implements:
+
+- login, dataset, dataset-search
+- scene-search with real pagination, spatial (mbr), acquisition,
+  ingest and cloud cover filtering and sorting on acquisitionDate,
+  publishDate or cloudCover
+- scene-metadata, scene-list-add, scene-list-remove, scene-metadata-list
+- download-options, download-request, download-retrieve with simulated
+  staging delays
+- GET /download/<entityId> file downloads
+
+Latency, error rate and bandwidth are configurable.
+
+    with FakeM2MServer(total_scenes=5000, latency=0.01) as server:
+        Api.BASE_URL = server.base_url
+"""
+import datetime
+import gzip
+import json
+import math
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+API_PATH = "/api/api/json/stable"
+
+DATASET = {
+    "datasetId": "5e83d0b84df8d8c2",
+    "datasetAlias": "fake_dataset",
+    "abstractText": "Synthetic scenes served by the local M2M stand-in",
+    "acquisitionStart": "2020-01-01 00:00:00",
+    "acquisitionEnd": None,
+    "catalogs": ["EE"],
+    "collectionName": "Fake Collection",
+    "collectionLongName": "Fake Collection for benchmarks",
+    "datasetCategoryName": "Fake",
+    "dataOwner": "USGS",
+    "dateUpdated": "2021-06-01 00:00:00-05",
+    "doiNumber": None,
+    "ingestFrequency": None,
+    "keywords": "fake",
+    "legacyId": None,
+    "sceneCount": None,
+    "spatialBounds": None,
+    "temporalCoverage": '["2020-01-01 00:00:00","2030-01-01 00:00:00"]',
+    "supportCloudCover": True,
+    "supportDeletionSearch": False,
+}
+
+
+def _parse_date(value) -> datetime.datetime:
+    if value is None:
+        return None
+    return datetime.datetime.fromisoformat(str(value)[:19].replace(" ", "T"))
+
+
+class FakeCatalog:
+    """Deterministic scene catalog: scene i sits on cell i of a grid over
+    `extent` and was acquired `i` days after `start` (cycling through the grid)
+    """
+
+    def __init__(
+        self,
+        total_scenes: int = 1000,
+        extent: tuple = (-100.0, 30.0, -90.0, 40.0),
+        cell: float = 1.0,
+        start: datetime.date = datetime.date(2020, 1, 1),
+        ingest_lag: int = 2,
+        dataset: dict = None,
+    ):
+        self.total_scenes = total_scenes
+        self.extent = extent
+        self.cell = cell
+        self.start = datetime.datetime.combine(start, datetime.time())
+        self.ingest_lag = datetime.timedelta(days=ingest_lag)
+        self.dataset = dataset or DATASET
+        self.columns = max(1, int(round((extent[2] - extent[0]) / cell)))
+        self.rows = max(1, int(round((extent[3] - extent[1]) / cell)))
+
+    def bounds(self, index: int) -> tuple:
+        cell = index % (self.columns * self.rows)
+        west = self.extent[0] + (cell % self.columns) * self.cell
+        south = self.extent[1] + (cell // self.columns) * self.cell
+        return west, south, west + self.cell, south + self.cell
+
+    def acquired(self, index: int) -> datetime.datetime:
+        return self.start + datetime.timedelta(days=index)
+
+    def published(self, index: int) -> datetime.datetime:
+        return self.acquired(index) + self.ingest_lag
+
+    def cloud_cover(self, index: int) -> int:
+        return (index * 37) % 100
+
+    def entity_id(self, index: int) -> str:
+        return f"FAKE{index:08d}"
+
+    def index_of(self, entity_id: str) -> int:
+        return int(entity_id[4:])
+
+    def scene(self, index: int, metadata_type: str = "full") -> dict:
+        west, south, east, north = self.bounds(index)
+        inset = self.cell * 0.1
+        acquired = self.acquired(index)
+        entity_id = self.entity_id(index)
+        downloadable = index % 10 != 9
+
+        scene = {
+            "browse": [],
+            "cloudCover": self.cloud_cover(index),
+            "entityId": entity_id,
+            "displayId": f"FAKE_{acquired:%Y%m%d}_{index:08d}",
+            "orderingId": None,
+            "metadata": [],
+            "options": {"bulk": downloadable, "download": downloadable, "order": True, "secondary": False},
+            "selected": {"bulk": False, "compare": False, "order": False},
+            "publishDate": self.published(index).strftime("%Y-%m-%d %H:%M:%S"),
+            "spatialBounds": {
+                "type": "Polygon",
+                "coordinates": [[[west, south], [west, north], [east, north], [east, south], [west, south]]],
+            },
+            # A skewed quadrilateral inside the bounds, like a real footprint
+            "spatialCoverage": {
+                "type": "Polygon",
+                "coordinates": [[
+                    [west + inset, south], [west, north - inset], [east - inset, north],
+                    [east, south + inset], [west + inset, south],
+                ]],
+            },
+            "temporalCoverage": {
+                "endDate": acquired.strftime("%Y-%m-%d %H:%M:%S"),
+                "startDate": acquired.strftime("%Y-%m-%d %H:%M:%S"),
+            },
+            "hasCustomizedMetadata": False,
+        }
+
+        if metadata_type == "full":
+            scene["metadata"] = [
+                {"id": "5e83d0b8e7f6734c", "fieldName": "Entity ID", "dictionaryLink": None, "value": entity_id},
+                {"id": "5e83d0b8b1f2a0f0", "fieldName": "Acquisition Date", "dictionaryLink": None,
+                 "value": acquired.strftime("%Y/%m/%d")},
+                {"id": "5e83d0b85cc8e3f4", "fieldName": "Cloud Cover", "dictionaryLink": None,
+                 "value": str(self.cloud_cover(index))},
+                {"id": "5e83d0b8f2d1c5e2", "fieldName": "Sensor", "dictionaryLink": None, "value": "FAKE"},
+            ]
+
+        return scene
+
+    def matches(self, index: int, scene_filter: dict) -> bool:
+        if not scene_filter:
+            return True
+
+        spatial = scene_filter.get("spatialFilter") or {}
+        if spatial.get("filterType") == "mbr":
+            lower, upper = spatial["lowerLeft"], spatial["upperRight"]
+            west, south, east, north = self.bounds(index)
+            if (
+                east < min(lower["longitude"], upper["longitude"])
+                or west > max(lower["longitude"], upper["longitude"])
+                or north < min(lower["latitude"], upper["latitude"])
+                or south > max(lower["latitude"], upper["latitude"])
+            ):
+                return False
+
+        for key, moment in (("acquisitionFilter", self.acquired), ("ingestFilter", self.published)):
+            window = scene_filter.get(key)
+            if window:
+                start, end = _parse_date(window.get("start")), _parse_date(window.get("end"))
+                value = moment(index)
+                if (start and value < start) or (end and value > end):
+                    return False
+
+        cloud = scene_filter.get("cloudCoverFilter")
+        if cloud:
+            if not cloud.get("min", 0) <= self.cloud_cover(index) <= cloud.get("max", 100):
+                return False
+
+        return True
+
+    def search(self, scene_filter: dict = None, sort_field: str = None, sort_direction: str = None) -> list:
+        matches = [index for index in range(self.total_scenes) if self.matches(index, scene_filter)]
+        if sort_field is not None:
+            keys = {"acquisitionDate": self.acquired, "publishDate": self.published, "cloudCover": self.cloud_cover}
+            if sort_field not in keys:
+                raise ValueError(f"Unknown sortField {sort_field}")
+            # Stable, ties keep the catalog order in either direction
+            matches.sort(key=keys[sort_field], reverse=(sort_direction or "ASC").upper() == "DESC")
+        return matches
+
+
+class FakeM2MServer:
+    """Threaded HTTP server speaking the M2M JSON envelope
+
+    Parameters
+    ----------
+    total_scenes : int, optional
+        Scenes in the synthetic catalog, by default 1000
+    latency : float, optional
+        Seconds added to every API response, by default 0
+    error_rate : float, optional
+        Fraction of API requests answered with a 503, by default 0
+    rate_limit_rate : float, optional
+        Fraction of API requests answered with a RATE_LIMIT error, by default 0
+    bandwidth : float, optional
+        Bytes per second for file downloads, by default unlimited
+    staging_delay : float, optional
+        Seconds before a requested download becomes available, by default 0
+    file_size : int, optional
+        Bytes served per downloaded file, by default 1MB
+    seed : int, optional
+        Seed for the error injection, by default 0
+    datasets : dict, optional
+        Further FakeCatalogs searchable by datasetName, by default none
+    """
+
+    def __init__(
+        self,
+        total_scenes: int = 1000,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        bandwidth: float = None,
+        staging_delay: float = 0.0,
+        file_size: int = 1024 * 1024,
+        seed: int = 0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        datasets: dict = None,
+        **catalog,
+    ):
+        self.catalog = FakeCatalog(total_scenes=total_scenes, **catalog)
+        self.datasets = datasets or {}
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.bandwidth = bandwidth
+        self.staging_delay = staging_delay
+        self.file_size = file_size
+        self.requests = Counter()
+        self.bytes_sent = 0
+        self.requested = {}
+        self.labels = {}
+        self.scene_lists = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._payload = bytes(range(256)) * 256
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def base_url(self) -> str:
+        return f"{self.url}{API_PATH}"
+
+    def start(self) -> "FakeM2MServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # Endpoints
+
+    def login(self, payload):
+        return "fake-api-key"
+
+    def dataset(self, payload):
+        name = payload.get("datasetName") or payload.get("datasetId")
+        if name not in (self.catalog.dataset["datasetAlias"], self.catalog.dataset["datasetId"]):
+            raise LookupError(name)
+        return self.catalog.dataset
+
+    def dataset_search(self, payload):
+        return [self.catalog.dataset]
+
+    def scene_search(self, payload):
+        catalog = self.datasets.get(payload.get("datasetName"), self.catalog)
+        matches = catalog.search(payload.get("sceneFilter"), payload.get("sortField"), payload.get("sortDirection"))
+        starting = int(payload.get("startingNumber") or 1)
+        maximum = int(payload.get("maxResults") or 100)
+        page = matches[starting - 1:starting - 1 + maximum]
+        metadata_type = payload.get("metadataType") or "full"
+        next_record = starting + len(page)
+
+        return {
+            "results": [catalog.scene(index, metadata_type) for index in page],
+            "recordsReturned": len(page),
+            "totalHits": len(matches),
+            "totalHitsAccuracy": "exact",
+            "isCustomized": False,
+            "numExcluded": 0,
+            "startingNumber": starting,
+            "nextRecord": next_record if next_record <= len(matches) else len(matches),
+        }
+
+    def scene_metadata(self, payload):
+        return self.catalog.scene(self._index(payload.get("entityId")), payload.get("metadataType") or "full")
+
+    def scene_list_add(self, payload):
+        entity_ids = payload.get("entityIds") or [payload.get("entityId")]
+        indexes = [self._index(entity_id) for entity_id in entity_ids]
+        with self._lock:
+            members = self.scene_lists.setdefault(payload["listId"], {})
+            for entity_id, index in zip(entity_ids, indexes):
+                members[entity_id] = index
+        return len(entity_ids)
+
+    def scene_list_remove(self, payload):
+        with self._lock:
+            if payload.get("entityIds"):
+                members = self.scene_lists.get(payload["listId"], {})
+                for entity_id in payload["entityIds"]:
+                    members.pop(entity_id, None)
+            else:
+                self.scene_lists.pop(payload["listId"], None)
+        return None
+
+    def scene_metadata_list(self, payload):
+        with self._lock:
+            indexes = list(self.scene_lists.get(payload["listId"], {}).values())
+        metadata_type = payload.get("metadataType") or "full"
+        return [self.catalog.scene(index, metadata_type) for index in indexes]
+
+    def _index(self, entity_id: str) -> int:
+        try:
+            index = self.catalog.index_of(entity_id)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid entityId {entity_id}")
+        if not 0 <= index < self.catalog.total_scenes:
+            raise ValueError(f"Unknown entityId {entity_id}")
+        return index
+
+    def download_options(self, payload):
+        options = []
+        for entity_id in payload.get("entityIds") or []:
+            index = self.catalog.index_of(entity_id)
+            scene = self.catalog.scene(index, "summary")
+            options.append(
+                {
+                    "id": f"product-{index}",
+                    "displayId": scene["displayId"],
+                    "entityId": entity_id,
+                    "datasetId": self.catalog.dataset["datasetId"],
+                    "available": scene["options"]["download"],
+                    "filesize": self.file_size,
+                    "productName": "Fake Product",
+                    "productCode": "FAKE",
+                    "bulkAvailable": scene["options"]["bulk"],
+                    "downloadSystem": "dds",
+                    "secondaryDownloads": [],
+                }
+            )
+        return options
+
+    def download_request(self, payload):
+        label = payload.get("label")
+        now = time.monotonic()
+        available, preparing, failed = [], [], []
+
+        with self._lock:
+            for download in payload.get("downloads") or []:
+                entity_id = download.get("entityId")
+                index = self.catalog.index_of(entity_id)
+                if index % 10 == 9:
+                    failed.append(
+                        {"productId": download.get("productId"), "entityId": entity_id,
+                         "errorMessage": "Product is not available for download"}
+                    )
+                    continue
+                self.requested.setdefault(entity_id, now)
+                self.labels.setdefault(label, []).append(entity_id)
+                record = {"downloadId": index, "eulaCode": None, "url": self._file_url(entity_id)}
+                (available if self.staging_delay <= 0 else preparing).append(record)
+
+        return {
+            "availableDownloads": available,
+            "duplicateProducts": [],
+            "preparingDownloads": preparing,
+            "failed": failed,
+            "newRecords": {str(record["downloadId"]): label for record in available + preparing},
+            "numInvalidScenes": len(failed),
+        }
+
+    def download_retrieve(self, payload):
+        label = payload.get("label")
+        now = time.monotonic()
+        available, requested = [], []
+
+        with self._lock:
+            entity_ids = list(self.labels.get(label, []))
+
+        for entity_id in entity_ids:
+            index = self.catalog.index_of(entity_id)
+            ready = now - self.requested[entity_id] >= self.staging_delay
+            (available if ready else requested).append(
+                {
+                    "downloadId": index,
+                    "collectionName": self.catalog.dataset["collectionName"],
+                    "datasetId": self.catalog.dataset["datasetId"],
+                    "displayId": self.catalog.scene(index, "summary")["displayId"],
+                    "entityId": entity_id,
+                    "eulaCode": None,
+                    "filesize": self.file_size,
+                    "label": label,
+                    "productCode": "FAKE",
+                    "productName": "Fake Product",
+                    "statusCode": "A" if ready else "P",
+                    "statusText": "Available" if ready else "Preparing",
+                    "url": self._file_url(entity_id) if ready else None,
+                }
+            )
+
+        return {"available": available, "requested": requested, "eulas": [], "queueSize": len(requested)}
+
+    def _file_url(self, entity_id: str) -> str:
+        return f"{self.url}/download/{entity_id}"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately, don't wait on delayed ACKs
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                endpoint = urlparse(self.path).path.rsplit("/", 1)[-1]
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+
+                with server._lock:
+                    server.requests[endpoint] += 1
+                    roll = server._random.random()
+
+                if server.latency:
+                    time.sleep(server.latency)
+
+                if roll < server.error_rate:
+                    return self._envelope(None, "SERVER_ERROR", "Simulated failure", status=503)
+                if roll < server.error_rate + server.rate_limit_rate:
+                    return self._envelope(None, "RATE_LIMIT", "Simulated rate limit", status=429)
+
+                handler = getattr(server, endpoint.replace("-", "_"), None)
+                if handler is None:
+                    return self._envelope(None, "NOT_FOUND", f"Unknown endpoint {endpoint}", status=404)
+
+                try:
+                    payload = json.loads(body) if body else {}
+                    data = handler(payload)
+                except LookupError as e:
+                    return self._envelope(None, "DATASET_NOT_FOUND", f"Not found: {e}")
+                except (ValueError, KeyError, TypeError) as e:
+                    return self._envelope(None, "INPUT_INVALID", str(e), status=400)
+
+                self._envelope(data)
+
+            def do_GET(self):
+                path = urlparse(self.path).path
+                if not path.startswith("/download/"):
+                    self.send_error(404)
+                    return
+
+                with server._lock:
+                    server.requests["download"] += 1
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/zip")
+                self.send_header("Content-Length", str(server.file_size))
+                self.end_headers()
+
+                remaining = server.file_size
+                chunk = len(server._payload)
+                while remaining > 0:
+                    size = min(chunk, remaining)
+                    self.wfile.write(server._payload[:size])
+                    remaining -= size
+                    with server._lock:
+                        server.bytes_sent += size
+                    if server.bandwidth:
+                        time.sleep(size / server.bandwidth)
+
+            def _envelope(self, data, error_code=None, error_message=None, status=200):
+                body = json.dumps(
+                    {
+                        "requestId": sum(server.requests.values()),
+                        "version": "stable",
+                        "data": data,
+                        "errorCode": error_code,
+                        "errorMessage": error_message,
+                    }
+                ).encode("utf-8")
+
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                if "gzip" in (self.headers.get("Accept-Encoding") or "") and len(body) > 1024:
+                    body = gzip.compress(body, compresslevel=1)
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+                with server._lock:
+                    server.bytes_sent += len(body)
+
+        return Handler
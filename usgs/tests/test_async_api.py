@@ -0,0 +1,71 @@
+import asyncio
+import json
+from unittest.mock import Mock
+
+from ..aio import AsyncApi
+from ..dataset import DatasetModel, DatasetsQuery
+from ..scene import SceneQuery, SceneResultSet
+from ..transport import AsyncTransport
+
+
+def run(coroutine):
+    return asyncio.new_event_loop().run_until_complete(coroutine)
+
+
+def test_async_login_shares_api_key(mock_request, mock_api):
+    client = AsyncApi(api=mock_api)
+
+    run(client.login("test", "pass"))
+
+    assert mock_api.API_KEY == mock_request.data.get("data")
+
+
+def test_async_dataset_hydrates_model(mock_request, mock_api):
+    client = AsyncApi(api=mock_api)
+
+    dataset = run(client.dataset(datasetName="corona2"))
+
+    assert isinstance(dataset, DatasetModel)
+    assert dataset.api is client
+    assert mock_request.end_point == "dataset"
+
+
+def test_async_scene_query_reuses_query_objects(mock_request, mock_api):
+    client = AsyncApi(api=mock_api)
+    query = SceneQuery(datasetName="corona2")
+
+    result_set = run(client.fetch(query))
+
+    assert isinstance(result_set, SceneResultSet)
+    assert result_set._query is query
+    assert mock_request.args.get("datasetName") == "corona2"
+
+
+class SlowTransport(AsyncTransport):
+    """Answers after a delay and records the most requests in flight"""
+
+    def __init__(self, delay=0.02):
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+
+    async def post(self, url, data=None, headers=None, **kwargs):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        return Mock(status_code=200, content=json.dumps({"data": [], "errorCode": None}).encode("utf-8"))
+
+
+def test_async_gather_is_bounded(mock_api):
+    transport = SlowTransport()
+    client = AsyncApi(max_concurrency=2, api=mock_api, transport=transport)
+
+    # Distinct queries, identical ones would be coalesced into one request
+    queries = [DatasetsQuery(datasetName=f"dataset_{index}") for index in range(6)]
+    results = run(client.gather(*queries))
+
+    assert len(results) == 6
+    assert transport.peak == 2
@@ -0,0 +1,86 @@
+import time
+
+import pytest
+
+from ..cache import MISS, MemoryCache, ResponseCache, SqliteCache
+from ..dataset import DatasetModel, DatasetQuery
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryCache()
+    return SqliteCache(str(tmp_path / "cache.sqlite"))
+
+
+def test_key_is_order_stable(backend):
+    cache = ResponseCache(backend)
+
+    cache.set("dataset", {"datasetName": "corona2", "datasetId": None}, {"datasetId": "1"})
+
+    assert cache.get("dataset", {"datasetId": None, "datasetName": "corona2"}) == {"datasetId": "1"}
+    assert cache.get("dataset", {"datasetName": "other"}) is MISS
+
+
+def test_download_endpoints_are_never_cached(backend):
+    cache = ResponseCache(backend, ttls={"download-retrieve": 60})
+
+    cache.set("download-retrieve", {"label": "a"}, {"available": []})
+    cache.set("download-request", {"label": "a"}, {"failed": []})
+
+    assert cache.get("download-retrieve", {"label": "a"}) is MISS
+    assert cache.get("download-request", {"label": "a"}) is MISS
+
+
+def test_ttl_per_endpoint(backend):
+    cache = ResponseCache(backend, ttl=60, ttls={"scene-search": 0.01})
+
+    cache.set("scene-search", {"datasetName": "a"}, [1])
+    cache.set("dataset", {"datasetName": "a"}, [2])
+    time.sleep(0.02)
+
+    assert cache.get("scene-search", {"datasetName": "a"}) is MISS
+    assert cache.get("dataset", {"datasetName": "a"}) == [2]
+
+
+def test_invalidation(backend):
+    cache = ResponseCache(backend)
+    cache.set("dataset", {"datasetName": "a"}, [1])
+    cache.set("dataset", {"datasetName": "b"}, [2])
+    cache.set("dataset-search", {}, [3])
+
+    cache.invalidate("dataset", {"datasetName": "a"})
+    assert cache.get("dataset", {"datasetName": "a"}) is MISS
+    assert cache.get("dataset", {"datasetName": "b"}) == [2]
+
+    cache.invalidate("dataset")
+    assert cache.get("dataset", {"datasetName": "b"}) is MISS
+    assert cache.get("dataset-search", {}) == [3]
+
+    cache.invalidate()
+    assert cache.get("dataset-search", {}) is MISS
+
+
+def test_size_bounded_eviction(tmp_path):
+    memory = MemoryCache(max_entries=2)
+    disk = SqliteCache(str(tmp_path / "cache.sqlite"), max_entries=2)
+
+    for backend in (memory, disk):
+        for name in "abc":
+            backend.set(name, "dataset", "[]")
+        assert len(backend) == 2
+        assert backend.get("a") is None
+
+
+def test_fetch_serves_repeated_queries_from_cache(mock_request, mock_api, monkeypatch):
+    monkeypatch.setattr(mock_api, "cache", ResponseCache())
+
+    first = mock_api.fetchone(DatasetQuery(datasetName="corona2"))
+    mock_request.reset_mock()
+    mock_request.end_point = None
+    second = mock_api.fetchone(DatasetQuery(datasetName="corona2"))
+
+    assert isinstance(second, DatasetModel)
+    assert second is not first
+    assert second.datasetId == first.datasetId
+    assert mock_request.end_point is None
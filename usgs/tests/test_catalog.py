@@ -0,0 +1,116 @@
+import datetime
+
+from ..api import Api
+from ..catalog import SceneCatalog
+from ..filters import AcquisitionFilter, CloudCoverFilter, Point, SceneFilter, SpatialMbr
+from ..scene import SceneQuery
+from .server import FakeCatalog
+
+CATALOG = FakeCatalog(total_scenes=100)
+
+
+def mbr(west, south, east, north):
+    return SpatialMbr(lowerLeft=Point(latitude=south, longitude=west), upperRight=Point(latitude=north, longitude=east))
+
+
+def query(**filters):
+    return SceneQuery(datasetName="fake_dataset", maxResults=10, sceneFilter=SceneFilter(**filters))
+
+
+def test_search_uses_footprints_dates_and_cloud_cover():
+    catalog = SceneCatalog()
+    assert catalog.ingest("fake_dataset", (CATALOG.scene(index, "summary") for index in range(100))) == 100
+    # Re-ingesting updates in place
+    catalog.ingest("fake_dataset", [CATALOG.scene(0, "summary")])
+    assert len(catalog) == 100
+
+    # Cells 0..9 are the bottom row of the grid, scene i is acquired on day i
+    row = catalog.search("fake_dataset", bbox=(-99.5, 30.2, -95.5, 30.8))
+    assert row.entityId == [CATALOG.entity_id(index) for index in range(5)]
+
+    window = catalog.search("fake_dataset", start="2020-01-11", end=datetime.date(2020, 1, 13))
+    assert window.entityId == [CATALOG.entity_id(index) for index in (10, 11, 12)]
+
+    clear = catalog.search("fake_dataset", cloud_max=10)
+    assert all(CATALOG.cloud_cover(CATALOG.index_of(entity_id)) <= 10 for entity_id in clear.entityId)
+    assert len(clear) == sum(CATALOG.cloud_cover(index) <= 10 for index in range(100))
+
+    assert len(catalog.search("fake_dataset", downloadable=True)) == 90
+    assert catalog.search("fake_dataset", limit=3, offset=2).entityId == [CATALOG.entity_id(i) for i in (2, 3, 4)]
+    assert not catalog.search("other_dataset")
+
+
+def test_covered_queries_are_answered_locally(m2m_server, monkeypatch, tmp_path):
+    server = m2m_server(total_scenes=300)
+    catalog = SceneCatalog(str(tmp_path / "catalog.sqlite"))
+    monkeypatch.setattr(Api, "catalog", catalog)
+
+    area = query(spatialFilter=mbr(-100, 30, -90, 35), acquisitionFilter=AcquisitionFilter(start="2020-01-01", end="2020-06-30"))
+    assert catalog.load(Api, area) == len(server.catalog.search(area.to_dict()["sceneFilter"]))
+    searches = server.requests["scene-search"]
+
+    inner = query(
+        spatialFilter=mbr(-98, 31, -94, 33),
+        acquisitionFilter=AcquisitionFilter(start="2020-02-01", end="2020-05-31"),
+        cloudCoverFilter=CloudCoverFilter(min=0, max=50),
+    )
+    expected = [server.catalog.entity_id(index) for index in server.catalog.search(inner.to_dict()["sceneFilter"])]
+
+    first = Api.fetch(inner)
+    assert first.totalHits == len(expected)
+    assert [scene.entityId for page in first.pages() for scene in page.results] == expected
+    assert server.requests["scene-search"] == searches
+
+    # Outside the loaded window goes to the network, and is kept
+    later = query(spatialFilter=mbr(-98, 31, -94, 33), acquisitionFilter=AcquisitionFilter(start="2020-06-01", end="2020-09-30"))
+    Api.fetch(later)
+    assert server.requests["scene-search"] == searches + 1
+    assert len(catalog) > len(expected)
+
+
+def test_stale_coverage_is_not_used(m2m_server, monkeypatch):
+    server = m2m_server(total_scenes=20)
+    catalog = SceneCatalog(max_age=3600)
+    monkeypatch.setattr(Api, "catalog", catalog)
+
+    catalog.load(Api, query())
+    assert catalog.covers("fake_dataset")
+    searches = server.requests["scene-search"]
+
+    Api.fetch(query())
+    assert server.requests["scene-search"] == searches
+
+    catalog.max_age = -1
+    assert not catalog.covers("fake_dataset")
+    Api.fetch(query())
+    assert server.requests["scene-search"] == searches + 1
+
+
+def test_answers_respect_metadata_type_and_sort(m2m_server, monkeypatch):
+    server = m2m_server(total_scenes=20)
+    catalog = SceneCatalog()
+    monkeypatch.setattr(Api, "catalog", catalog)
+
+    catalog.load(Api, SceneQuery(datasetName="fake_dataset", metadataType="summary"))
+    searches = server.requests["scene-search"]
+
+    Api.fetch(SceneQuery(datasetName="fake_dataset", metadataType="summary"))
+    assert server.requests["scene-search"] == searches
+
+    # Summary records do not answer a full search, which is fetched and kept
+    full = Api.fetch(SceneQuery(datasetName="fake_dataset", maxResults=20))
+    assert server.requests["scene-search"] == searches + 1
+    assert full.results[0].metadata
+
+    # Later summary records do not downgrade the full ones
+    summary = {"datasetName": "fake_dataset", "metadataType": "summary"}
+    assert catalog.ingest_response("scene-search", summary, {"results": [CATALOG.scene(0, "summary")]}) == 0
+    assert all(record["metadata"] for record in catalog.search("fake_dataset").records())
+
+    catalog.load(Api, SceneQuery(datasetName="fake_dataset", maxResults=20))
+    searches = server.requests["scene-search"]
+    assert catalog.answer("scene-search", {"datasetName": "fake_dataset", "metadataType": "full"}) is not None
+    assert catalog.answer("scene-search", {"datasetName": "fake_dataset", "sortField": "cloudCover"}) is None
+
+    Api.fetch(SceneQuery(datasetName="fake_dataset", sortField="cloudCover", sortDirection="DESC"))
+    assert server.requests["scene-search"] == searches + 1
@@ -0,0 +1,60 @@
+import datetime
+import json
+
+import pytest
+
+from ..codec import StdlibCodec, get_codec
+from ..utilities import DataTypeEncoder
+
+PAYLOAD = {
+    "datasetName": "corona2",
+    "acquisitionFilter": {
+        "start": datetime.date(2019, 5, 24),
+        "end": datetime.datetime(2019, 5, 31, 12, 30, 15, 250),
+    },
+    "time": datetime.time(4, 5, 6),
+    "window": datetime.timedelta(hours=1, minutes=30),
+    "entityIds": ["a", "b"],
+}
+
+
+@pytest.fixture(params=["json", "orjson"])
+def codec(request):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    return get_codec(request.param)
+
+
+def test_codecs_keep_data_type_encoder_semantics(codec):
+    expected = json.loads(json.dumps(PAYLOAD, cls=DataTypeEncoder))
+
+    assert json.loads(codec.dumps(PAYLOAD)) == expected
+
+
+def test_codecs_round_trip_bytes_and_text(codec):
+    encoded = codec.dumps({"results": [1, "é", None]})
+
+    assert isinstance(encoded, bytes)
+    assert codec.loads(encoded) == {"results": [1, "é", None]}
+    assert codec.loads(encoded.decode("utf-8")) == {"results": [1, "é", None]}
+
+
+def test_default_codec_falls_back_to_stdlib(monkeypatch):
+    import builtins
+
+    real_import = builtins.__import__
+
+    def no_orjson(name, *args, **kwargs):
+        if name == "orjson":
+            raise ImportError(name)
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "__import__", no_orjson)
+
+    assert isinstance(get_codec(), StdlibCodec)
+
+
+def test_requests_accept_compressed_responses(mock_request, mock_api):
+    mock_api.login("test", "pass")
+
+    assert "gzip" in mock_request.kwargs["headers"]["Accept-Encoding"]
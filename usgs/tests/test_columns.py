@@ -0,0 +1,116 @@
+import datetime
+
+import pytest
+
+from ..columns import SceneColumns, timestamp
+from ..scene import SceneModel, SceneQuery, SceneResultSet
+from .server import FakeCatalog
+
+CATALOG = FakeCatalog(total_scenes=40)
+
+
+def records(start=0, stop=40):
+    return [CATALOG.scene(index, "summary") for index in range(start, stop)]
+
+
+def test_result_set_builds_models_lazily():
+    query = SceneQuery(datasetName="fake_dataset")
+    page = SceneResultSet(results=records(), totalHits=40, recordsReturned=40, _query=query)
+
+    assert isinstance(page.results, SceneColumns)
+    assert len(page) == 40
+
+    scene = page[3]
+    assert isinstance(scene, SceneModel)
+    assert scene.entityId == CATALOG.entity_id(3)
+    assert scene.datasetName == "fake_dataset"
+    assert [scene.entityId for scene in page.results[-2:]] == [CATALOG.entity_id(38), CATALOG.entity_id(39)]
+
+    # Every tenth scene is not downloadable
+    assert len(page.downloadable) == 36
+    assert all(isinstance(scene, SceneModel) for scene in page.downloadable)
+
+
+def test_indexing_returns_the_same_model(column_filters):
+    page = SceneResultSet(results=records(), totalHits=40, recordsReturned=40,
+                          _query=SceneQuery(datasetName="fake_dataset"))
+
+    assert page.results[0] is page.results[0]
+    page.results[0].selected = True
+    assert page.results[0].selected is True
+
+    # Filtered, sorted and concatenated columns share the models
+    assert page.results.sort("cloudCover", reverse=True)[-1] is page.results.sort("cloudCover", reverse=True)[-1]
+    assert page.results[:5][2] is page.results[2]
+    assert SceneColumns.concat([page.results, page.results])[40] is page.results[0]
+    assert list(page.results)[7] is page.results[7]
+
+
+def test_filters(column_filters):
+    columns = SceneColumns(records())
+
+    cloudy = columns.cloud_cover(maximum=20)
+    assert len(cloudy) and all(scene.cloudCover <= 20 for scene in cloudy)
+
+    acquired = columns.acquired(datetime.date(2020, 1, 5), "2020-01-09")
+    assert acquired.entityId == [CATALOG.entity_id(index) for index in range(4, 9)]
+
+    published = columns.published(start=datetime.datetime(2020, 2, 1))
+    assert published.entityId == [CATALOG.entity_id(index) for index in range(29, 40)]
+
+    assert CATALOG.entity_id(9) not in columns.downloadable().entityId
+
+    # Cells of the first grid row intersecting -98.5..-96.5
+    inside = columns.intersecting(-98.5, 30.2, -96.5, 30.8)
+    assert inside.entityId == [CATALOG.entity_id(index) for index in (1, 2, 3)]
+
+    chained = columns.downloadable().cloud_cover(maximum=50).acquired(end="2020-01-20")
+    assert all(scene.options["download"] and scene.cloudCover <= 50 for scene in chained)
+
+
+def test_sort_puts_unknown_last(column_filters):
+    data = records(0, 5)
+    data[2] = dict(data[2], cloudCover=None)
+    columns = SceneColumns(data)
+
+    ordered = columns.sort("cloudCover")
+    assert ordered.entityId[-1] == CATALOG.entity_id(2)
+    assert list(ordered.cloudCover[:-1]) == sorted(columns.cloudCover[i] for i in (0, 1, 3, 4))
+
+    assert columns.sort("publishDate", reverse=True).entityId[0] == CATALOG.entity_id(4)
+
+    with pytest.raises(ValueError):
+        columns.sort("metadata")
+
+
+def test_concat_keeps_each_page_query(column_filters):
+    first = SceneColumns(records(0, 20), query=SceneQuery(datasetName="first"))
+    second = SceneColumns(records(20, 40), query=SceneQuery(datasetName="second"))
+
+    merged = SceneColumns.concat([first, second])
+
+    assert len(merged) == 40 and len(first) == 20
+    assert merged[0].datasetName == "first" and merged[25].datasetName == "second"
+    assert (first + second).entityId == merged.entityId
+    assert merged.sort("cloudCover")[0].cloudCover == min(merged.cloudCover)
+
+
+def test_timestamp():
+    assert timestamp("1970-01-02 00:00:00") == 86400
+    assert timestamp("1970-01-01 00:00:00-05") == 5 * 3600
+    assert timestamp(datetime.date(1970, 1, 2)) == 86400
+    assert timestamp(None) != timestamp(None)
+
+
+def test_unknown_cloud_cover_and_empty_columns(column_filters):
+    data = records(0, 5)
+    data[1] = dict(data[1], cloudCover=None)
+    columns = SceneColumns(data)
+
+    assert CATALOG.entity_id(1) not in columns.cloud_cover().entityId
+    assert CATALOG.entity_id(1) in columns.cloud_cover(include_unknown=True).entityId
+    assert len(columns.cloud_cover(maximum=-1)) == 0
+
+    empty = SceneColumns([])
+    assert len(empty.cloud_cover().downloadable().acquired("2020-01-01")) == 0
+    assert len(empty.intersecting(-180, -90, 180, 90)) == 0
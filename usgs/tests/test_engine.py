@@ -0,0 +1,161 @@
+import threading
+import time
+
+import pytest
+
+from ..api import Api
+from ..engine import DownloadEngine, host_of
+from ..manager import DownloadManager
+
+
+class Concurrency:
+    """Records the most jobs running at once, overall and per host"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = {}
+        self.peak = {}
+
+    def job(self, host, seconds=0.05):
+        def run():
+            with self.lock:
+                self.running[host] = self.running.get(host, 0) + 1
+                self.running["*"] = self.running.get("*", 0) + 1
+                for key in (host, "*"):
+                    self.peak[key] = max(self.peak.get(key, 0), self.running[key])
+            time.sleep(seconds)
+            with self.lock:
+                self.running[host] -= 1
+                self.running["*"] -= 1
+            return host
+
+        return run
+
+
+def test_host_of():
+    assert host_of("https://DDS.example.com:8443/download/1") == "dds.example.com:8443"
+    assert host_of(None) == ""
+
+
+def test_engine_limits_workers_and_hosts():
+    done = []
+    concurrency = Concurrency()
+    engine = DownloadEngine(workers=4, per_host=2, on_done=lambda key, result, error: done.append((key, result)))
+
+    for index in range(12):
+        host = f"host{index % 3}"
+        engine.submit(index, f"https://{host}/file/{index}", concurrency.job(host))
+    assert engine.wait(timeout=5)
+    engine.shutdown()
+
+    assert sorted(key for key, _ in done) == list(range(12))
+    assert concurrency.peak["*"] == 4
+    assert max(peak for host, peak in concurrency.peak.items() if host != "*") == 2
+
+
+def test_engine_starts_pending_job_when_a_slot_frees():
+    started = {}
+    engine = DownloadEngine(workers=2, per_host=None)
+
+    def job(key, seconds):
+        def run():
+            started[key] = time.perf_counter()
+            time.sleep(seconds)
+        return run
+
+    begin = time.perf_counter()
+    engine.submit("short", "https://a/1", job("short", 0.02))
+    engine.submit("long", "https://a/2", job("long", 0.5))
+    engine.submit("next", "https://a/3", job("next", 0.0))
+    engine.wait(timeout=5)
+    engine.shutdown()
+
+    # "next" takes the slot of "short" without waiting for "long"
+    assert started["next"] - begin < 0.3
+
+
+def test_engine_reports_errors_and_skips_duplicates():
+    outcomes = {}
+    engine = DownloadEngine(workers=2, on_done=lambda key, result, error: outcomes.__setitem__(key, error))
+    release = threading.Event()
+
+    def fail():
+        release.wait(5)
+        raise IOError("connection reset")
+
+    assert engine.submit("a", "https://a/1", fail)
+    assert not engine.submit("a", "https://a/1", fail)
+    assert "a" in engine
+    release.set()
+    engine.wait(timeout=5)
+    engine.shutdown()
+
+    assert isinstance(outcomes["a"], IOError)
+    assert "a" not in engine
+
+
+def test_engine_rejects_invalid_limits():
+    with pytest.raises(ValueError):
+        DownloadEngine(workers=0)
+    with pytest.raises(ValueError):
+        DownloadEngine(per_host=0)
+
+
+def test_download_manager_runs_downloads_concurrently(m2m_server):
+    m2m_server(staging_delay=0.0)
+    concurrency = Concurrency()
+    lock = threading.Lock()
+    seen = []
+
+    def download_fn(download):
+        concurrency.job(host_of(download.url), 0.05)()
+        with lock:
+            seen.append(download.entityId)
+        if download.entityId == "FAKE00000105":
+            raise IOError("truncated")
+
+    manager = DownloadManager(Api(), "fake_dataset", workers=4, per_host=3)
+    manager.add_scenes([f"FAKE{index:08d}" for index in range(100, 109)])
+    manager.start(download_fn=download_fn, cool_down=0.01)
+
+    assert sorted(seen) == [f"FAKE{index:08d}" for index in range(100, 109)]
+    assert concurrency.peak["*"] == 3
+    assert len(manager._completed) == 8
+    assert isinstance(manager.failed["FAKE00000105"], IOError)
+    assert not manager.active
+
+
+def test_download_managers_do_not_share_state(m2m_server):
+    m2m_server()
+    first = DownloadManager(Api(), "fake_dataset").add("FAKE00000001")
+    second = DownloadManager(Api(), "fake_dataset")
+
+    assert second.requested_scenes == [] and second._labels == []
+    assert first._completed is not second._completed
+
+
+def test_pooled_downloads_share_one_progress_bar(m2m_server, monkeypatch):
+    m2m_server(staging_delay=0.0)
+    bars = []
+
+    class Bar:
+        def __init__(self, label="", expected_size=None):
+            self.shown = []
+            self.finished = False
+            bars.append(self)
+
+        def show(self, progress, count=None):
+            self.shown.append((progress, count))
+
+        def done(self):
+            self.finished = True
+
+    monkeypatch.setattr("usgs.manager.progress.Bar", Bar)
+
+    manager = DownloadManager(Api(), "fake_dataset", workers=3)
+    manager.add_scenes([f"FAKE{index:08d}" for index in range(100, 105)])
+    manager.start(download_fn=lambda download: None, cool_down=0.01)
+
+    assert len(bars) == 1 and bars[0].finished
+    assert bars[0].shown[-1] == (5, 5)
+    assert manager._progress == (5, 5)
@@ -0,0 +1,117 @@
+import pytest
+
+from ..dataset import DatasetModel
+from ..download import DownloadModel, DownloadOptionQuery, DownloadRequestQuery
+from ..exceptions import TransientServerError
+from ..fanout import FanOut, chunked, merge_data
+from ..manager import DownloadManager
+
+
+def test_chunked():
+    assert chunked(list(range(5)), 2) == [[0, 1], [2, 3], [4]]
+
+
+def test_split_uses_declared_field_and_override():
+    query = DownloadOptionQuery(datasetName="corona2", entityIds=[str(i) for i in range(10)])
+
+    assert not FanOut().applies(query)
+
+    parts = FanOut(chunk_sizes={"entityIds": 4}).split(query)
+
+    assert [part.entityIds for part in parts] == [
+        ["0", "1", "2", "3"], ["4", "5", "6", "7"], ["8", "9"]
+    ]
+    assert all(part.datasetName == "corona2" for part in parts)
+    assert query.entityIds == [str(i) for i in range(10)]
+
+
+def test_merge_download_request_responses():
+    merged = merge_data(
+        [
+            {"failed": [{"entityId": "a"}], "numInvalidScenes": 1, "duplicateProducts": [],
+             "availableDownloads": [{"downloadId": 1}], "newRecords": {"1": "a"}},
+            {"failed": [], "numInvalidScenes": 2, "duplicateProducts": {"p": "label"},
+             "availableDownloads": [{"downloadId": 2}], "newRecords": {"2": "b"}},
+        ]
+    )
+
+    assert merged["failed"] == [{"entityId": "a"}]
+    assert merged["numInvalidScenes"] == 3
+    assert merged["duplicateProducts"] == {"p": "label"}
+    assert merged["availableDownloads"] == [{"downloadId": 1}, {"downloadId": 2}]
+    assert merged["newRecords"] == {"1": "a", "2": "b"}
+
+
+def test_fetch_fans_out_and_merges_in_order(mock_request, mock_api, monkeypatch):
+    monkeypatch.setattr(mock_api, "fan_out", FanOut(max_workers=3, chunk_sizes={"entityIds": 2}))
+    sent = []
+
+    def request(url, data=None, **kwargs):
+        sent.append(data["entityIds"])
+        return [{"entityId": entity_id, "id": f"p-{entity_id}"} for entity_id in data["entityIds"]]
+
+    monkeypatch.setattr(mock_api, "request", request)
+
+    options = mock_api.fetch(DownloadOptionQuery(datasetName="corona2", entityIds=list("abcde")))
+
+    assert sorted(sent) == [["a", "b"], ["c", "d"], ["e"]]
+    assert [option.entityId for option in options] == list("abcde")
+    assert all(option._query.entityIds == list("abcde") for option in options)
+
+
+def test_download_request_query_declares_fan_out():
+    query = DownloadRequestQuery(downloads=[DownloadModel(entityId=str(i)) for i in range(3)])
+
+    assert len(FanOut(chunk_sizes={"downloads": 1}).split(query)) == 3
+
+
+def test_download_request_chunks_are_sent_in_turn_and_keep_partial_results(mock_api, monkeypatch):
+    monkeypatch.setattr(mock_api, "fan_out", FanOut(max_workers=4, chunk_sizes={"downloads": 2}))
+    sent = []
+
+    def request(url, data=None, **kwargs):
+        entity_ids = [download["entityId"] for download in data["downloads"]]
+        sent.append(entity_ids)
+        if "c" in entity_ids:
+            raise TransientServerError(503, "unavailable")
+        return {"failed": [], "newRecords": {}, "numInvalidScenes": 0, "duplicateProducts": [],
+                "availableDownloads": [{"downloadId": entity_id} for entity_id in entity_ids],
+                "preparingDownloads": []}
+
+    monkeypatch.setattr(mock_api, "request", request)
+
+    result = mock_api.fetch(DownloadRequestQuery(
+        downloads=[DownloadModel(entityId=entity_id, productId="p") for entity_id in "abcde"]
+    ))
+
+    assert sent == [["a", "b"], ["c", "d"], ["e"]]
+    assert [download["downloadId"] for download in result.availableDownloads] == ["a", "b", "e"]
+    assert [failed["entityId"] for failed in result.failed] == ["c", "d"]
+    assert "unavailable" in result.failed[0]["errorMessage"]
+
+
+def test_download_request_raises_when_every_chunk_fails(mock_api, monkeypatch):
+    monkeypatch.setattr(mock_api, "fan_out", FanOut(chunk_sizes={"downloads": 1}))
+
+    def request(url, data=None, **kwargs):
+        raise TransientServerError(503, "unavailable")
+
+    monkeypatch.setattr(mock_api, "request", request)
+
+    with pytest.raises(TransientServerError):
+        mock_api.fetch(DownloadRequestQuery(downloads=[DownloadModel(entityId="a"), DownloadModel(entityId="b")]))
+
+
+def test_manager_batches_added_scenes(mock_request, mock_api, monkeypatch):
+    fetched = []
+    monkeypatch.setattr(mock_api, "fetch", lambda query: fetched.append(query) or [])
+
+    manager = DownloadManager(mock_api, DatasetModel(datasetAlias="corona2"))
+    manager.add("a").add("b").add_scenes(["c"])
+
+    assert fetched == []
+
+    manager.fetch_options()
+
+    assert len(fetched) == 1
+    assert fetched[0].entityIds == ["a", "b", "c"]
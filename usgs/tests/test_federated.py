@@ -0,0 +1,85 @@
+import datetime
+
+import pytest
+
+from ..api import Api
+from ..exceptions import UnorderedResultsError
+from ..federated import FederatedSearch
+from ..filters import CloudCoverFilter, SceneFilter
+from .server import FakeCatalog
+
+
+def servers(m2m_server):
+    # "other" starts a day earlier, both datasets then acquire a scene every day
+    other = FakeCatalog(total_scenes=30, start=datetime.date(2019, 12, 31))
+    return m2m_server(total_scenes=50, datasets={"other": other}), other
+
+
+def test_merges_datasets_by_acquisition_date(m2m_server):
+    server, other = servers(m2m_server)
+
+    search = Api().federated_scenes(["fake_dataset", "other"], page_size=10)
+    scenes = list(search)
+
+    assert search.totalHits == {"fake_dataset": 50, "other": 30} and search.total == 80
+    assert len(scenes) == 80
+    dates = [scene.acquisition_start for scene in scenes]
+    assert dates == sorted(dates)
+    # Same day scenes keep the order of the datasets
+    assert [scene.datasetName for scene in scenes[:3]] == ["other", "fake_dataset", "other"]
+    assert sum(scene.datasetName == "other" for scene in scenes) == 30
+
+
+def test_orders_by_cloud_cover_with_a_shared_filter(m2m_server):
+    server, other = servers(m2m_server)
+
+    search = FederatedSearch(
+        Api, ["fake_dataset", "other"], SceneFilter(cloudCoverFilter=CloudCoverFilter(min=0, max=50)),
+        order_by="cloudCover", reverse=True, page_size=100,
+    )
+    covers = [scene.cloudCover for scene in search]
+
+    assert covers == sorted(covers, reverse=True) and max(covers) <= 50
+    assert len(covers) == len(server.catalog.search({"cloudCoverFilter": {"min": 0, "max": 50}})) + len(
+        other.search({"cloudCoverFilter": {"min": 0, "max": 50}})
+    )
+
+    with pytest.raises(ValueError):
+        FederatedSearch(Api, ["fake_dataset"], order_by="entityId")
+    with pytest.raises(ValueError):
+        FederatedSearch(Api, ["fake_dataset"], sortField="cloudCover")
+
+
+def test_cloud_cover_order_holds_across_pages(m2m_server):
+    server, other = servers(m2m_server)
+
+    search = FederatedSearch(Api, ["fake_dataset", "other"], order_by="cloudCover", page_size=10)
+    scenes = list(search)
+
+    assert len(scenes) == 80
+    covers = [scene.cloudCover for scene in scenes]
+    assert covers == sorted(covers)
+    assert server.requests["scene-search"] == 5 + 3
+
+
+def test_unsorted_server_results_raise(m2m_server, monkeypatch):
+    server, other = servers(m2m_server)
+    # "other" ignores the requested sort
+    monkeypatch.setattr(other, "search", lambda scene_filter=None, *sort: FakeCatalog.search(other, scene_filter))
+
+    search = FederatedSearch(Api, ["fake_dataset", "other"], order_by="cloudCover", page_size=10)
+
+    with pytest.raises(UnorderedResultsError):
+        list(search)
+
+
+def test_pages_are_fetched_as_the_merge_advances(m2m_server):
+    server, _ = servers(m2m_server)
+
+    search = iter(FederatedSearch(Api, ["fake_dataset", "other"], page_size=5, window=1))
+    for _ in range(4):
+        next(search)
+
+    # Two first pages plus at most one page ahead per dataset
+    assert server.requests["scene-search"] <= 4
+    search.close()
@@ -0,0 +1,114 @@
+import pytest
+
+from ..api import Api
+from ..columns import SceneColumns
+from ..filters import GeoJson, Point, SceneFilter, SpatialGeojson, SpatialMbr
+from ..footprint import Aoi, clip, convex_hull, signed_area
+from ..manager import DownloadManager
+from ..scene import SceneQuery
+from .server import FakeCatalog
+
+CATALOG = FakeCatalog(total_scenes=100)
+
+
+def square(west, south, east, north):
+    return {
+        "type": "Polygon",
+        "coordinates": [[[west, south], [east, south], [east, north], [west, north], [west, south]]],
+    }
+
+
+# Inside scene 0's bounding box (-100, 30, -99, 31) but in the corner its skewed footprint leaves out
+CORNER = (-100.5, 29.5, -99.95, 30.1)
+
+
+def test_overlap_fractions():
+    aoi = Aoi.of((0, 0, 2, 2))
+
+    assert aoi.area == 4
+    assert aoi.overlap(square(1, 0, 3, 2)) == pytest.approx(0.5)
+    assert aoi.overlap(square(1, 0, 3, 2), relative_to="aoi") == pytest.approx(0.5)
+    assert aoi.overlap(square(0.5, 0.5, 1.5, 1.5)) == pytest.approx(1.0)
+    assert aoi.overlap(square(0.5, 0.5, 1.5, 1.5), relative_to="aoi") == pytest.approx(0.25)
+    assert aoi.overlap(square(3, 3, 4, 4)) == 0
+    assert aoi.overlap(None) is None
+
+    # A triangle whose bounding box covers the aoi corner, but not the triangle itself
+    triangle = {"type": "Polygon", "coordinates": [[[1.5, 3], [3, 1.5], [3, 3], [1.5, 3]]]}
+    assert not aoi.intersects(triangle)
+    assert aoi.intersects(square(1, 0, 3, 2), min_overlap=0.5)
+    assert not aoi.intersects(square(1, 0, 3, 2), min_overlap=0.6)
+
+    with pytest.raises(ValueError):
+        aoi.overlap(triangle, relative_to="both")
+
+
+def test_aoi_shapes():
+    # L shaped (non convex) area with a hole
+    l_shape = {
+        "type": "Polygon",
+        "coordinates": [
+            [[0, 0], [4, 0], [4, 1], [1, 1], [1, 4], [0, 4], [0, 0]],
+            [[2, 0.25], [3, 0.25], [3, 0.75], [2, 0.75], [2, 0.25]],
+        ],
+    }
+    aoi = Aoi.of(l_shape)
+    assert aoi.area == pytest.approx(7 - 0.5)
+    assert aoi.overlap(square(0, 0, 4, 4), relative_to="aoi") == pytest.approx(1.0)
+    assert not aoi.intersects(square(2, 2, 4, 4))
+
+    spatial = SpatialGeojson(geoJson=GeoJson(type="MultiPolygon", coordinates=[square(0, 0, 1, 1)["coordinates"]]))
+    assert Aoi.of(spatial).area == 1
+    mbr = SpatialMbr(lowerLeft=Point(latitude=0, longitude=0), upperRight=Point(latitude=1, longitude=2))
+    assert Aoi.of(mbr).bounds == (0, 0, 2, 1)
+
+    point = Aoi.of({"type": "Point", "coordinates": [0.5, 0.5]})
+    assert point.intersects(square(0, 0, 1, 1)) and not point.intersects(square(1, 1, 2, 2))
+
+    with pytest.raises(ValueError):
+        Aoi.of({"type": "LineString", "coordinates": [[0, 0], [1, 1]]})
+
+
+def test_clip_and_hull():
+    hull = convex_hull([(0, 0), (2, 0), (1, 1), (2, 2), (0, 2)])
+    assert signed_area(hull) == 4
+    assert abs(signed_area(clip([(1, 1), (3, 1), (3, 3), (1, 3)], hull))) == 1
+
+
+def test_columns_drop_scenes_outside_their_footprint(column_filters):
+    columns = SceneColumns([CATALOG.scene(index, "summary") for index in range(100)])
+
+    # The bounding box test alone keeps scene 0
+    assert columns.intersecting(*CORNER).entityId == [CATALOG.entity_id(0)]
+    assert not columns.footprints(CORNER)
+
+    # Scene 0's footprint covers 0.82 of its cell
+    area = columns.footprints((-100, 30, -99, 31), min_overlap=0.8, relative_to="aoi")
+    assert area.entityId == [CATALOG.entity_id(0)]
+    assert not columns.footprints((-100, 30, -99, 31), min_overlap=0.9, relative_to="aoi")
+
+    unknown = SceneColumns([dict(CATALOG.scene(0, "summary"), spatialCoverage=None, spatialBounds=None)])
+    assert not unknown.footprints(CORNER) and unknown.footprints(CORNER, include_unknown=True)
+
+
+def test_result_set_and_manager_filter_on_the_query_aoi(m2m_server):
+    m2m_server(total_scenes=100)
+    west, south, east, north = CORNER
+    page = Api.fetch(
+        SceneQuery(
+            datasetName="fake_dataset",
+            sceneFilter=SceneFilter(
+                spatialFilter=SpatialMbr(
+                    lowerLeft=Point(latitude=south, longitude=west), upperRight=Point(latitude=north, longitude=east)
+                )
+            ),
+        )
+    )
+    assert len(page) == 1 and not page.footprints()
+
+    manager = DownloadManager(Api(), "fake_dataset", aoi=page._query.sceneFilter.spatialFilter)
+    manager.add_scenes(page)
+    manager.add_scenes(list(page.results))
+    manager.add("FAKE00000005")
+    assert manager.rejected == [CATALOG.entity_id(0)] * 2
+    assert manager._pending_scenes == ["FAKE00000005"]
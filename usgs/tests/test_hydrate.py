@@ -0,0 +1,88 @@
+import datetime
+
+import pytest
+
+from ..dataset import DatasetModel
+from ..download import Download, DownloadRetrieveModel
+from ..hydrate import Hydrator, parse_datetime
+from ..scene import SceneModel, SceneQuery
+from .server import DATASET, FakeCatalog
+
+CATALOG = FakeCatalog(total_scenes=10)
+
+
+def test_models_are_slotted():
+    scene = SceneModel(entityId="a")
+
+    assert not hasattr(scene, "__dict__")
+    with pytest.raises(AttributeError):
+        scene.notAField = 1
+
+
+def test_build_matches_dataclass_constructor():
+    query = SceneQuery(datasetName="fake_dataset")
+    item = CATALOG.scene(3)
+
+    built = Hydrator().build(SceneModel, item, api="api", query=query)
+
+    assert built == SceneModel(**item, _api="api", _query=query)
+    assert built.api == "api" and built.datasetName == "fake_dataset"
+    assert built._extra is None
+
+
+def test_post_init_runs():
+    dataset = Hydrator().build(DatasetModel, DATASET)
+    assert dataset.temporalCoverage == ["2020-01-01 00:00:00", "2030-01-01 00:00:00"]
+
+    queue = Hydrator().build(
+        DownloadRetrieveModel, {"available": [{"entityId": "a", "label": "l"}], "requested": []}, api="api"
+    )
+    assert isinstance(queue.available[0], Download) and queue.available[0].api == "api"
+
+
+def test_unknown_fields():
+    item = dict(CATALOG.scene(1, "summary"), newField=[1, 2])
+
+    stored = Hydrator().build(SceneModel, item)
+    assert stored._extra == {"newField": [1, 2]}
+    assert stored.newField == [1, 2]
+
+    ignored = Hydrator(unknown="ignore").build(SceneModel, item)
+    assert ignored._extra is None
+    with pytest.raises(AttributeError):
+        ignored.newField
+
+    with pytest.raises(TypeError):
+        Hydrator(unknown="raise").build(SceneModel, item)
+
+    with pytest.raises(ValueError):
+        Hydrator(unknown="drop")
+
+
+def test_repeated_strings_are_interned():
+    first, second = Hydrator().build_many(
+        Download,
+        [{"label": "".join(["my-", "label"]), "entityId": "a"}, {"label": "".join(["my-", "label"]), "entityId": "b"}],
+    )
+
+    assert first.label is second.label
+
+
+def test_lazy_dates():
+    scene = Hydrator().build(SceneModel, CATALOG.scene(4, "summary"))
+
+    assert scene.publishDate == "2020-01-07 00:00:00"
+    assert scene.published == datetime.datetime(2020, 1, 7)
+    assert scene.acquisition_start == scene.acquisition_end == datetime.datetime(2020, 1, 5)
+
+    dataset = Hydrator().build(DatasetModel, DATASET)
+    assert dataset.updated == datetime.datetime(
+        2021, 6, 1, tzinfo=datetime.timezone(datetime.timedelta(hours=-5))
+    )
+
+
+def test_parse_datetime():
+    assert parse_datetime("2021-06-01") == datetime.datetime(2021, 6, 1)
+    assert parse_datetime("2021-06-01T10:22:05.123") == datetime.datetime(2021, 6, 1, 10, 22, 5, 123000)
+    assert parse_datetime("2021/06/01") == datetime.datetime(2021, 6, 1)
+    assert parse_datetime(None) is None
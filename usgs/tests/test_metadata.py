@@ -0,0 +1,76 @@
+import datetime
+
+import pytest
+
+from ..columns import SceneColumns
+from ..metadata import MetadataSchema, SceneMetadata, convert
+from ..scene import SceneModel, SceneResultSet
+from .server import FakeCatalog
+
+CATALOG = FakeCatalog(total_scenes=20)
+
+
+def test_scene_meta_lookup_and_conversion():
+    scene = SceneModel(**CATALOG.scene(7))
+
+    assert scene.meta["Cloud Cover"] == str(CATALOG.cloud_cover(7))
+    assert scene.meta.get("Cloud Cover", type=int) == CATALOG.cloud_cover(7)
+    assert scene.meta.get("Acquisition Date", type=datetime.date) == datetime.date(2020, 1, 8)
+    assert scene.meta.get("Acquisition Date", type="auto") == datetime.datetime(2020, 1, 8)
+    assert scene.meta.get("Missing", default="n/a") == "n/a"
+    assert "Sensor" in scene.meta and "Missing" not in scene.meta
+    assert scene.meta.field("Sensor")["id"] == "5e83d0b8f2d1c5e2"
+
+    with pytest.raises(KeyError):
+        scene.meta["Missing"]
+
+    # Summary results carry no metadata
+    assert len(SceneModel(**CATALOG.scene(7, "summary")).meta) == 0
+
+
+def test_page_shares_one_schema():
+    page = SceneResultSet(results=[CATALOG.scene(index) for index in range(20)])
+
+    first, second = page[0].meta, page[1].meta
+    assert first.schema is second.schema
+    assert len(first.schema) == 0
+    assert dict(second) == {
+        "Entity ID": CATALOG.entity_id(1),
+        "Acquisition Date": "2020/01/02",
+        "Cloud Cover": str(CATALOG.cloud_cover(1)),
+        "Sensor": "FAKE",
+    }
+    assert first.schema.names == ["Entity ID", "Acquisition Date", "Cloud Cover", "Sensor"]
+
+
+def test_bulk_column_extraction():
+    first = SceneColumns([CATALOG.scene(index) for index in range(10)])
+    second = SceneColumns([CATALOG.scene(index) for index in range(10, 20)])
+    second[0].meta["Sensor"]
+
+    merged = first + second
+
+    assert merged.metadata("Cloud Cover", type=int) == [CATALOG.cloud_cover(index) for index in range(20)]
+    assert merged.metadata("Missing", default=0) == [0] * 20
+    assert merged.cloud_cover(maximum=30).metadata("Entity ID") == [
+        CATALOG.entity_id(index) for index in range(20) if CATALOG.cloud_cover(index) <= 30
+    ]
+    assert SceneResultSet(results=[CATALOG.scene(3)]).metadata("Sensor") == ["FAKE"]
+
+
+def test_schema_grows_with_new_fields():
+    schema = MetadataSchema()
+    short = SceneMetadata([{"fieldName": "A", "value": "1"}], schema)
+    long = SceneMetadata([{"fieldName": "B", "value": "2"}, {"fieldName": "A", "value": "3"}], schema)
+
+    assert short["A"] == "1"
+    assert long["A"] == "3" and long["B"] == "2"
+    assert "B" not in short and list(short) == ["A"]
+
+
+def test_convert():
+    assert convert("12.5", "auto") == 12.5
+    assert convert("-3", "auto") == -3
+    assert convert("L1TP", "auto") == "L1TP"
+    assert convert("Y", bool) is True
+    assert convert(None, int) is None
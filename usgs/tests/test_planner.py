@@ -0,0 +1,88 @@
+import datetime
+
+from ..api import Api
+from ..filters import AcquisitionFilter, Point, SceneFilter, SpatialMbr
+from ..planner import QueryPlanner, split_mbr, split_window
+from ..scene import SceneCursor, SceneQuery
+from ..utilities import canonical_json
+
+
+def test_split_window_covers_every_day_once():
+    windows = split_window(datetime.date(2020, 1, 1), datetime.datetime(2020, 1, 10, 12), 3)
+
+    assert windows[0][0] == datetime.date(2020, 1, 1) and windows[-1][1] == datetime.datetime(2020, 1, 10, 12)
+    for (_, end), (start, _) in zip(windows, windows[1:]):
+        assert start - end == datetime.timedelta(days=1)
+
+    assert len(split_window("2020-01-01", "2020-01-02", 5)) == 2
+
+
+def test_split_window_keeps_the_times_of_its_bounds():
+    start, end = datetime.datetime(2020, 1, 1, 18, 30), datetime.datetime(2020, 1, 4, 6)
+    windows = split_window(start, end, 2)
+
+    # Only the interior boundary falls on whole days
+    assert windows == [(start, datetime.date(2020, 1, 2)), (datetime.date(2020, 1, 3), end)]
+    assert split_window(start, datetime.datetime(2020, 1, 1, 20), 4) == [(start, datetime.datetime(2020, 1, 1, 20))]
+
+
+def test_split_mbr_grid():
+    tiles = split_mbr(
+        SpatialMbr(lowerLeft=Point(latitude=0, longitude=0), upperRight=Point(latitude=10, longitude=20)), 2, 2
+    )
+
+    assert len(tiles) == 4
+    assert (tiles[3].lowerLeft.longitude, tiles[3].lowerLeft.latitude) == (10, 5)
+    assert (tiles[3].upperRight.longitude, tiles[3].upperRight.latitude) == (20, 10)
+
+
+def test_planned_search_matches_single_search(m2m_server):
+    server = m2m_server(total_scenes=1500)
+    scene_filter = SceneFilter(
+        spatialFilter=SpatialMbr(
+            lowerLeft=Point(latitude=30.0, longitude=-100.0), upperRight=Point(latitude=40.0, longitude=-90.0)
+        ),
+        acquisitionFilter=AcquisitionFilter(start=datetime.date(2020, 1, 1), end=datetime.date(2023, 12, 31)),
+    )
+    query = SceneQuery(datasetName="fake_dataset", sceneFilter=scene_filter)
+
+    planner = QueryPlanner(Api, target_hits=200, page_size=100)
+    search = planner.search(query)
+
+    assert len(search.partitions) > 1
+    assert all(partition.hits <= 200 for partition in search.partitions)
+
+    entity_ids = [scene.entityId for scene in search]
+    expected = server.catalog.search({"acquisitionFilter": {"start": "2020-01-01", "end": "2023-12-31"}})
+
+    assert sorted(entity_ids) == [server.catalog.entity_id(index) for index in expected]
+    # Tiles share their borders, scenes on them are returned by several tiles
+    assert search.totalHits > len(entity_ids) and search.duplicates == search.totalHits - len(entity_ids)
+
+
+def test_small_search_is_not_split(m2m_server):
+    m2m_server(total_scenes=50)
+
+    search = QueryPlanner(Api, target_hits=100).search(SceneQuery(datasetName="fake_dataset"))
+
+    assert len(search.partitions) == 1
+    assert len(search.to_columns()) == 50
+
+
+def test_cursor_query_rebuilds_scene_filter():
+    scene_filter = SceneFilter(
+        spatialFilter=SpatialMbr(
+            lowerLeft=Point(latitude=30.0, longitude=-100.0), upperRight=Point(latitude=40.0, longitude=-90.0)
+        ),
+        acquisitionFilter=AcquisitionFilter(start=datetime.date(2020, 1, 1), end=datetime.date(2023, 12, 31)),
+    )
+    query = SceneQuery(datasetName="fake_dataset", sceneFilter=scene_filter, startingNumber=41)
+
+    resumed = SceneCursor.from_json(SceneCursor.from_query(query).to_json()).to_query()
+
+    assert isinstance(resumed.sceneFilter.spatialFilter, SpatialMbr)
+    assert resumed.sceneFilter.spatialFilter.lowerLeft == Point(latitude=30.0, longitude=-100.0)
+    assert canonical_json(resumed.to_dict()) == canonical_json(query.to_dict())
+
+    planner = QueryPlanner(Api)
+    assert len(planner.split(resumed, 16)) == len(planner.split(query, 16)) == 16
@@ -0,0 +1,78 @@
+from ..api import Api
+from ..dataset import DatasetsQuery
+from ..manager import DownloadManager
+from ..registry import DatasetRegistry
+
+
+def dataset_requests(server):
+    return server.requests["dataset"] + server.requests["dataset-search"]
+
+
+def test_preload_answers_dataset_lookups(m2m_server, dataset_registry):
+    server = m2m_server()
+
+    assert dataset_registry.preload(Api) == 1
+    assert dataset_registry.preload(Api) == 1
+    assert server.requests["dataset-search"] == 1
+
+    api = Api()
+    assert api.dataset(datasetName="fake_dataset").datasetId == "5e83d0b84df8d8c2"
+    assert api.dataset(datasetName="FAKE_DATASET").datasetAlias == "fake_dataset"
+    assert api.dataset(datasetId="5e83d0b84df8d8c2").datasetAlias == "fake_dataset"
+    assert [dataset.datasetAlias for dataset in api.datasets()] == ["fake_dataset"]
+    DownloadManager(api, "fake_dataset")
+    assert dataset_requests(server) == 1
+
+    # Filtered searches are left to the server
+    Api.fetch(DatasetsQuery(datasetName="fake"))
+    assert server.requests["dataset-search"] == 2
+
+
+def test_single_lookups_are_kept(m2m_server):
+    server = m2m_server()
+
+    Api().dataset(datasetName="fake_dataset")
+    Api().dataset(datasetName="fake_dataset")
+    assert server.requests["dataset"] == 1
+    # A single dataset does not stand for every dataset
+    Api().datasets()
+    assert server.requests["dataset-search"] == 1
+
+
+def test_workers_share_the_registry_file(m2m_server, monkeypatch, tmp_path):
+    server = m2m_server()
+    path = str(tmp_path / "datasets.sqlite")
+
+    DatasetRegistry(path).preload(Api)
+    before = dataset_requests(server)
+
+    # A new process starts with the file
+    worker = DatasetRegistry(path)
+    monkeypatch.setattr(Api, "registry", worker)
+    assert "fake_dataset" in worker
+    assert Api().dataset(datasetName="fake_dataset").datasetAlias == "fake_dataset"
+    assert len(Api().datasets()) == 1
+    assert dataset_requests(server) == before
+
+
+def test_expired_entries_are_replaced_only_when_updated(m2m_server, monkeypatch):
+    server = m2m_server()
+    registry = DatasetRegistry(ttl=60)
+    monkeypatch.setattr(Api, "registry", registry)
+    registry.preload(Api)
+    record = registry.lookup("fake_dataset")
+
+    registry.ttl = -1
+    assert registry.lookup("fake_dataset") is None
+    Api().dataset(datasetName="fake_dataset")
+    assert server.requests["dataset"] == 1
+    registry.ttl = 60
+    # Same dateUpdated, the entry was only marked fresh
+    assert registry.lookup("fake_dataset") is record
+
+    server.catalog.dataset = dict(server.catalog.dataset, dateUpdated="2022-01-01 00:00:00-05")
+    assert registry.preload(Api, force=True) == 1
+    assert server.requests["dataset-search"] == 2
+    assert registry.lookup("5e83d0b84df8d8c2")["dateUpdated"] == "2022-01-01 00:00:00-05"
+    assert Api().dataset(datasetName="fake_dataset").dateUpdated == "2022-01-01 00:00:00-05"
+    assert server.requests["dataset"] == 1
@@ -0,0 +1,157 @@
+import pytest
+import requests
+
+from ..exceptions import (
+    AuthenticationError,
+    CircuitOpenError,
+    NotFoundError,
+    RateLimitError,
+    TransientServerError,
+    UsgsApiError,
+    ValidationError,
+    error_for,
+)
+from ..retry import CircuitBreaker, RetryPolicy
+
+
+@pytest.mark.parametrize(
+    "code,error_class",
+    [
+        (429, RateLimitError),
+        ("RATE_LIMIT_USER_DL", RateLimitError),
+        (401, AuthenticationError),
+        ("AUTH_KEY_INVALID", AuthenticationError),
+        (404, NotFoundError),
+        ("DATASET_NOT_FOUND", NotFoundError),
+        (400, ValidationError),
+        ("INPUT_PARAMETER_INVALID", ValidationError),
+        (503, TransientServerError),
+        (None, TransientServerError),
+        ("DOWNLOAD_ERROR", UsgsApiError),
+    ],
+)
+def test_error_for_maps_codes(code, error_class):
+    assert type(error_for(code, "message", "url")) is error_class
+
+
+def fast_policy(**kwargs):
+    return RetryPolicy(base_delay=0, max_delay=0, **kwargs)
+
+
+def test_transient_errors_are_retried_locally():
+    calls = []
+
+    def attempt():
+        calls.append(1)
+        if len(calls) < 3:
+            raise TransientServerError(502, "Bad Gateway")
+        return "page"
+
+    assert fast_policy().run("scene-search", attempt) == "page"
+    assert len(calls) == 3
+
+
+def test_validation_errors_are_not_retried():
+    calls = []
+
+    def attempt():
+        calls.append(1)
+        raise ValidationError("INPUT_INVALID", "bad")
+
+    with pytest.raises(ValidationError):
+        fast_policy().run("scene-search", attempt)
+    assert len(calls) == 1
+
+
+def test_download_request_only_retried_when_never_sent():
+    policy = fast_policy()
+
+    sent = TransientServerError(None, "reset", request_sent=True)
+    unsent = TransientServerError(None, "refused", request_sent=False)
+
+    assert not policy.should_retry("download-request", sent, 1)
+    assert policy.should_retry("download-request", unsent, 1)
+    assert policy.should_retry("download-request", RateLimitError(429), 1)
+    assert policy.should_retry("download-options", sent, 1)
+
+
+def test_circuit_breaker_opens_and_half_opens(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0)
+
+    breaker.record_failure()
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.reset_timeout = 60
+    breaker.record_failure()
+    breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_half_open_circuit_admits_one_trial_call():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # An interrupted trial hands its turn to the next caller
+    breaker.before_call()
+    breaker.release()
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+
+@pytest.mark.parametrize(
+    "error,state",
+    [
+        (ValidationError(400, "bad input"), CircuitBreaker.CLOSED),
+        (NotFoundError(404, "missing"), CircuitBreaker.CLOSED),
+        (RateLimitError(429), CircuitBreaker.OPEN),
+        (TransientServerError(503), CircuitBreaker.OPEN),
+    ],
+)
+def test_any_trial_response_resolves_half_open_circuit(error, state):
+    policy = fast_policy(max_attempts=1, failure_threshold=1, reset_timeout=0)
+    policy.breaker("scene-search").record_failure()
+
+    def attempt():
+        raise error
+
+    with pytest.raises(type(error)):
+        policy.run("scene-search", attempt)
+
+    assert policy.breaker("scene-search").state == state
+
+
+def test_api_raises_typed_error_instead_of_exit(mock_request, mock_api, monkeypatch):
+    monkeypatch.setattr(mock_api, "retry", fast_policy(max_attempts=2))
+    monkeypatch.setattr(mock_request, "status_code", 503)
+
+    with pytest.raises(TransientServerError):
+        mock_api.login("test", "pass")
+
+
+def test_api_wraps_connection_errors(mock_api, monkeypatch):
+    def refused(*args, **kwargs):
+        raise requests.exceptions.ConnectTimeout("refused")
+
+    monkeypatch.setattr("requests.post", refused)
+    monkeypatch.setattr(mock_api, "retry", fast_policy(max_attempts=1))
+
+    with pytest.raises(TransientServerError) as error:
+        mock_api.login("test", "pass")
+
+    assert error.value.request_sent is False
@@ -0,0 +1,99 @@
+import threading
+
+from ..api import Api
+from ..scene import SceneQuery
+from ..scenelist import SceneMetadataCache, fetch_metadata
+
+
+def summary_page(**kwargs):
+    return Api.fetch(SceneQuery(datasetName="fake_dataset", metadataType="summary", maxResults=50, **kwargs))
+
+
+def test_summary_pages_load_metadata_in_bulk_for_kept_scenes(m2m_server, monkeypatch):
+    server = m2m_server(total_scenes=50)
+    monkeypatch.setattr(Api, "scene_metadata", SceneMetadataCache())
+
+    page = summary_page()
+    assert all(not record["metadata"] for record in page.results.records())
+
+    clear = page.results.cloud_cover(20)
+    kept = [scene.entityId for scene in clear]
+    assert server.requests["scene-list-add"] == 0
+
+    # The first metadata access loads every kept scene at once
+    assert clear[0].meta["Entity ID"] == kept[0]
+    assert clear.metadata("Cloud Cover", type=int) == [
+        server.catalog.cloud_cover(server.catalog.index_of(entity_id)) for entity_id in kept
+    ]
+    assert server.requests["scene-list-add"] == server.requests["scene-metadata-list"] == 1
+    assert server.requests["scene-list-remove"] == 1 and not server.scene_lists
+    assert len(Api.scene_metadata) == len(kept)
+
+    # Loaded records are served from the per entityId cache
+    again = summary_page().results.cloud_cover(20)
+    assert again.metadata("Sensor") == ["FAKE"] * len(kept)
+    assert server.requests["scene-metadata-list"] == 1
+
+
+def test_full_pages_do_not_load(m2m_server, monkeypatch):
+    server = m2m_server(total_scenes=10)
+    monkeypatch.setattr(Api, "scene_metadata", SceneMetadataCache())
+
+    page = Api.fetch(SceneQuery(datasetName="fake_dataset"))
+    assert page[3].meta["Sensor"] == "FAKE"
+    assert server.requests["scene-list-add"] == 0
+
+
+def test_dataset_scene_uses_bulk_records(m2m_server, monkeypatch):
+    server = m2m_server(total_scenes=30)
+    monkeypatch.setattr(Api, "scene_metadata", SceneMetadataCache())
+    dataset = Api().dataset(datasetName="fake_dataset")
+    entity_ids = [server.catalog.entity_id(index) for index in (7, 3, 21)]
+
+    scenes = dataset.scene_metadata(entity_ids + ["FAKE00000029"])
+    assert [scene.entityId for scene in scenes] == entity_ids + ["FAKE00000029"]
+    assert scenes[0].meta["Entity ID"] == entity_ids[0]
+
+    assert [dataset.scene(entityId=entity_id).entityId for entity_id in entity_ids] == entity_ids
+    assert server.requests["scene-metadata"] == 0
+    assert server.requests["scene-metadata-list"] == 1
+
+    # Not fetched in bulk before, a single scene-metadata request
+    assert dataset.scene(entityId="FAKE00000011").entityId == "FAKE00000011"
+    assert server.requests["scene-metadata"] == 1
+
+
+def test_scenes_without_metadata_are_not_fetched_again(m2m_server, monkeypatch):
+    server = m2m_server(total_scenes=20, latency=0.05)
+    monkeypatch.setattr(Api, "scene_metadata", SceneMetadataCache())
+    unknown = server.catalog.entity_id(4)
+    respond = server.scene_metadata_list
+    monkeypatch.setattr(
+        server, "scene_metadata_list",
+        lambda payload: [record for record in respond(payload) if record["entityId"] != unknown],
+    )
+
+    page = summary_page()
+    # Concurrent first accesses share one bulk fetch
+    threads = [threading.Thread(target=page.results.load_metadata) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert server.requests["scene-metadata-list"] == 1
+    assert page.results[4].meta.get("Entity ID") is None
+
+    # Copies made by filters still see the scene as pending, the cache knows it has no record
+    assert page.results.take([4, 5]).metadata("Entity ID") == [None, server.catalog.entity_id(5)]
+    assert summary_page().results[:6].metadata("Sensor")[4] is None
+    assert server.requests["scene-metadata-list"] == 1
+
+
+def test_cache_is_bounded():
+    cache = SceneMetadataCache(max_entries=2)
+    cache.set_many("d", [{"entityId": "a"}, {"entityId": "b"}])
+    cache.get_many("d", ["a"])
+    cache.set_many("d", [{"entityId": "c"}])
+
+    assert set(cache.get_many("d", ["a", "b", "c"])) == {"a", "c"}
+    assert fetch_metadata(Api, "d", ["a", "c"], cache=cache) == {"a": {"entityId": "a"}, "c": {"entityId": "c"}}
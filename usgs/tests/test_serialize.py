@@ -0,0 +1,79 @@
+import dataclasses
+import datetime
+
+from ..download import DownloadModel, DownloadRequestQuery
+from ..filters import AcquisitionFilter, GeoJson, Point, SceneFilter, SpatialGeojson, SpatialMbr
+from ..scene import SceneQuery
+from ..serialize import serializer_for, to_payload
+from ..utilities import asdict
+
+POLYGON = [[[-100.0, 30.0], [-90.0, 30.0], [-90.0, 40.0], [-100.0, 40.0], [-100.0, 30.0]]]
+
+
+def geojson_query(**kwargs):
+    return SceneQuery(
+        datasetName="fake_dataset",
+        sceneFilter=SceneFilter(
+            spatialFilter=SpatialGeojson(geoJson=GeoJson(type="Polygon", coordinates=POLYGON)),
+            acquisitionFilter=AcquisitionFilter(start=datetime.date(2020, 1, 1), end=datetime.date(2020, 2, 1)),
+        ),
+        **kwargs,
+    )
+
+
+def test_matches_dataclasses_asdict_without_private_members():
+    query = geojson_query()
+    expected = dataclasses.asdict(query)
+
+    assert asdict(query) == expected
+
+    # skip_empty drops the None members of the query, not those of its filters
+    payload = query.to_dict()
+    assert payload == {key: value for key, value in expected.items() if value is not None}
+    assert payload["sceneFilter"]["cloudCoverFilter"] is None
+    assert payload["sceneFilter"]["spatialFilter"] == {
+        "filterType": "geojson",
+        "geoJson": {"type": "Polygon", "coordinates": POLYGON},
+    }
+
+
+def test_nested_dataclasses_in_lists():
+    query = DownloadRequestQuery(downloads=[DownloadModel(entityId="a", productId="p")], label="l")
+    assert query.to_dict()["downloads"] == [{"entityId": "a", "productId": "p"}]
+
+    mbr = SpatialMbr(lowerLeft=Point(latitude=1, longitude=2), upperRight=Point(latitude=3, longitude=4))
+    assert to_payload([mbr], skip_empty=True) == [
+        {"filterType": "mbr", "lowerLeft": {"latitude": 1, "longitude": 2}, "upperRight": {"latitude": 3, "longitude": 4}}
+    ]
+
+
+def test_plain_lists_are_shared_not_copied():
+    payload = geojson_query().to_dict()
+    assert payload["sceneFilter"]["spatialFilter"]["geoJson"]["coordinates"] is POLYGON
+
+
+def test_shared_filters_are_serialized_once():
+    query = geojson_query()
+    split = dataclasses.replace(query, startingNumber=101)
+
+    first = query.to_dict()["sceneFilter"]["spatialFilter"]["geoJson"]
+    assert split.to_dict()["sceneFilter"]["spatialFilter"]["geoJson"] is first
+    assert serializer_for(GeoJson) is serializer_for(GeoJson)
+
+    # A different instance gets its own payload
+    other = GeoJson(type="Polygon", coordinates=[POLYGON[0][:-1]])
+    assert to_payload(other) is not first and to_payload(other)["coordinates"] == [POLYGON[0][:-1]]
+
+
+def test_assigning_a_field_drops_the_memoized_payload():
+    point = Point(latitude=1, longitude=2)
+    assert to_payload(point) == {"latitude": 1, "longitude": 2}
+
+    point.latitude = 5
+    assert to_payload(point) == {"latitude": 5, "longitude": 2}
+
+    geojson = GeoJson(type="Polygon", coordinates=POLYGON)
+    first = to_payload(geojson)
+    geojson.coordinates = [POLYGON[0][:-1]]
+    assert to_payload(geojson) is not first and to_payload(geojson)["coordinates"] == [POLYGON[0][:-1]]
+    assert geojson == GeoJson(type="Polygon", coordinates=[POLYGON[0][:-1]])
@@ -0,0 +1,167 @@
+import datetime
+
+from ..api import Api
+from ..download import DownloadOptionQuery, DownloadRetrieveQuery
+from ..filters import AcquisitionFilter, CloudCoverFilter, Point, SceneFilter, SpatialMbr
+from ..manager import DownloadManager
+from ..scene import SceneCursor, SceneQuery
+from . import benchmark
+
+
+def test_scene_search_paginates(m2m_server):
+    server = m2m_server(total_scenes=250)
+
+    page = Api.fetch(SceneQuery(datasetName="fake_dataset", maxResults=100))
+    entity_ids = [scene.entityId for scene in page.results]
+    while page.has_more:
+        page = page.next()
+        entity_ids += [scene.entityId for scene in page.results]
+
+    assert page.totalHits == 250
+    assert entity_ids == [server.catalog.entity_id(index) for index in range(250)]
+    assert server.requests["scene-search"] == 3
+
+
+def test_scene_search_filters(m2m_server):
+    server = m2m_server(total_scenes=500)
+
+    scene_filter = SceneFilter(
+        spatialFilter=SpatialMbr(
+            lowerLeft=Point(latitude=30.2, longitude=-99.8),
+            upperRight=Point(latitude=31.5, longitude=-98.5),
+        ),
+        acquisitionFilter=AcquisitionFilter(start=datetime.date(2020, 1, 1), end=datetime.date(2020, 6, 30)),
+        cloudCoverFilter=CloudCoverFilter(min=0, max=50),
+    )
+    page = Api.fetch(SceneQuery(datasetName="fake_dataset", sceneFilter=scene_filter, maxResults=500))
+
+    expected = server.catalog.search(
+        {
+            "spatialFilter": {
+                "filterType": "mbr",
+                "lowerLeft": {"latitude": 30.2, "longitude": -99.8},
+                "upperRight": {"latitude": 31.5, "longitude": -98.5},
+            },
+            "acquisitionFilter": {"start": "2020-01-01", "end": "2020-06-30"},
+            "cloudCoverFilter": {"min": 0, "max": 50},
+        }
+    )
+    assert 0 < page.totalHits == len(expected) < 500
+    assert all(scene.cloudCover <= 50 for scene in page.results)
+
+
+def test_download_retrieve_stages_requests(m2m_server):
+    server = m2m_server(staging_delay=0.3)
+
+    options = Api.fetch(DownloadOptionQuery(datasetName="fake_dataset", entityIds=["FAKE00000001"]))
+    assert options[0].filesize == server.file_size
+
+    server.download_request(
+        {"label": "staged", "downloads": [{"entityId": "FAKE00000001", "productId": options[0].id}]}
+    )
+    queue = Api.fetch(DownloadRetrieveQuery(label="staged"))
+    assert not queue.available and queue.requested[0].entityId == "FAKE00000001"
+
+    server.requested["FAKE00000001"] -= 1
+    queue = Api.fetch(DownloadRetrieveQuery(label="staged"))
+    assert queue.available[0].url.endswith("/download/FAKE00000001")
+
+
+def test_injected_errors_are_retried(m2m_server):
+    server = m2m_server(total_scenes=300, error_rate=0.3, seed=1)
+
+    pages = [
+        Api.fetch(SceneQuery(datasetName="fake_dataset", maxResults=30, startingNumber=start))
+        for start in range(1, 301, 30)
+    ]
+
+    assert sum(len(page.results) for page in pages) == 300
+    assert server.requests["scene-search"] > 10
+
+
+def test_download_manager_end_to_end(m2m_server, tmp_path, monkeypatch, capsys):
+    server = m2m_server(staging_delay=0.05, file_size=4096)
+    monkeypatch.chdir(tmp_path)
+
+    manager = DownloadManager(Api(), "fake_dataset")
+    manager.add_scenes(["FAKE00000101", "FAKE00000102", "FAKE00000109"])
+    manager.start(cool_down=0.05)
+
+    saved = sorted(path.name for path in tmp_path.iterdir())
+    assert len(saved) == 2 and all(name.endswith(".zip") for name in saved)
+    assert (tmp_path / saved[0]).stat().st_size == 4096
+    assert "FAKE00000109" in manager.failed
+    assert server.requests["download"] == 2
+
+
+def test_benchmark_reports_throughput():
+    results = benchmark.main(
+        ["--scenes", "200", "--page-size", "50", "--hydrate", "500", "--downloads", "3", "--file-size", "2048"]
+    )
+
+    search, prefetch, stream, hydrate, download = results
+    assert hydrate.items == 500
+    assert search.items == prefetch.items == stream.items == 200
+    assert search.requests == prefetch.requests == stream.requests == 4
+    assert download.items == 3 and download.bytes >= 3 * 2048
+    assert all(result.items_per_sec > 0 for result in results)
+
+
+def test_pages_prefetch_in_order(m2m_server):
+    server = m2m_server(total_scenes=1000, latency=0.02)
+
+    first = Api.fetch(SceneQuery(datasetName="fake_dataset", maxResults=100, metadataType="summary"))
+    pages = list(first.pages(window=4))
+
+    assert [page.startingNumber for page in pages] == list(range(1, 1001, 100))
+    assert [scene.entityId for page in pages for scene in page.results] == [
+        server.catalog.entity_id(index) for index in range(1000)
+    ]
+    assert first._query.startingNumber == 1
+    assert server.requests["scene-search"] == 10
+
+
+def test_next_leaves_page_query_untouched(m2m_server):
+    m2m_server(total_scenes=150)
+
+    first = Api.fetch(SceneQuery(datasetName="fake_dataset", maxResults=100))
+    second = first.next()
+
+    # next() moves the result set past the page it returned, the query stays
+    assert first._query.startingNumber == 1 and not first.has_more
+    assert second._query.startingNumber == 101 and not second.has_more
+    assert len(second) == 50
+
+
+def test_repeated_next_walks_every_page_once(m2m_server):
+    server = m2m_server(total_scenes=350)
+
+    scene_cursor = Api.fetch(SceneQuery(datasetName="fake_dataset", maxResults=100))
+    entity_ids = list(scene_cursor.results.entityId)
+    while scene_cursor.has_more:
+        entity_ids += scene_cursor.next().results.entityId
+
+    assert len(entity_ids) == len(set(entity_ids)) == scene_cursor.totalHits == 350
+    assert scene_cursor.next() is scene_cursor
+    assert server.requests["scene-search"] == 4
+
+
+def test_iter_scenes_resumes_from_saved_cursor(m2m_server):
+    server = m2m_server(total_scenes=250)
+    dataset = Api().dataset(datasetName="fake_dataset")
+
+    scenes = dataset.iter_scenes(
+        sceneFilter=SceneFilter(acquisitionFilter=AcquisitionFilter(start=datetime.date(2020, 1, 1))),
+        maxResults=40,
+    )
+    crawled = [next(scenes).entityId for _ in range(130)]
+    saved = scenes.cursor.to_json()
+
+    assert SceneCursor.from_json(saved).startingNumber == 131
+
+    resumed = dataset.iter_scenes(cursor=SceneCursor.from_json(saved))
+    crawled += [scene.entityId for scene in resumed]
+
+    assert crawled == [server.catalog.entity_id(index) for index in range(250)]
+    assert resumed.cursor.startingNumber == 251
+    assert list(resumed) == []
@@ -0,0 +1,94 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from ..aio import AsyncApi
+from ..dataset import DatasetQuery
+from ..download import DownloadRequestQuery
+from ..singleflight import AsyncSingleFlight, SingleFlight
+
+
+def test_concurrent_identical_calls_share_one_request():
+    group = SingleFlight()
+    calls = []
+    start = threading.Barrier(5)
+
+    def request():
+        calls.append(1)
+        time.sleep(0.05)
+        return {"datasetId": "1"}
+
+    results = []
+
+    def worker():
+        start.wait()
+        results.append(group.do("dataset:abc", request))
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [{"datasetId": "1"}] * 5
+    assert group.in_flight() == 0
+
+
+def test_errors_are_shared_and_not_remembered():
+    group = SingleFlight()
+
+    def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        group.do("key", fail)
+
+    assert group.do("key", lambda: "ok") == "ok"
+
+
+def test_async_calls_share_one_request():
+    group = AsyncSingleFlight()
+    calls = []
+
+    async def request():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "page"
+
+    async def run():
+        return await asyncio.gather(*(group.do("key", request) for _ in range(10)))
+
+    assert asyncio.new_event_loop().run_until_complete(run()) == ["page"] * 10
+    assert len(calls) == 1
+
+
+def test_async_api_coalesces_identical_fetches(mock_request, mock_api, monkeypatch):
+    client = AsyncApi(api=mock_api)
+    calls = []
+    original = client.request
+
+    async def counted(*args, **kwargs):
+        calls.append(args[0])
+        await asyncio.sleep(0.01)
+        return await original(*args, **kwargs)
+
+    monkeypatch.setattr(client, "request", counted)
+
+    async def run():
+        return await client.gather(*(DatasetQuery(datasetName="corona2") for _ in range(4)))
+
+    datasets = asyncio.new_event_loop().run_until_complete(run())
+
+    assert len(calls) == 1
+    assert len({id(dataset) for dataset in datasets}) == 4
+
+
+def test_download_request_is_never_coalesced(mock_request, mock_api, monkeypatch):
+    group = SingleFlight()
+    monkeypatch.setattr(mock_api, "single_flight", group)
+    monkeypatch.setattr(group, "do", lambda *args: pytest.fail("coalesced"))
+
+    mock_api.fetch(DownloadRequestQuery(label="label"))
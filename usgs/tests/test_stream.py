@@ -0,0 +1,110 @@
+import json
+
+import pytest
+
+from ..download import Download, DownloadRetrieveQuery
+from ..exceptions import AuthenticationError
+from ..scene import SceneModel, SceneQuery
+from ..stream import JsonStream, ResultStream
+from ..telemetry import Instrumentation, MetricsCollector
+from ..throttle import RequestScheduler
+from .stubs import responses
+
+
+class StreamingResponse:
+    status_code = 200
+    headers = {}
+
+    def __init__(self, body, chunk=7):
+        self.body = body.encode("utf-8")
+        self.chunk = chunk
+        self.closed = False
+
+    def iter_content(self, chunk_size=1024):
+        for start in range(0, len(self.body), self.chunk):
+            yield self.body[start:start + self.chunk]
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def stream_api(mock_api, monkeypatch):
+    def respond(body):
+        monkeypatch.setattr(
+            "requests.post", lambda *args, **kwargs: StreamingResponse(body)
+        )
+
+    mock_api.respond = respond
+    yield mock_api
+    del mock_api.respond
+
+
+def test_json_stream_handles_values_split_across_chunks():
+    body = '{"data": {"results": [{"a": 12345}, {"b": "x\\u00e9y"}, 1.5e10], "total": 3}, "n": null}'
+    chunks = [body[i:i + 3].encode() for i in range(0, len(body), 3)]
+
+    envelope = {}
+    items = list(JsonStream(chunks).items(("data",), ("results",), envelope))
+
+    assert items == [("results", {"a": 12345}), ("results", {"b": "xéy"}), ("results", 1.5e10)]
+    assert envelope == {"data": {"total": 3}, "n": None}
+
+
+def test_scene_search_streams_scene_models(stream_api):
+    sample = responses.SAMPLES["scene-search"]
+    stream_api.respond(json.dumps(sample))
+
+    result = stream_api.stream(SceneQuery(datasetName="corona2"))
+    scenes = list(result)
+
+    assert all(isinstance(scene, SceneModel) for scene in scenes)
+    assert [scene.entityId for scene in scenes] == [
+        item["entityId"] for item in sample["data"]["results"]
+    ]
+    assert result.meta["totalHits"] == sample["data"]["totalHits"]
+
+
+def test_download_retrieve_streams_both_lists(stream_api):
+    sample = responses.SAMPLES["download-retrieve"]
+    stream_api.respond(json.dumps(sample))
+
+    downloads = list(stream_api.stream(DownloadRetrieveQuery(label="label")))
+
+    assert all(isinstance(download, Download) for download in downloads)
+    assert len(downloads) == len(sample["data"]["available"]) + len(sample["data"]["requested"])
+
+
+def test_stream_reports_envelope_errors(stream_api):
+    stream_api.respond(
+        json.dumps({"data": None, "errorCode": "AUTH_KEY_INVALID", "errorMessage": "expired"})
+    )
+
+    with pytest.raises(AuthenticationError):
+        list(stream_api.stream(SceneQuery(datasetName="corona2")))
+
+
+def test_streamed_responses_feed_scheduler_and_telemetry(stream_api, monkeypatch):
+    sample = responses.SAMPLES["scene-search"]
+    body = json.dumps(sample)
+    stream_api.respond(body)
+    collector = MetricsCollector()
+    scheduler = RequestScheduler()
+    monkeypatch.setattr(stream_api, "hooks", Instrumentation([collector]))
+    monkeypatch.setattr(stream_api, "scheduler", scheduler)
+    scheduler.record_rate_limit("scene-search")
+    penalized = scheduler.bucket("scene-search").rate
+
+    list(stream_api.stream(SceneQuery(datasetName="corona2")))
+
+    assert scheduler.bucket("scene-search").rate > penalized
+    metrics = collector.to_dict()["scene-search"]
+    assert metrics["responses"] == 1
+    assert metrics["response_bytes"] == len(body.encode("utf-8"))
+
+
+def test_streaming_requires_stream_models(mock_api):
+    from ..dataset import DatasetQuery
+
+    with pytest.raises(ValueError):
+        mock_api.stream(DatasetQuery(datasetName="corona2"))
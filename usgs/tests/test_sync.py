@@ -0,0 +1,86 @@
+import datetime
+
+import pytest
+
+from ..api import Api
+from ..filters import Point, SceneFilter, SpatialMbr
+from ..scene import SceneQuery
+from ..sync import IncrementalSync, SyncStore, sync_key
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def aoi_query(**kwargs):
+    return SceneQuery(
+        datasetName="fake_dataset",
+        sceneFilter=SceneFilter(
+            spatialFilter=SpatialMbr(
+                lowerLeft=Point(latitude=30.0, longitude=-100.0), upperRight=Point(latitude=40.0, longitude=-90.0)
+            )
+        ),
+        **kwargs,
+    )
+
+
+def test_sync_key_ignores_paging_and_ingest_window():
+    sync = IncrementalSync(Api)
+    query = aoi_query()
+    delta = sync.delta_query(query, datetime.datetime(2020, 1, 1), datetime.datetime(2020, 2, 1))
+
+    assert sync_key(query) == sync_key(delta) == sync_key(aoi_query(maxResults=10, startingNumber=11))
+    assert sync_key(query) != sync_key(SceneQuery(datasetName="fake_dataset"))
+
+    # Summary and full records fingerprint differently, they are synced apart
+    assert sync_key(query) != sync_key(aoi_query(metadataType="summary"))
+
+
+def test_delta_query_keeps_dict_scene_filters():
+    sync = IncrementalSync(Api)
+    scene_filter = dict(aoi_query().to_dict()["sceneFilter"], metadataFilter={"filterType": "value"})
+    query = SceneQuery(datasetName="fake_dataset", sceneFilter=scene_filter)
+
+    delta = sync.delta_query(query, datetime.datetime(2020, 1, 1), datetime.datetime(2020, 2, 1))
+    payload = delta.to_dict()["sceneFilter"]
+
+    assert payload["spatialFilter"] == scene_filter["spatialFilter"]
+    assert payload["metadataFilter"] == {"filterType": "value"}
+    assert payload["ingestFilter"]["start"] == datetime.datetime(2020, 1, 1)
+    assert sync_key(delta) == sync_key(query)
+    assert query.sceneFilter["ingestFilter"] is None
+
+    with pytest.raises(TypeError):
+        sync.delta_query(SceneQuery(datasetName="fake_dataset", sceneFilter="bad"), None, None)
+
+
+def test_incremental_runs_emit_only_new_and_changed(m2m_server, tmp_path):
+    server = m2m_server(total_scenes=50)
+    clock = Clock(datetime.datetime(2020, 2, 21, 12))
+    sync = IncrementalSync(Api, SyncStore(str(tmp_path / "sync.sqlite")), page_size=20, clock=clock)
+
+    first = sync.run(aoi_query())
+    assert first.since is None
+    assert first.new == [server.catalog.entity_id(index) for index in range(50)] and first.changed == []
+
+    # Nothing ingested since
+    again = sync.run(aoi_query())
+    assert again.since == datetime.datetime(2020, 2, 20, 12)
+    assert again.entity_ids == [] and again.scanned == 1
+    assert server.requests["scene-search"] == 3 + 1
+
+    # Twenty more scenes ingested, and the scenes in the overlap are edited
+    server.catalog.total_scenes = 70
+    clock.now = datetime.datetime(2020, 3, 12, 12)
+    edited = server.catalog.cloud_cover
+    server.catalog.cloud_cover = lambda index: edited(index) + 1
+
+    delta = IncrementalSync(Api, SyncStore(str(tmp_path / "sync.sqlite")), page_size=20, clock=clock).run(aoi_query())
+
+    assert delta.new == [server.catalog.entity_id(index) for index in range(50, 70)]
+    assert delta.changed == [server.catalog.entity_id(49)]
+    assert delta.scanned == 21
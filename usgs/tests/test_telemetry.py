@@ -0,0 +1,63 @@
+import pytest
+
+from ..exceptions import TransientServerError
+from ..retry import RetryPolicy
+from ..scene import SceneQuery
+from ..telemetry import Hook, Instrumentation, MetricsCollector
+
+
+@pytest.fixture
+def collector(mock_api, monkeypatch):
+    collector = MetricsCollector()
+    monkeypatch.setattr(mock_api, "hooks", Instrumentation([collector]))
+    return collector
+
+
+def test_collector_records_per_endpoint_metrics(mock_request, mock_api, collector):
+    mock_api.login("test", "pass")
+    mock_api.fetch(SceneQuery(datasetName="corona2"))
+
+    metrics = collector.to_dict()
+
+    assert set(metrics) == {"login", "scene-search"}
+    scene_search = metrics["scene-search"]
+    assert scene_search["requests"] == scene_search["responses"] == 1
+    assert scene_search["request_bytes"] > 0
+    assert scene_search["response_bytes"] == len(mock_request.text)
+    assert scene_search["latency_p50"] is not None
+    assert scene_search["hydrated"] == len(mock_request.data["data"]["results"])
+
+
+def test_errors_and_retries_are_counted(mock_request, mock_api, collector, monkeypatch):
+    monkeypatch.setattr(mock_api, "retry", RetryPolicy(max_attempts=3, base_delay=0, max_delay=0))
+    monkeypatch.setattr(mock_request, "status_code", 503)
+
+    with pytest.raises(TransientServerError):
+        mock_api.login("test", "pass")
+
+    login = collector.to_dict()["login"]
+    assert login["requests"] == 3
+    assert login["retries"] == 2
+    assert login["errors"] == 3
+
+
+def test_prometheus_export(mock_request, mock_api, collector):
+    mock_api.login("test", "pass")
+
+    text = collector.to_prometheus()
+
+    assert '# TYPE usgs_m2m_request_latency_seconds histogram' in text
+    assert 'usgs_m2m_requests_total{endpoint="login"} 1' in text
+    assert 'usgs_m2m_request_latency_seconds_bucket{endpoint="login",le="+Inf"} 1' in text
+
+
+def test_failing_hook_does_not_break_requests(mock_request, mock_api, monkeypatch):
+    class Broken(Hook):
+        def on_request(self, event):
+            raise RuntimeError("boom")
+
+    monkeypatch.setattr(mock_api, "hooks", Instrumentation([Broken()]))
+
+    mock_api.login("test", "pass")
+
+    assert mock_api.API_KEY == mock_request.data.get("data")
@@ -0,0 +1,47 @@
+import pytest
+
+from ..exceptions import RateLimitError
+from ..throttle import RequestScheduler, TokenBucket
+
+
+def test_bucket_allows_burst_then_asks_to_wait():
+    bucket = TokenBucket(rate=2, capacity=2)
+
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.5, abs=0.05)
+
+
+def test_bucket_penalize_and_recover():
+    bucket = TokenBucket(rate=10)
+
+    bucket.penalize(0.5)
+    assert bucket.rate == 5
+
+    for _ in range(100):
+        bucket.recover()
+    assert bucket.rate == 10
+
+
+def test_scheduler_keeps_separate_budgets_per_endpoint():
+    scheduler = RequestScheduler(rates={"scene-search": 20})
+
+    assert scheduler.bucket("scene-search").rate == 20
+    assert scheduler.bucket("download-request").rate == RequestScheduler.DEFAULT_RATES["download-request"]
+    assert scheduler.bucket("login").rate == scheduler.default_rate
+
+    scheduler.record_rate_limit("scene-search")
+    assert scheduler.stats()["scene-search"] == 10
+    assert scheduler.stats()["download-request"] == 1
+
+
+def test_api_penalizes_endpoint_on_rate_limit(mock_request, mock_api, monkeypatch):
+    scheduler = RequestScheduler()
+    monkeypatch.setattr(mock_api, "scheduler", scheduler)
+    monkeypatch.setattr(mock_api, "retry", None)
+    monkeypatch.setattr(mock_request, "status_code", 429)
+
+    with pytest.raises(RateLimitError):
+        mock_api.login("test", "pass")
+
+    assert scheduler.stats()["login"] == scheduler.default_rate * scheduler.backoff
@@ -0,0 +1,42 @@
+import pytest
+
+from ..api import Api
+from ..transport import SessionTransport, Transport
+
+
+def test_session_transport_pools_connections():
+    transport = SessionTransport(pool_connections=2, pool_maxsize=32, keep_alive=True)
+
+    adapter = transport.session.get_adapter(Api.BASE_URL)
+
+    assert adapter._pool_maxsize == 32
+    assert adapter._pool_connections == 2
+    assert transport.session.headers["Connection"] == "keep-alive"
+
+    session = transport.session
+    assert transport.session is session
+
+    transport.close()
+    assert transport._session is None
+
+
+def test_api_requests_go_through_transport(mock_request, mock_api):
+    mock_api.login("test", "pass")
+
+    assert mock_request.end_point == "login"
+    assert isinstance(mock_api.transport, Transport)
+
+
+def test_use_transport_replaces_pool():
+    original = Api.transport
+    try:
+        transport = Api.use_transport(pool_maxsize=4)
+        assert Api.transport is transport
+        assert transport.pool_maxsize == 4
+    finally:
+        Api.use_transport(original)
+
+
+def test_base_transport_is_abstract():
+    with pytest.raises(NotImplementedError):
+        Transport().post("http://localhost")
@@ -0,0 +1,136 @@
+"""Client side rate limiting for the M2M endpoints.
+
+Each endpoint gets its own token bucket. Buckets adapt to the server:
+a rate limit error cuts the rate multiplicatively, and every success
+recovers it additively up to the configured ceiling (AIMD).
+"""
+import asyncio
+import threading
+import time
+from typing import Dict
+
+
+class TokenBucket:
+    """Thread-safe token bucket. Callers reserve a token and are told how
+    long to wait for it, so concurrent callers queue up fairly instead of
+    spinning
+
+    Parameters
+    ----------
+    rate : float
+        Tokens added per second, this is also the ceiling the rate
+        recovers to after a penalty
+    capacity : float, optional
+        Maximum burst size, by default one second worth of tokens
+    min_rate : float, optional
+        Floor for the rate when penalized, by default 5% of rate
+    """
+
+    def __init__(self, rate: float, capacity: float = None, min_rate: float = None):
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(rate, 1))
+        self.min_rate = float(min_rate or rate * 0.05)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._updated = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+
+    def reserve(self, tokens: float = 1) -> float:
+        """Take tokens from the bucket, going into debt if required
+
+        Returns
+        -------
+        float
+            Seconds the caller must wait before using the tokens
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self, tokens: float = 1):
+        wait = self.reserve(tokens)
+        if wait:
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: float = 1):
+        wait = self.reserve(tokens)
+        if wait:
+            await asyncio.sleep(wait)
+
+    def penalize(self, factor: float = 0.5, cool_down: float = 1.0):
+        """Multiplicative decrease after the server reported a rate limit.
+        The bucket is also drained so queued callers back off for
+        roughly `cool_down` seconds
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = max(self.min_rate, self.rate * factor)
+            self._tokens = min(self._tokens, -cool_down * self.rate)
+
+    def recover(self, step: float = None):
+        """Additive increase after a successful request, bounded by max_rate"""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + (step or self.max_rate * 0.05))
+
+
+class RequestScheduler:
+    """Per endpoint token buckets keyed on Query._end_point
+
+    Parameters
+    ----------
+    rates : dict, optional
+        Requests per second by endpoint, merged over DEFAULT_RATES
+    default_rate : float, optional
+        Rate for endpoints without an explicit budget, by default 10
+    backoff : float, optional
+        Multiplier applied to an endpoint's rate on a rate limit error,
+        by default 0.5
+    """
+
+    DEFAULT_RATES = {
+        "scene-search": 10.0,
+        "download-options": 5.0,
+        "download-request": 1.0,
+        "download-retrieve": 2.0,
+    }
+
+    def __init__(self, rates: dict = None, default_rate: float = 10.0, backoff: float = 0.5):
+        self.rates = {**self.DEFAULT_RATES, **(rates or {})}
+        self.default_rate = default_rate
+        self.backoff = backoff
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, endpoint: str) -> TokenBucket:
+        bucket = self._buckets.get(endpoint)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.get(endpoint)
+                if bucket is None:
+                    bucket = TokenBucket(self.rates.get(endpoint, self.default_rate))
+                    self._buckets[endpoint] = bucket
+        return bucket
+
+    def acquire(self, endpoint: str):
+        self.bucket(endpoint).acquire()
+
+    async def acquire_async(self, endpoint: str):
+        await self.bucket(endpoint).acquire_async()
+
+    def record_success(self, endpoint: str):
+        self.bucket(endpoint).recover()
+
+    def record_rate_limit(self, endpoint: str):
+        self.bucket(endpoint).penalize(self.backoff)
+
+    def stats(self) -> dict:
+        """Current rate per endpoint"""
+        return {endpoint: bucket.rate for endpoint, bucket in self._buckets.items()}
@@ -0,0 +1,308 @@
+"""HTTP transports used by the Api to talk to the M2M service and
+the download hosts.
+
+A transport owns its connection pool so repeated calls to the same host
+reuse an open TCP/TLS connection instead of paying the handshake on
+every request.
+"""
+import asyncio
+import functools
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Keep a handle on the original so a monkeypatched requests.post
+# (as used by the test-suite) can be detected and honoured
+_REQUESTS_POST = requests.post
+
+
+class Transport:
+    """Base transport. Subclasses must implement post, get and close.
+    Responses are expected to behave like a requests.Response
+    (status_code, text, content, headers, iter_content, close)
+    """
+
+    def post(self, url: str, data=None, headers: dict = None, **kwargs):
+        raise NotImplementedError("Transport must implement post")
+
+    def get(self, url: str, headers: dict = None, **kwargs):
+        raise NotImplementedError("Transport must implement get")
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SessionTransport(Transport):
+    """Pooled, keep-alive transport backed by a requests.Session
+
+    Parameters
+    ----------
+    pool_connections : int, optional
+        Number of host pools to cache, by default 10
+    pool_maxsize : int, optional
+        Maximum connections kept alive per host, by default 10
+    pool_block : bool, optional
+        Block when the pool is exhausted instead of opening throwaway
+        connections, by default False
+    keep_alive : bool, optional
+        Send Connection: keep-alive, by default True
+    timeout : float, optional
+        Default (connect, read) timeout in seconds, by default None
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        pool_block: bool = False,
+        keep_alive: bool = True,
+        timeout: float = None,
+    ):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self._session = None
+
+    @property
+    def session(self) -> requests.Session:
+        if self._session is None:
+            self._session = self._build_session()
+        return self._session
+
+    def _build_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers["Connection"] = "keep-alive" if self.keep_alive else "close"
+        return session
+
+    def post(self, url: str, data=None, headers: dict = None, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+
+        if requests.post is not _REQUESTS_POST:
+            return requests.post(url, data, headers=headers, **kwargs)
+
+        return self.session.post(url, data, headers=headers, **kwargs)
+
+    def get(self, url: str, headers: dict = None, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.get(url, headers=headers, **kwargs)
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+
+class HttpxTransport(Transport):
+    """HTTP/2 capable transport backed by httpx (optional dependency,
+    install with the `http2` extra)
+
+    Parameters
+    ----------
+    http2 : bool, optional
+        Negotiate HTTP/2 where the server supports it, by default True
+    max_connections : int, optional
+        Maximum open connections, by default 10
+    max_keepalive_connections : int, optional
+        Maximum idle connections kept alive, by default 10
+    timeout : float, optional
+        Default timeout in seconds, by default None
+    """
+
+    def __init__(
+        self,
+        http2: bool = True,
+        max_connections: int = 10,
+        max_keepalive_connections: int = 10,
+        timeout: float = None,
+    ):
+        try:
+            import httpx
+        except ImportError as e:
+            raise ImportError(
+                "HttpxTransport requires httpx, install with `pip install usgs-m2m-api[http2]`"
+            ) from e
+
+        self._client = httpx.Client(
+            http2=http2,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+        )
+
+    def post(self, url: str, data=None, headers: dict = None, **kwargs):
+        stream = kwargs.pop("stream", False)
+        kwargs.pop("timeout", None)
+        if stream:
+            request = self._client.build_request(
+                "POST", url, content=data, headers=headers, **kwargs
+            )
+            return HttpxResponse(_httpx_call(self._client.send, request, stream=True))
+        return HttpxResponse(
+            _httpx_call(self._client.post, url, content=data, headers=headers, **kwargs)
+        )
+
+    def get(self, url: str, headers: dict = None, **kwargs):
+        stream = kwargs.pop("stream", False)
+        kwargs.pop("timeout", None)
+        request = self._client.build_request("GET", url, headers=headers, **kwargs)
+        return HttpxResponse(_httpx_call(self._client.send, request, stream=stream))
+
+    def close(self):
+        self._client.close()
+
+
+def _httpx_call(fn, *args, **kwargs):
+    """Run an httpx call, re-raising its transport errors as the
+    requests exceptions the Api understands
+    """
+    import httpx
+
+    try:
+        return fn(*args, **kwargs)
+    except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+        raise requests.exceptions.ConnectTimeout(str(e)) from e
+    except httpx.TransportError as e:
+        raise requests.exceptions.ConnectionError(str(e)) from e
+
+
+async def _httpx_call_async(fn, *args, **kwargs):
+    import httpx
+
+    try:
+        return await fn(*args, **kwargs)
+    except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+        raise requests.exceptions.ConnectTimeout(str(e)) from e
+    except httpx.TransportError as e:
+        raise requests.exceptions.ConnectionError(str(e)) from e
+
+
+class HttpxResponse:
+    """Thin adapter exposing the requests.Response surface the Api uses
+    on top of an httpx.Response
+    """
+
+    def __init__(self, response):
+        self._response = response
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+    @property
+    def content(self):
+        return self._response.read()
+
+    def iter_content(self, chunk_size: int = 1024):
+        return self._response.iter_bytes(chunk_size=chunk_size)
+
+
+class AsyncTransport:
+    """Base asyncio transport. Subclasses must implement post, get and close
+    as coroutines returning requests.Response-like objects
+    """
+
+    async def post(self, url: str, data=None, headers: dict = None, **kwargs):
+        raise NotImplementedError("AsyncTransport must implement post")
+
+    async def get(self, url: str, headers: dict = None, **kwargs):
+        raise NotImplementedError("AsyncTransport must implement get")
+
+    async def close(self):
+        pass
+
+
+class ThreadedAsyncTransport(AsyncTransport):
+    """Runs a blocking Transport in the default executor so the event loop
+    can overlap many requests while still sharing one connection pool
+
+    Parameters
+    ----------
+    transport : Transport, optional
+        The blocking transport to delegate to, by default a new SessionTransport
+    """
+
+    def __init__(self, transport: Transport = None):
+        self.transport = transport or SessionTransport()
+
+    async def post(self, url: str, data=None, headers: dict = None, **kwargs):
+        return await self._run(self.transport.post, url, data, headers=headers, **kwargs)
+
+    async def get(self, url: str, headers: dict = None, **kwargs):
+        return await self._run(self.transport.get, url, headers=headers, **kwargs)
+
+    async def _run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(fn, *args, **kwargs))
+
+
+class HttpxAsyncTransport(AsyncTransport):
+    """Native asyncio transport backed by httpx.AsyncClient (optional
+    dependency, install with the `http2` extra)
+
+    Parameters
+    ----------
+    http2 : bool, optional
+        Negotiate HTTP/2 where the server supports it, by default True
+    max_connections : int, optional
+        Maximum open connections, by default 100
+    max_keepalive_connections : int, optional
+        Maximum idle connections kept alive, by default 20
+    timeout : float, optional
+        Default timeout in seconds, by default None
+    """
+
+    def __init__(
+        self,
+        http2: bool = True,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        timeout: float = None,
+    ):
+        try:
+            import httpx
+        except ImportError as e:
+            raise ImportError(
+                "HttpxAsyncTransport requires httpx, install with `pip install usgs-m2m-api[http2]`"
+            ) from e
+
+        self._client = httpx.AsyncClient(
+            http2=http2,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+        )
+
+    async def post(self, url: str, data=None, headers: dict = None, **kwargs):
+        kwargs.pop("stream", None)
+        kwargs.pop("timeout", None)
+        response = await _httpx_call_async(
+            self._client.post, url, content=data, headers=headers, **kwargs
+        )
+        return HttpxResponse(response)
+
+    async def get(self, url: str, headers: dict = None, **kwargs):
+        kwargs.pop("stream", None)
+        kwargs.pop("timeout", None)
+        response = await _httpx_call_async(self._client.get, url, headers=headers, **kwargs)
+        return HttpxResponse(response)
+
+    async def close(self):
+        await self._client.aclose()
@@ -1,10 +1,10 @@
 import json
 import getpass
+import datetime
+import hashlib
 import requests
 
-from dataclasses import (
-    asdict as dataclass_to_dict
-)
+from .serialize import serializer_for
 
 
 def clean_dataclass_of_private_variables(o: list):
@@ -12,9 +12,35 @@ def clean_dataclass_of_private_variables(o: list):
 
 
 def asdict(o, skip_empty=False):
-    data = dataclass_to_dict(
-        o, dict_factory=clean_dataclass_of_private_variables)
-    return {
-        k: v for k, v in data.items()
-        if not (skip_empty and v is None) and not k.startswith('_')
-    }
+    """The payload form of a dataclass without private members (and None
+    members with skip_empty), built by its compiled serializer
+    """
+    return serializer_for(type(o))(o, skip_empty)
+
+
+class DataTypeEncoder(json.JSONEncoder):
+
+    """
+    A special JSON encoder to produce ISO 8601 formats from datetime objects
+    """
+
+    def default(self, obj):
+        if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+            return obj.isoformat()
+        elif isinstance(obj, datetime.timedelta):
+            return (datetime.datetime.min + obj).time().isoformat()
+
+        return super().default(obj)
+
+
+def canonical_json(data) -> str:
+    """Order-stable JSON form of a payload, used to key caches and
+    coalesce identical requests
+    """
+    return json.dumps(data, cls=DataTypeEncoder, sort_keys=True, separators=(",", ":"))
+
+
+def request_key(endpoint: str, data) -> str:
+    """Digest identifying a request by endpoint and canonical payload"""
+    digest = hashlib.sha1(canonical_json(data).encode("utf-8")).hexdigest()
+    return f"{endpoint}:{digest}"